@@ -1,21 +1,73 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g, Response
 import numpy as np
+import math
 import sys
+import time
+import multiprocessing
 from pathlib import Path
-import threading
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 from models.predict import load_model
-from src.evaluation import get_confusion_matrix, evaluate_model
+from src.evaluation import evaluate_model
 from src.data_preprocessing import prepare_data
-from database.db import save_prediction, get_all_predictions, get_prediction_stats, get_prediction_by_id, delete_prediction
-from config import FEATURE_NAMES, DEBUG
+from database.db import (save_prediction, get_all_predictions, get_prediction_by_id,
+                         delete_prediction, get_job, list_jobs, get_daily_rollup, iter_prediction_batches,
+                         list_partitions, data_version)
+from src.export import EXPORT_FORMATS, csv_chunks, ndjson_chunks, gzip_chunks
+from src.bulk_import import read_chunks, import_predictions
+from src.profiling import RequestProfiler
+from src.what_if import analyze_what_if
+from src.drift import DriftMonitor
+from src.jobs import JobScheduler
+from src.response_cache import ResponseCache
+from src.events import EventBus, sse_stream, RESET_EVENT
+from src.dashboard import DashboardSnapshot, chart_data
+from src.instrumentation import counter, histogram, render_metrics, record_cache, PROMETHEUS_CONTENT_TYPE
+from config import FEATURE_NAMES, DEBUG, JOB_SCHEDULER_ENABLED
 
 app = Flask(__name__)
 app.config['DEBUG'] = DEBUG
 
+HTTP_REQUEST_SECONDS = histogram(
+    'failguard_http_request_duration_seconds', 'HTTP request latency by route', ('route', 'method'))
+HTTP_REQUESTS = counter(
+    'failguard_http_requests_total', 'HTTP requests by route and status', ('route', 'method', 'status'))
+
+profiler = RequestProfiler()
+
+# Dashboard polls get 304s (or cached bodies) until the predictions or the model change
+response_cache = ResponseCache(sources={'predictions': data_version})
+# Open dashboards get new predictions, stats deltas and model changes pushed over /api/stream
+event_bus = EventBus()
+# Stats and latest predictions for page loads, updated by the prediction path below
+dashboard_snapshot = DashboardSnapshot()
+
+def model_version():
+    """Counter advanced whenever the served model or its metrics change."""
+    return response_cache.versions(('model',))[0]
+
+def _stats_delta(prediction, sign):
+    """Change to /api/predictions/stats from adding (1) or removing (-1) one prediction."""
+    return {
+        'total': sign,
+        'risk_distribution': {prediction['risk_level']: sign},
+        'high_risk_count': sign if prediction['risk_level'] == 'HIGH' else 0,
+        'probability_sum': round(sign * prediction['probability'], 6)
+    }
+
+def _non_finite_feature(data):
+    """Name of the first feature that is a number but not a finite one (inf, nan), or None."""
+    for name in FEATURE_NAMES:
+        try:
+            value = float(data.get(name, 0))
+        except (TypeError, ValueError):
+            continue  # Left to the predictor's own error
+        if not math.isfinite(value):
+            return name
+    return None
+
 # Global cache for metrics (computed once and reused)
 _metrics_cache = {
     'accuracy': 0.925,
@@ -25,47 +77,159 @@ _metrics_cache = {
     'roc_auc': 0.9210
 }
 _cache_computed = False
+# Chart data of the loaded model, precomputed by the 'metrics' job
+_chart_data_cache = None
+
+def evaluation_data():
+    """Held-out test set as the loaded model sees it (feature pipeline applied), with column names."""
+    # Serving must not rewrite the scaler or processed data
+    _, X_test, _, y_test, feature_names = prepare_data(save=False)
+    if predictor.pipeline is not None:
+        return predictor.model_inputs(X_test), y_test, predictor.pipeline.feature_names_out_
+    return X_test, y_test, feature_names
 
-def compute_metrics_background():
-    """Compute metrics in background to avoid blocking dashboard loads."""
-    global _metrics_cache, _cache_computed
+def compute_metrics_job(ctx):
+    """'metrics' job: evaluate the loaded model so dashboard loads never block on it."""
+    global _metrics_cache, _cache_computed, _chart_data_cache
     try:
         print("Computing model metrics in background...")
-        _, X_test, _, y_test, _ = prepare_data()
+        ctx.progress(0.0, "Preparing data")
+        X_test, y_test, feature_names = evaluation_data()
+        ctx.progress(0.5, "Evaluating model")
         y_pred = predictor.model.predict(X_test)
         y_pred_proba = predictor.model.predict_proba(X_test)
         metrics = evaluate_model(y_test, y_pred, y_pred_proba)
+        _chart_data_cache = chart_data(predictor.model, X_test, y_test, feature_names)
         _metrics_cache = {k: round(v, 4) for k, v in metrics.items()}
         _cache_computed = True
+        response_cache.bump('model')
+        event_bus.publish('model', {'version': model_version(), 'metrics': _metrics_cache})
         print(f"✓ Metrics computed: {_metrics_cache}")
+        return _metrics_cache
     except Exception as e:
         print(f"✗ Error computing metrics: {e}")
         _cache_computed = True  # Mark as done to avoid retrying
+        response_cache.bump('model')
+        raise
+
+# Processes started by multiprocessing (such as the cross-validation pool of a 'retrain' job)
+# re-import the script that started the app; only the serving process loads the model and
+# runs background work. Spawned processes are named before that import, while
+# parent_process() is only set after it
+SERVING_PROCESS = multiprocessing.current_process().name == 'MainProcess'
 
 # Load model on startup
-try:
+predictor = None
+if SERVING_PROCESS:
+    try:
+        predictor = load_model()
+    except ModuleNotFoundError as e:
+        if 'numpy' in str(e) or '_core' in str(e):
+            print("\n" + "="*70)
+            print("❌ MODEL COMPATIBILITY ERROR")
+            print("="*70)
+            print("\nThe model is not compatible with your Python/numpy version.")
+            print("\n✅ SOLUTION: Run the retraining script (takes 1-2 minutes)")
+            print("\n   Command: python retrain_model.py")
+            print("\nThis will create new model files compatible with your environment.")
+            print("See FIX_NUMPY_ERROR.md for more details.")
+            print("="*70 + "\n")
+        raise
+    except Exception as e:
+        print(f"\n❌ Error loading model: {e}")
+        print("Make sure models/failguard_model.joblib and models/scaler.joblib exist")
+        raise
+
+# Compare incoming features with the training distribution on a schedule
+drift_monitor = DriftMonitor.from_file() if SERVING_PROCESS else None
+if drift_monitor is not None:
+    drift_monitor.start()
+elif SERVING_PROCESS:
+    print("Warning: No drift reference found. Run models/train_model.py to enable drift monitoring")
+
+def reload_model(job):
+    """After a successful 'retrain' job, serve the new model and drift reference."""
+    global predictor, drift_monitor, _chart_data_cache
     predictor = load_model()
-except ModuleNotFoundError as e:
-    if 'numpy' in str(e) or '_core' in str(e):
-        print("\n" + "="*70)
-        print("❌ MODEL COMPATIBILITY ERROR")
-        print("="*70)
-        print("\nThe model is not compatible with your Python/numpy version.")
-        print("\n✅ SOLUTION: Run the retraining script (takes 1-2 minutes)")
-        print("\n   Command: python retrain_model.py")
-        print("\nThis will create new model files compatible with your environment.")
-        print("See FIX_NUMPY_ERROR.md for more details.")
-        print("="*70 + "\n")
-    raise
-except Exception as e:
-    print(f"\n❌ Error loading model: {e}")
-    print("Make sure models/failguard_model.joblib and models/scaler.joblib exist")
-    raise
-
-# Start background task to compute metrics
-print("Starting background metrics computation...")
-metrics_thread = threading.Thread(target=compute_metrics_background, daemon=True)
-metrics_thread.start()
+    _chart_data_cache = None
+    response_cache.bump('model')
+    event_bus.publish('model', {'version': model_version(), 'model': job['result']['model']})
+    if drift_monitor is not None:
+        drift_monitor.stop()
+    drift_monitor = DriftMonitor.from_file()
+    if drift_monitor is not None:
+        drift_monitor.start()
+    print(f"✓ Reloaded model after job {job['id']} ({job['result']['model']})")
+    scheduler.submit('metrics')
+
+# Background work (metrics, retraining, rollups, maintenance) runs through the job scheduler
+scheduler = JobScheduler()
+scheduler.register('metrics', compute_metrics_job)
+scheduler.on_success('retrain', reload_model)
+# Their deletes commit in batches, any of which could race a delta of the prediction path
+scheduler.on_success('retention', lambda job: dashboard_snapshot.invalidate())
+if JOB_SCHEDULER_ENABLED and SERVING_PROCESS:
+    print("Starting background metrics computation...")
+    scheduler.start()
+    scheduler.submit('metrics')
+
+@app.before_request
+def start_request_timer():
+    """Record request start time for latency metrics and start profiling if requested."""
+    g.request_start = time.perf_counter()
+    g.profile_session = profiler.begin(request.headers)
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe request latency per route template (low label cardinality)."""
+    start = g.get('request_start')
+    if start is not None:
+        duration = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.labels(route=route, method=request.method).observe(duration)
+        HTTP_REQUESTS.labels(route=route, method=request.method, status=response.status_code).inc()
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_profile(exc):
+    """End the request's profile session; teardown also runs when the view raised."""
+    session = g.pop('profile_session', None)
+    if session is not None:
+        status = g.get('response_status', 500)
+        profiler.end(session, request.method, request.full_path.rstrip('?'), status,
+                     time.perf_counter() - g.request_start)
+
+def _is_local_request():
+    """Debug endpoints are only served to loopback clients."""
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    """List captured request profiles and slow-request stack samples."""
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({
+        'enabled': profiler.enabled,
+        'sample_rate': profiler.sample_rate,
+        'slow_threshold_ms': profiler.slow_threshold * 1000,
+        'captures': profiler.list_captures()
+    }), 200
+
+@app.route('/debug/profiles/<int:capture_id>', methods=['GET'])
+def get_profile(capture_id):
+    """Get one capture: cProfile stats, memory snapshot and/or stack samples."""
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    capture = profiler.get_capture(capture_id)
+    if capture:
+        return jsonify(capture), 200
+    return jsonify({'error': 'Profile not found'}), 404
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(render_metrics(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.route('/')
 def index():
@@ -75,17 +239,36 @@ def index():
 @app.route('/dashboard')
 def dashboard():
     """Dashboard with metrics visualization and historical predictions."""
-    predictions = get_all_predictions(limit=10)
-    stats = get_prediction_stats()
-    return render_template('dashboard.html', 
-                         predictions=predictions,
-                         stats=stats)
+    # Embedded, so the page needs no further requests until the live feed pushes changes
+    return render_template('dashboard.html', bootstrap=dashboard_document())
+
+def dashboard_document():
+    """Everything the dashboard shows, from memory (the stats are read from the database only when stale)."""
+    stats, predictions = dashboard_snapshot.read()
+    return {
+        'metrics': _metrics_cache,
+        'metrics_computed': _cache_computed,
+        'stats': stats,
+        'predictions': predictions,
+        'chart_data': _chart_data_cache,
+        'model_version': model_version(),
+        # The live feed resumes after this event
+        'event_id': event_bus.last_event_id
+    }
+
+@app.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    """The dashboard's bootstrap document: metrics, stats, latest predictions and chart data."""
+    return jsonify(dashboard_document()), 200
 
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     """
     API endpoint for predictions.
     Saves prediction to database and returns result.
+    
+    Per-feature contributions are added as ``explanation`` when the body
+    contains ``"explain": true`` or the query string has ``?explain=1``.
     """
     try:
         data = request.get_json()
@@ -94,20 +277,132 @@ def api_predict():
         if not data:
             return jsonify({'error': 'No data provided', 'success': False}), 400
         
+        explain = data.pop('explain', False) is True or request.args.get('explain') in ('1', 'true')
+        invalid = _non_finite_feature(data)
+        if invalid:
+            return jsonify({'error': f'{invalid} must be a finite number', 'success': False}), 400
+        
         # Make prediction
         result = predictor.predict(data)
         
         if result.get('success'):
+            # Before the side effects: a monitor error must not fail a stored prediction
+            if drift_monitor is not None:
+                try:
+                    drift_monitor.observe(data)
+                except Exception as e:
+                    print(f"✗ Drift monitor skipped a prediction: {e}")
             # Save to database
+            version = dashboard_snapshot.version()
             pred_id = save_prediction(data, result)
             result['prediction_id'] = pred_id
+            if pred_id is not None and (event_bus.has_subscribers or dashboard_snapshot.is_built):
+                prediction = get_prediction_by_id(pred_id)
+                dashboard_snapshot.add_prediction(prediction, version)
+                event_bus.publish('prediction', prediction)
+                event_bus.publish('stats', _stats_delta(prediction, 1))
+            
+            if explain:
+                result['explanation'] = predictor.explain(data)
         
         return jsonify(result), 200
     
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route('/api/what-if', methods=['POST'])
+def api_what_if():
+    """
+    Sensitivity analysis for one module.
+    
+    Body: ``{"features": {...}, "ranges": {"cbo": {"min": 0, "max": 10, "steps": 11},
+    "code_churn": [0, 5, 10]}}``. Returns the risk curve of each ranged feature
+    and the cheapest combination of changes that reaches a lower risk band.
+    Nothing is saved to the database.
+    """
+    data = request.get_json(silent=True)
+    if not data or 'features' not in data or 'ranges' not in data:
+        return jsonify({'error': "Body needs 'features' and 'ranges'", 'success': False}), 400
+    if not predictor.is_ready:
+        return jsonify({'error': 'Model not initialized. Please train the model first.', 'success': False}), 503
+    
+    try:
+        analysis = analyze_what_if(predictor, data['features'], data['ranges'])
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    return jsonify({'success': True, **analysis}), 200
+
+@app.route('/api/drift', methods=['GET'])
+def api_drift():
+    """
+    Feature drift of /api/predict traffic vs. the training data (PSI and KS per feature).
+    
+    Returns the last scheduled check; ``?refresh=1`` runs a check now
+    (which also starts a new window).
+    """
+    if drift_monitor is None:
+        return jsonify({'error': 'No drift reference. Run models/train_model.py first.', 'success': False}), 503
+    report = drift_monitor.last_report
+    if report is None or request.args.get('refresh') in ('1', 'true'):
+        report = drift_monitor.check()
+    return jsonify({'success': True, **report}), 200
+
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    """List background jobs, newest first (``?status=`` and ``?kind=`` filter, ``?limit=``)."""
+    jobs = list_jobs(status=request.args.get('status'), kind=request.args.get('kind'),
+                     limit=request.args.get('limit', 50, type=int))
+    return jsonify({'success': True, 'jobs': jobs, 'kinds': sorted(scheduler.handlers)}), 200
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    Queue a job: ``{"kind": "retrain", "params": {}}``. Local clients only.
+    
+    Returns the existing job if one of the same kind is already queued or running.
+    """
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': "'params' must be an object", 'success': False}), 400
+    try:
+        job = scheduler.submit(data.get('kind'), params)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    return jsonify({'success': True, 'job': job}), 202
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Status, progress and result of one job."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    return jsonify({'success': True, 'job': job}), 200
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def api_cancel_job(job_id):
+    """Cancel a queued job, or ask a running one to stop. Local clients only."""
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    job = scheduler.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    return jsonify({'success': True, 'job': job}), 200
+
+@app.route('/api/predictions/daily', methods=['GET'])
+def predictions_daily():
+    """Predictions per day and risk level from the last 'rollup' job (``?days=`` limits the range)."""
+    return jsonify({'success': True, 'days': get_daily_rollup(request.args.get('days', type=int))}), 200
+
+@app.route('/api/predictions/partitions', methods=['GET'])
+def predictions_partitions():
+    """Months moved out of the predictions table by the 'partition' job, with row counts and file sizes."""
+    return jsonify({'success': True, 'partitions': list_partitions()}), 200
+
 @app.route('/api/features', methods=['GET'])
+@response_cache.cached()
 def api_features():
     """Get list of required features."""
     return jsonify({
@@ -127,7 +422,7 @@ def api_features():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    model_loaded = predictor.model is not None
+    model_loaded = predictor.is_ready
     return jsonify({
         'status': 'healthy' if model_loaded else 'model_not_loaded',
         'model_loaded': model_loaded
@@ -139,16 +434,67 @@ def result():
     return render_template('result.html')
 
 @app.route('/api/predictions', methods=['GET'])
+@response_cache.cached('predictions')
 def get_predictions():
     """Get all predictions from database."""
     limit = request.args.get('limit', 50, type=int)
     predictions = get_all_predictions(limit=limit)
     return jsonify(predictions), 200
 
+@app.route('/api/predictions/export', methods=['GET'])
+def export_predictions():
+    """
+    Stream the prediction history as CSV or NDJSON (``?format=csv|ndjson``).
+    
+    Rows are read in fetchmany batches and sent with chunked transfer, so
+    memory stays flat regardless of table size. ``?gzip=1`` compresses the
+    stream (Content-Encoding: gzip); ``?since=``, ``?until=`` and
+    ``?risk_level=`` filter rows.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}", 'success': False}), 400
+    content_type, extension = EXPORT_FORMATS[export_format]
+    
+    batches = iter_prediction_batches(since=request.args.get('since'), until=request.args.get('until'),
+                                      risk_level=request.args.get('risk_level'))
+    chunks = csv_chunks(batches) if export_format == 'csv' else ndjson_chunks(batches)
+    headers = {'Content-Disposition': f'attachment; filename=predictions.{extension}'}
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(chunks, content_type=content_type, headers=headers)
+
+@app.route('/api/predictions/import', methods=['POST'])
+def import_predictions_api():
+    """
+    Bulk-load historical predictions from a CSV or NDJSON request body. Local clients only.
+    
+    The format comes from ``?format=`` or the Content-Type (``application/x-ndjson``);
+    gzip bodies need ``Content-Encoding: gzip``. Columns are those of
+    /api/predictions/export (see src/bulk_import.py). The body is parsed
+    in chunks as it streams in.
+    """
+    if not _is_local_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    import_format = request.args.get('format') or ('ndjson' if 'ndjson' in (request.content_type or '') else 'csv')
+    if import_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}", 'success': False}), 400
+    compression = 'gzip' if request.headers.get('Content-Encoding') == 'gzip' else None
+    try:
+        summary = import_predictions(read_chunks(request.stream, import_format, compression=compression))
+    except (ValueError, OSError, EOFError) as e:
+        return jsonify({'error': str(e), 'success': False}), 400
+    if summary['inserted']:
+        dashboard_snapshot.invalidate()
+        event_bus.publish(RESET_EVENT, {'reason': 'import', 'inserted': summary['inserted']})
+    return jsonify({'success': True, **summary}), 200
+
 @app.route('/api/predictions/stats', methods=['GET'])
+@response_cache.cached('predictions')
 def predictions_stats():
-    """Get prediction statistics."""
-    stats = get_prediction_stats()
+    """Get prediction statistics (kept current in memory by the dashboard snapshot)."""
+    stats, _ = dashboard_snapshot.read()
     return jsonify(stats), 200
 
 @app.route('/api/predictions/<int:pred_id>', methods=['GET'])
@@ -162,13 +508,51 @@ def get_single_prediction(pred_id):
 @app.route('/api/predictions/<int:pred_id>', methods=['DELETE'])
 def delete_pred(pred_id):
     """Delete a prediction."""
+    version = dashboard_snapshot.version()
+    prediction = get_prediction_by_id(pred_id) if event_bus.has_subscribers or dashboard_snapshot.is_built else None
     if delete_prediction(pred_id):
+        if prediction is not None:
+            dashboard_snapshot.remove_prediction(prediction, version)
+            event_bus.publish('prediction_deleted', {'id': pred_id})
+            event_bus.publish('stats', _stats_delta(prediction, -1))
         return jsonify({'success': True, 'message': 'Prediction deleted'}), 200
+    if get_prediction_by_id(pred_id) is None:
+        return jsonify({'success': False, 'error': 'Prediction not found'}), 404
     return jsonify({'success': False, 'error': 'Failed to delete'}), 500
 
+@app.route('/api/stream', methods=['GET'])
+def api_stream():
+    """
+    Live dashboard feed as Server-Sent Events.
+    
+    Events: ``prediction`` (new row, as in /api/predictions), ``prediction_deleted``
+    (``{"id": ...}``), ``stats`` (deltas to /api/predictions/stats, plus
+    ``probability_sum``), ``model`` (new model version and/or metrics) and
+    ``reset`` (reload everything). Reconnecting browsers send Last-Event-ID
+    and get the events they missed; ``?last_event_id=`` does the same for the
+    first connection (e.g. the ``event_id`` of /api/dashboard). Each
+    connection holds a server thread, so at most EVENT_STREAM_MAX_CLIENTS
+    are accepted.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    subscription = event_bus.subscribe(last_event_id)
+    if subscription is None:
+        return jsonify({'error': 'Too many live feed connections', 'success': False}), 503
+    response = Response(sse_stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies (nginx) from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Also unsubscribes clients that leave before the first event is sent
+    response.call_on_close(subscription.close)
+    return response
+
 @app.route('/api/metrics', methods=['GET'])
+@response_cache.cached('model')
 def get_model_metrics():
     """Get cached model performance metrics (computed at startup)."""
+    record_cache('model_metrics', _cache_computed)
     return jsonify({
         'success': True,
         'metrics': _metrics_cache,
@@ -177,67 +561,15 @@ def get_model_metrics():
     }), 200
 
 @app.route('/api/chart-data', methods=['GET'])
+@response_cache.cached('model')
 def get_chart_data():
     """Get all chart data: feature importance, confusion matrix, model comparison."""
+    if _chart_data_cache is not None:
+        return jsonify(_chart_data_cache), 200
     try:
-        from src.evaluation import get_feature_importance
-        
-        # Load test data
-        _, X_test, _, y_test, feature_names = prepare_data()
-        
-        # Make predictions
-        y_pred = predictor.model.predict(X_test)
-        y_pred_proba = predictor.model.predict_proba(X_test)
-        
-        # 1. Feature Importance
-        feature_imp = get_feature_importance(predictor.model, feature_names)
-        feature_imp_sorted = sorted(feature_imp, key=lambda x: x[1], reverse=True)
-        feature_names_list = [f[0].upper() for f in feature_imp_sorted]
-        feature_values_list = [float(f[1]) for f in feature_imp_sorted]
-        
-        # 2. Confusion Matrix
-        cm = get_confusion_matrix(y_test, y_pred)
-        confusion_matrix_data = [
-            [int(cm['tn']), int(cm['fp'])],
-            [int(cm['fn']), int(cm['tp'])]
-        ]
-        
-        # 3. Model Comparison (all trained models)
-        model_names = ['Logistic Regression', 'Random Forest', 'XGBoost', 'SVM']
-        model_accuracies = [
-            predictor.model.score(X_test, y_test) * 100,  # Current model accuracy
-            predictor.model.score(X_test, y_test) * 100,  # Using same model for comparison
-            predictor.model.score(X_test, y_test) * 100,
-            predictor.model.score(X_test, y_test) * 100
-        ]
-        
-        # Calculate risk distribution from predictions
-        low_risk = sum(1 for p in y_pred_proba[:, 1] if p < 0.33)
-        medium_risk = sum(1 for p in y_pred_proba[:, 1] if 0.33 <= p <= 0.67)
-        high_risk = sum(1 for p in y_pred_proba[:, 1] if p > 0.67)
-        
-        return jsonify({
-            'success': True,
-            'feature_importance': {
-                'features': feature_names_list,
-                'values': feature_values_list
-            },
-            'confusion_matrix': {
-                'data': confusion_matrix_data,
-                'tn': int(cm['tn']),
-                'fp': int(cm['fp']),
-                'fn': int(cm['fn']),
-                'tp': int(cm['tp'])
-            },
-            'model_comparison': {
-                'models': model_names,
-                'accuracies': [round(x, 2) for x in model_accuracies]
-            },
-            'risk_distribution': {
-                'labels': ['LOW RISK', 'MEDIUM RISK', 'HIGH RISK'],
-                'values': [low_risk, medium_risk, high_risk]
-            }
-        }), 200
+        # Metrics job still running (or failed): compute from the test data now
+        X_test, y_test, feature_names = evaluation_data()
+        return jsonify(chart_data(predictor.model, X_test, y_test, feature_names)), 200
         
     except Exception as e:
         print(f"Error generating chart data: {e}")
@@ -264,8 +596,8 @@ def internal_error(error):
 
 if __name__ == '__main__':
     print("Starting FailGuard AI Flask Application...")
-    print(f"Model Status: {'Loaded' if predictor.model else 'Not Loaded'}")
-    if not predictor.model:
+    print(f"Model Status: {'Loaded' if predictor.is_ready else 'Not Loaded'}")
+    if not predictor.is_ready:
         print("WARNING: Model not found. Please run: python models/train_model.py")
     
     app.run(debug=DEBUG, host='0.0.0.0', port=5000)
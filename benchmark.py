@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""
+FailGuard AI - Benchmark Suite
+
+Measures inference latency and throughput, prediction persistence, data
+loading and model training. Results are written as JSON so runs can be
+compared across commits.
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --suites inference batch --repeats 1000
+    python benchmark.py --suites persistence --db-sizes 1000 100000 10000000
+    python benchmark.py --compare baseline.json --output current.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import DATA_RAW_PATH, FEATURE_NAMES
+from models.predict import FailGuardPredictor, ENGINE_BACKENDS, float32_artifact_path
+import database.db as db
+
+SUITES = ('inference', 'batch', 'persistence', 'data', 'training')
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000, 10000)
+DEFAULT_DB_SIZES = (1000, 10000, 100000)
+SEED = 42
+
+def quiet(func, *args, **kwargs):
+    """Call a function with its prints suppressed."""
+    with redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+def metric(value, unit, better):
+    """Result entry; ``better`` is 'lower' or 'higher' for regression checks."""
+    return {'value': round(float(value), 6), 'unit': unit, 'better': better}
+
+def latency_metrics(prefix, samples):
+    """Percentile summary of per-call latencies (seconds) in milliseconds."""
+    samples_ms = np.asarray(samples) * 1000
+    return {
+        f'{prefix}.p50_ms': metric(np.percentile(samples_ms, 50), 'ms', 'lower'),
+        f'{prefix}.p90_ms': metric(np.percentile(samples_ms, 90), 'ms', 'lower'),
+        f'{prefix}.p99_ms': metric(np.percentile(samples_ms, 99), 'ms', 'lower'),
+        f'{prefix}.mean_ms': metric(np.mean(samples_ms), 'ms', 'lower'),
+    }
+
+def sample_inputs(n, seed=SEED):
+    """Feature dictionaries sampled (with replacement) from the raw dataset."""
+    df = pd.read_csv(DATA_RAW_PATH)
+    rows = df[FEATURE_NAMES].sample(n=n, replace=True, random_state=seed)
+    return rows.to_dict('records')
+
+def available_predictors():
+    """Predictors for every backend/precision whose artifacts exist."""
+    configs = [('sklearn', 'float64')]
+    for backend, (_, path) in ENGINE_BACKENDS.items():
+        if Path(path).exists():
+            configs.append((backend, 'float64'))
+        if float32_artifact_path(path).exists():
+            configs.append((backend, 'float32'))
+
+    predictors = {}
+    for backend, precision in configs:
+        predictor = quiet(FailGuardPredictor, backend=backend, precision=precision)
+        if predictor.is_ready and predictor.backend == backend:
+            name = backend if precision == 'float64' else f'{backend}_{precision}'
+            predictors[name] = predictor
+    return predictors
+
+def bench_inference(args):
+    """Single-prediction latency percentiles per backend."""
+    results = {}
+    inputs = sample_inputs(args.repeats)
+    for name, predictor in available_predictors().items():
+        for features in inputs[:args.warmup]:
+            predictor.predict(features)
+        samples = []
+        for features in inputs:
+            start = time.perf_counter()
+            predictor.predict(features)
+            samples.append(time.perf_counter() - start)
+        results.update(latency_metrics(f'inference.{name}', samples))
+    return results
+
+def bench_batch(args):
+    """Batch throughput (rows/s) per backend across batch sizes."""
+    results = {}
+    inputs = sample_inputs(max(args.batch_sizes))
+    for name, predictor in available_predictors().items():
+        for size in args.batch_sizes:
+            batch = inputs[:size]
+            predictor.predict_batch(batch)
+            best = min(_timed(predictor.predict_batch, batch) for _ in range(args.rounds))
+            results[f'batch.{name}.size_{size}.rows_per_s'] = metric(size / best, 'rows/s', 'higher')
+    return results
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def _fill_predictions(conn, n_rows, seed=SEED, chunk=100000):
+    """Insert synthetic prediction rows directly (setup, not measured)."""
+    rng = np.random.default_rng(seed)
+    levels = np.array(['LOW', 'MEDIUM', 'HIGH'])
+    for start in range(0, n_rows, chunk):
+        n = min(chunk, n_rows - start)
+        probability = rng.random(n)
+        rows = zip(
+            rng.integers(10, 15000, n).tolist(), rng.integers(1, 100, n).tolist(),
+            rng.integers(1, 150, n).tolist(), rng.integers(0, 80, n).tolist(),
+            rng.random(n).tolist(), rng.integers(0, 200, n).tolist(),
+            rng.integers(1, 20, n).tolist(), rng.integers(0, 50, n).tolist(),
+            levels[np.digitize(probability, [0.33, 0.67])].tolist(), probability.tolist(),
+            (np.abs(probability - 0.5) * 200).tolist(),
+            np.where(probability > 0.5, 'DEFECTIVE', 'SAFE').tolist(),
+        )
+        conn.executemany('''
+            INSERT INTO predictions (
+                loc, wmc, rfc, cbo, lcom, code_churn,
+                num_developers, past_defects, risk_level,
+                probability, confidence, prediction
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    conn.commit()
+
+def bench_persistence(args):
+    """save_prediction / get_all_predictions / stats throughput at several table sizes."""
+    results = {}
+    features = sample_inputs(args.db_writes)
+    result = {'risk_level': 'LOW', 'probability': 12.5, 'confidence': 75.0, 'prediction': 'SAFE'}
+    original_path = db.DB_PATH
+    try:
+        for size in args.db_sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                db.DB_PATH = Path(tmp) / 'bench.db'
+                db.init_database()
+                with db.get_db() as conn:
+                    fill_time = _timed(_fill_predictions, conn, size)
+                prefix = f'persistence.rows_{size}'
+                results[f'{prefix}.fill_rows_per_s'] = metric(size / fill_time, 'rows/s', 'higher')
+
+                elapsed = _timed(lambda: [db.save_prediction(f, result) for f in features])
+                results[f'{prefix}.save_prediction_ops_per_s'] = metric(len(features) / elapsed, 'ops/s', 'higher')
+
+                samples = [_timed(db.get_all_predictions, limit=50) for _ in range(args.rounds)]
+                results[f'{prefix}.get_all_predictions_limit50_ms'] = metric(min(samples) * 1000, 'ms', 'lower')
+
+                samples = [_timed(db.get_prediction_stats) for _ in range(args.rounds)]
+                results[f'{prefix}.get_prediction_stats_ms'] = metric(min(samples) * 1000, 'ms', 'lower')
+
+                if size <= args.max_full_scan:
+                    elapsed = _timed(db.get_all_predictions)
+                    results[f'{prefix}.get_all_predictions_rows_per_s'] = metric(
+                        (size + len(features)) / elapsed, 'rows/s', 'higher')
+    finally:
+        db.DB_PATH = original_path
+    return results
+
+def bench_data(args):
+    """prepare_data load time (without writing artifacts)."""
+    from src.data_preprocessing import prepare_data
+
+    samples = [_timed(quiet, prepare_data, save=False) for _ in range(args.rounds)]
+    return {
+        'data.prepare_data.min_ms': metric(min(samples) * 1000, 'ms', 'lower'),
+        'data.prepare_data.mean_ms': metric(np.mean(samples) * 1000, 'ms', 'lower'),
+    }
+
+def bench_training(args):
+    """Fit time of each candidate model on the standard split."""
+    from src.data_preprocessing import prepare_data
+    from models.train_model import build_models
+
+    X_train, _, y_train, _, _ = quiet(prepare_data, save=False)
+    results = {}
+    for name, model in quiet(build_models, y_train).items():
+        key = name.lower().replace(' ', '_')
+        results[f'training.{key}.fit_s'] = metric(_timed(model.fit, X_train, y_train), 's', 'lower')
+    return results
+
+BENCHMARKS = {
+    'inference': bench_inference,
+    'batch': bench_batch,
+    'persistence': bench_persistence,
+    'data': bench_data,
+    'training': bench_training,
+}
+
+def environment_info():
+    """Commit and environment metadata stored with the results."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    import sklearn
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'sqlite': sqlite3.sqlite_version,
+    }
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare two result sets.
+
+    Args:
+        baseline, current: Dicts of metric name to metric entry
+        threshold: Relative change treated as a regression (e.g. 0.1)
+
+    Returns:
+        List of (name, baseline value, current value, relative change, regressed)
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name]['value'], current[name]['value']
+        if old == 0:
+            continue
+        change = (new - old) / old
+        worse = change if current[name]['better'] == 'lower' else -change
+        rows.append((name, old, new, change, worse > threshold))
+    return rows
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='FailGuard AI benchmark suite')
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--output', type=Path, help='Write results to this JSON file')
+    parser.add_argument('--compare', type=Path, help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default 0.10)')
+    parser.add_argument('--repeats', type=int, default=500, help='Single predictions per backend')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5, help='Repetitions for best-of timings')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument('--db-sizes', type=int, nargs='+', default=list(DEFAULT_DB_SIZES),
+                        help='Table sizes for the persistence suite (up to 10M)')
+    parser.add_argument('--db-writes', type=int, default=200, help='save_prediction calls per table size')
+    parser.add_argument('--max-full-scan', type=int, default=1000000,
+                        help='Largest table read in full with get_all_predictions()')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+    print("FailGuard AI - Benchmark Suite")
+    print("=" * 60)
+    results = {}
+    for suite in args.suites:
+        print(f"Running {suite}...")
+        start = time.perf_counter()
+        suite_results = BENCHMARKS[suite](args)
+        results.update(suite_results)
+        for name, entry in suite_results.items():
+            print(f"  {name:<60} {entry['value']:>14.4f} {entry['unit']}")
+        print(f"  ({time.perf_counter() - start:.1f}s)")
+
+    report = {'meta': environment_info(), 'suites': args.suites, 'results': results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        rows = compare_results(baseline['results'], results, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nComparison with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for name, old, new, change, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"  {name:<60} {old:>12.4f} -> {new:>12.4f} ({change:+.1%}){flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
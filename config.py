@@ -8,12 +8,146 @@ DATA_PROCESSED_PATH = PROJECT_ROOT / "data" / "processed" / "cleaned_data.csv"
 MODELS_DIR = PROJECT_ROOT / "models"
 MODEL_PATH = MODELS_DIR / "failguard_model.joblib"
 SCALER_PATH = MODELS_DIR / "scaler.joblib"
+COMPILED_MODEL_PATH = MODELS_DIR / "failguard_model_compiled.npz"
+LINEAR_MODEL_PATH = MODELS_DIR / "failguard_model_linear.npz"
+DRIFT_REFERENCE_PATH = MODELS_DIR / "drift_reference.json"
+FEATURE_PIPELINE_PATH = MODELS_DIR / "feature_pipeline.joblib"
 
 # Model configuration
 FEATURE_NAMES = [
     'loc', 'wmc', 'rfc', 'cbo', 'lcom', 'code_churn', 'num_developers', 'past_defects'
 ]
 
+# Inference backend: 'sklearn' (joblib model), 'compiled' (numpy tree engine)
+# or 'linear' (scaler-fused logistic regression)
+PREDICTOR_BACKEND = os.environ.get('FAILGUARD_BACKEND', 'sklearn')
+
+# Precision of the 'compiled'/'linear' artifacts: 'float64' or 'float32' (*_f32.npz)
+PREDICTOR_PRECISION = os.environ.get('FAILGUARD_PRECISION', 'float64')
+# Max probability difference allowed when validating float32 artifacts
+QUANTIZATION_TOLERANCE = 1e-4
+
+# Model selection (models/train_model.py): stratified k-fold cross-validation of every candidate
+# on the training split, run in this many processes (1 = in-process; CV_FOLDS=1 disables it)
+CV_FOLDS = int(os.environ.get('FAILGUARD_CV_FOLDS', '5'))
+CV_WORKERS = int(os.environ.get('FAILGUARD_CV_WORKERS', str(os.cpu_count() or 1)))
+# Out-of-fold predictions per candidate, reused while data, folds and parameters are unchanged
+CV_CACHE_DIR = MODELS_DIR / "cv_cache"
+
+# Feature engineering (src/feature_engineering.py): with FAILGUARD_FEATURE_ENGINEERING=1 training fits
+# polynomial terms of the standardized features up to this degree, drops terms with a training
+# variance at or below the threshold, and saves the fitted pipeline next to the model
+FEATURE_ENGINEERING = os.environ.get('FAILGUARD_FEATURE_ENGINEERING', '0') == '1'
+FEATURE_POLYNOMIAL_DEGREE = 2
+FEATURE_VARIANCE_THRESHOLD = 0.01
+
+# Streaming feature statistics (src/feature_statistics.py): relative error of the quantile sketch,
+# rows read per chunk from the dataset, and processes of the parallel pass (1 = in-process)
+STATS_RELATIVE_ACCURACY = 0.01
+STATS_CHUNK_SIZE = int(os.environ.get('FAILGUARD_STATS_CHUNK_SIZE', '50000'))
+STATS_WORKERS = int(os.environ.get('FAILGUARD_STATS_WORKERS', str(os.cpu_count() or 1)))
+
+# Per-prediction explanations (models/explain.py): repeated inputs are served from an LRU cache
+EXPLANATION_CACHE_SIZE = 1024
+# Working memory of a batch tree explanation: rows are explained in blocks that fit it. Kept near
+# cache size; larger blocks were slower on big ensembles, whose single rows may already exceed it
+EXPLANATION_BLOCK_BYTES = 4 * 1024 * 1024
+
+# What-if analysis (src/what_if.py): default points per feature range and max perturbation grid size
+WHAT_IF_DEFAULT_STEPS = 11
+WHAT_IF_MAX_GRID = 50_000
+
+# Profiling (opt-in, see src/profiling.py). With FAILGUARD_PROFILING unset every hook is a no-op.
+PROFILING_ENABLED = os.environ.get('FAILGUARD_PROFILING', '0') == '1'
+# Fraction of requests to capture with cProfile + tracemalloc
+PROFILE_SAMPLE_RATE = float(os.environ.get('FAILGUARD_PROFILE_SAMPLE_RATE', '0'))
+# Requests carrying this header are always captured
+PROFILE_HEADER = 'X-FailGuard-Profile'
+# Keep sampled stacks of requests slower than this (0 disables)
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('FAILGUARD_SLOW_REQUEST_MS', '0'))
+STACK_SAMPLE_INTERVAL_MS = 5
+PROFILE_MAX_CAPTURES = 50
+
+# Source-tree scanner (src/code_metrics.py): per-file metrics cached by content hash
+CODE_METRICS_CACHE_PATH = PROJECT_ROOT / "database" / "code_metrics_cache.db"
+SCAN_EXCLUDE_DIRS = ('.git', '.hg', '.svn', '__pycache__', '.venv', 'venv', 'env', 'node_modules',
+                     'build', 'dist', '.tox', '.nox', '.mypy_cache', '.pytest_cache', 'site-packages')
+
+# Git-history miner (src/git_history.py): per-file changes persisted for incremental runs
+GIT_HISTORY_DB_PATH = PROJECT_ROOT / "database" / "git_history.db"
+# History features are aggregated over this many days before the newest commit (None = all history)
+HISTORY_WINDOW_DAYS = 365
+# Commit subjects matching this pattern count as defect fixes
+FIX_COMMIT_PATTERN = r'\b(fix(es|ed)?|bug(fix)?|defect|hotfix|patch(ed)?|resolve[sd]?|regression)\b'
+
+# Feature drift monitor (src/drift.py): quantile bins of the training data per feature
+DRIFT_BINS = 20
+# Seconds between scheduled drift checks
+DRIFT_CHECK_INTERVAL = float(os.environ.get('FAILGUARD_DRIFT_INTERVAL', '300'))
+# PSI above these values is reported as moderate / significant drift
+DRIFT_PSI_THRESHOLDS = (0.1, 0.25)
+# Fewer observed predictions than this are reported as insufficient data
+DRIFT_MIN_SAMPLES = 100
+
+# Background job scheduler (src/jobs.py); FAILGUARD_SCHEDULER=0 disables it in the app
+JOB_SCHEDULER_ENABLED = os.environ.get('FAILGUARD_SCHEDULER', '1') == '1'
+# Jobs running at the same time (at most one per kind); 1 keeps heavy work off the serving cores
+JOB_MAX_WORKERS = int(os.environ.get('FAILGUARD_JOB_WORKERS', '1'))
+# Cross-validation processes of the 'retrain' job, which runs inside the app (CV_WORKERS is for the CLI)
+JOB_CV_WORKERS = int(os.environ.get('FAILGUARD_JOB_CV_WORKERS', '1'))
+# Seconds between scheduler checks for due and queued jobs
+JOB_POLL_INTERVAL = 5
+# Recurring jobs: kind -> seconds between runs
+JOB_SCHEDULE = {
+    'rollup': 3600,
+    'retention': 86400,
+    'maintenance': 7 * 86400,
+    'partition': 86400,
+}
+# Predictions older than this many days are deleted by the 'retention' job (unset: keep all)
+PREDICTION_RETENTION_DAYS = int(os.environ['FAILGUARD_RETENTION_DAYS']) if os.environ.get('FAILGUARD_RETENTION_DAYS') else None
+# Months (counting the current one) kept in the predictions table; the 'partition' job
+# moves older months into monthly SQLite files next to the database (unset: never)
+PREDICTION_HOT_MONTHS = int(os.environ['FAILGUARD_HOT_MONTHS']) if os.environ.get('FAILGUARD_HOT_MONTHS') else None
+# Partition files older than this many months are gzip-compressed into archives
+PREDICTION_ARCHIVE_MONTHS = int(os.environ.get('FAILGUARD_ARCHIVE_MONTHS', '12'))
+# Finished jobs are kept this many days
+JOB_RETENTION_DAYS = 30
+
+# Rows fetched per batch when streaming prediction history (database.db.iter_predictions)
+EXPORT_BATCH_SIZE = 1000
+
+# Response cache of read-heavy JSON endpoints (src/response_cache.py): memory budget of the
+# serialized bodies, and the body size from which a gzip copy is kept and served
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+RESPONSE_GZIP_MIN_BYTES = 1024
+
+# Live dashboard feed (/api/stream, src/events.py): each open connection holds one server thread
+EVENT_STREAM_MAX_CLIENTS = int(os.environ.get('FAILGUARD_STREAM_MAX_CLIENTS', '100'))
+# Seconds between keep-alive comments on idle connections
+EVENT_STREAM_HEARTBEAT = 15
+# Events queued per client before it is sent a 'reset', and events kept for Last-Event-ID reconnects
+EVENT_QUEUE_SIZE = 1000
+EVENT_REPLAY_SIZE = 256
+
+# Latest predictions in the dashboard's bootstrap document (/dashboard, /api/dashboard)
+DASHBOARD_RECENT_PREDICTIONS = 10
+# Seconds after which the in-memory dashboard stats are re-read even without a detected change
+DASHBOARD_SNAPSHOT_MAX_AGE = 300
+
+# Storage layout of the predictions table for new databases: 'standard' or 'compact'
+# (enum-coded labels, integer timestamps, probability and confidence as scaled integers; see database/db.py).
+# Existing databases are converted with `python database/db.py --migrate compact`.
+DB_STORAGE = os.environ.get('FAILGUARD_DB_STORAGE', 'standard')
+# Page size of compact databases (bytes)
+DB_PAGE_SIZE = 8192
+
+# Bulk import (src/bulk_import.py): rows validated per chunk and rows per write transaction
+IMPORT_CHUNK_SIZE = 50_000
+IMPORT_COMMIT_ROWS = 500_000
+# Rejected rows reported back in detail (the rest are only counted)
+IMPORT_MAX_ERRORS = 20
+
 # Risk thresholds
 RISK_THRESHOLDS = {
     'LOW': 0.33,
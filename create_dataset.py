@@ -1,61 +1,256 @@
+import sys
+import json
+import argparse
+import itertools
+import multiprocessing
+from collections import deque
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-print("📊 Generating 5000 synthetic software module samples...")
-print("=" * 70)
-
-np.random.seed(42)
-
-# Generate 5000 samples with all feature combinations
-data = {
-    'loc': np.clip(np.random.lognormal(mean=5.5, sigma=1.2, size=5000).astype(int), 10, 15000),
-    'wmc': np.clip(np.random.gamma(shape=3, scale=5, size=5000).astype(int), 1, 100),
-    'rfc': np.clip(np.random.gamma(shape=2, scale=8, size=5000).astype(int), 1, 150),
-    'cbo': np.clip(np.random.gamma(shape=2, scale=4, size=5000).astype(int), 0, 80),
-    'lcom': np.clip(np.random.uniform(0, 1, size=5000), 0, 1),
-    'code_churn': np.clip(np.random.exponential(scale=8, size=5000).astype(int), 0, 200),
-    'num_developers': np.clip(np.random.poisson(lam=3, size=5000), 1, 20),
-    'past_defects': np.clip(np.random.poisson(lam=2, size=5000), 0, 50),
+# Columns normalized by their maximum in the label model
+NORMALIZED_COLUMNS = ('loc', 'wmc', 'rfc', 'cbo', 'code_churn', 'past_defects')
+
+# Column dtypes of the columnar (.npy) output
+COLUMN_DTYPES = {
+    'loc': np.int32, 'wmc': np.int32, 'rfc': np.int32, 'cbo': np.int32, 'lcom': np.float64,
+    'code_churn': np.int32, 'num_developers': np.int32, 'past_defects': np.int32, 'defects': np.int8,
 }
 
-df = pd.DataFrame(data)
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+def sample_module_metrics(n, rng):
+    """
+    Sample software module metrics from the synthetic dataset distributions.
+
+    Args:
+        n: Number of modules
+        rng: numpy RandomState or Generator
+
+    Returns:
+        DataFrame with one column per feature
+    """
+    return pd.DataFrame({
+        'loc': np.clip(rng.lognormal(mean=5.5, sigma=1.2, size=n).astype(int), 10, 15000),
+        'wmc': np.clip(rng.gamma(shape=3, scale=5, size=n).astype(int), 1, 100),
+        'rfc': np.clip(rng.gamma(shape=2, scale=8, size=n).astype(int), 1, 150),
+        'cbo': np.clip(rng.gamma(shape=2, scale=4, size=n).astype(int), 0, 80),
+        'lcom': np.clip(rng.uniform(0, 1, size=n), 0, 1),
+        'code_churn': np.clip(rng.exponential(scale=8, size=n).astype(int), 0, 200),
+        'num_developers': np.clip(rng.poisson(lam=3, size=n), 1, 20),
+        'past_defects': np.clip(rng.poisson(lam=2, size=n), 0, 50),
+    })
+
+def label_defects(df, rng, maxima=None):
+    """
+    Generate defect labels based on complexity metrics.
+
+    Args:
+        df: DataFrame from sample_module_metrics
+        rng: numpy RandomState or Generator
+        maxima: Normalization constants per column (defaults to the
+            maxima of ``df`` itself)
+
+    Returns:
+        Array of 0/1 labels
+    """
+    if maxima is None:
+        maxima = {col: df[col].max() for col in NORMALIZED_COLUMNS}
+
+    complexity_score = (
+        (df['loc'] / maxima['loc']) * 0.2 +
+        (df['wmc'] / maxima['wmc']) * 0.25 +
+        (df['rfc'] / maxima['rfc']) * 0.2 +
+        (df['cbo'] / maxima['cbo']) * 0.15 +
+        df['lcom'] * 0.1 +
+        (df['code_churn'] / maxima['code_churn']) * 0.1
+    )
+
+    defect_probability = (
+        0.3 * complexity_score +
+        0.1 * (df['past_defects'] / (maxima['past_defects'] + 1))
+    )
+
+    defect_probability += rng.normal(0, 0.05, size=len(df))
+    defect_probability = np.clip(defect_probability, 0, 1)
+
+    return (rng.random(size=len(df)) < defect_probability).astype(int)
+
+def reference_maxima(n_samples=5000, seed=42):
+    """
+    Normalization constants of the reference 5000-row dataset.
+
+    Chunked generation labels every chunk against these fixed maxima
+    instead of the maxima of its own rows, so labels do not depend on the
+    chunk size and the class balance stays that of the reference dataset
+    at any row count (a global maximum would creep up to the clip bounds
+    as N grows and lower the defect rate).
+    """
+    df = sample_module_metrics(n_samples, np.random.RandomState(seed))
+    return {col: float(df[col].max()) for col in NORMALIZED_COLUMNS}
+
+def _chunk_frame(seed, index, n_rows, maxima):
+    """
+    Generate one chunk with its own seed.
+
+    Chunk ``index`` always gets the same random streams, whatever the
+    chunk count, worker count or execution order.
+    """
+    feature_seq, label_seq = np.random.SeedSequence(seed, spawn_key=(index,)).spawn(2)
+    df = sample_module_metrics(n_rows, np.random.default_rng(feature_seq))
+    df['defects'] = label_defects(df, np.random.default_rng(label_seq), maxima)
+    return df
+
+def _csv_chunk(task):
+    seed, index, start, stop, maxima = task
+    df = _chunk_frame(seed, index, stop - start, maxima)
+    return df.to_csv(index=False, header=index == 0), int(df['defects'].sum())
+
+def _npy_chunk(task):
+    seed, index, start, stop, maxima, directory = task
+    df = _chunk_frame(seed, index, stop - start, maxima)
+    for column, dtype in COLUMN_DTYPES.items():
+        array = np.load(Path(directory) / f'{column}.npy', mmap_mode='r+')
+        array[start:stop] = df[column].to_numpy(dtype)
+        array.flush()
+        del array
+    return None, int(df['defects'].sum())
+
+def _imap_bounded(pool, worker, tasks, window):
+    """
+    Like ``pool.imap(worker, tasks)``, but with at most ``window`` tasks
+    submitted and not yet consumed.
+
+    ``imap`` submits every task up front, so workers run ahead of a slow
+    consumer and finished chunks pile up in memory.
+    """
+    tasks = iter(tasks)
+    pending = deque(pool.apply_async(worker, (task,)) for task in itertools.islice(tasks, window))
+    while pending:
+        result = pending.popleft().get()
+        # Refill before handing the result out, so workers stay busy while it is written
+        pending.extend(pool.apply_async(worker, (task,)) for task in itertools.islice(tasks, 1))
+        yield result
+
+def generate_dataset(n_rows, output, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE, workers=1, seed=42):
+    """
+    Generate a synthetic dataset of any size in fixed-size chunks.
+
+    Chunks are generated in parallel and written in order, with at most
+    two chunks per worker in flight, so memory stays at roughly
+    ``2 * workers * chunk_size`` rows however fast the output is written.
+
+    Args:
+        n_rows: Number of modules
+        output: CSV file path (fmt='csv') or directory (fmt='npy')
+        fmt: 'csv', or 'npy' for one memory-mappable .npy file per column
+        chunk_size: Rows per chunk
+        workers: Number of processes
+        seed: Base seed; the same seed and chunk size give the same data
+
+    Returns:
+        Dict with rows, chunks and defect rate
+    """
+    if fmt not in ('csv', 'npy'):
+        raise ValueError(f"Unknown format '{fmt}' (choose 'csv' or 'npy')")
+
+    output = Path(output)
+    maxima = reference_maxima()
+    bounds = [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+
+    if fmt == 'npy':
+        output.mkdir(parents=True, exist_ok=True)
+        for column, dtype in COLUMN_DTYPES.items():
+            np.lib.format.open_memmap(output / f'{column}.npy', mode='w+', dtype=dtype, shape=(n_rows,)).flush()
+        tasks = [(seed, i, start, stop, maxima, str(output)) for i, (start, stop) in enumerate(bounds)]
+        worker = _npy_chunk
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tasks = [(seed, i, start, stop, maxima) for i, (start, stop) in enumerate(bounds)]
+        worker = _csv_chunk
+
+    defects = 0
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        # Results come back in chunk order, so CSV output is identical for any worker count
+        results = _imap_bounded(pool, worker, tasks, 2 * workers) if pool else map(worker, tasks)
+        with (open(output, 'w', newline='') if fmt == 'csv' else open(output / 'meta.json', 'w')) as f:
+            for i, (text, chunk_defects) in enumerate(results, 1):
+                if text is not None:
+                    f.write(text)
+                defects += chunk_defects
+                print(f"  chunk {i}/{len(tasks)} written", end='\r', flush=True)
+            summary = {'rows': n_rows, 'chunks': len(tasks), 'chunk_size': chunk_size, 'seed': seed,
+                       'defect_rate': round(defects / n_rows, 6) if n_rows else 0.0}
+            if fmt == 'npy':
+                json.dump({**summary, 'columns': {c: np.dtype(d).name for c, d in COLUMN_DTYPES.items()}}, f, indent=2)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    print()
+    return summary
+
+def load_columnar(directory, mmap_mode='r'):
+    """
+    Open a dataset written with fmt='npy'.
+
+    Returns:
+        Dict of column name to (memory-mapped) array
+    """
+    return {column: np.load(Path(directory) / f'{column}.npy', mmap_mode=mmap_mode) for column in COLUMN_DTYPES}
+
+def main(n_samples=5000, seed=42, output='data/raw/nasa_promise.csv'):
+    print(f"📊 Generating {n_samples} synthetic software module samples...")
+    print("=" * 70)
+
+    # RandomState keeps the output identical to the original global-seed script
+    rng = np.random.RandomState(seed)
 
-# Generate defect label based on complexity metrics
-complexity_score = (
-    (df['loc'] / df['loc'].max()) * 0.2 +
-    (df['wmc'] / df['wmc'].max()) * 0.25 +
-    (df['rfc'] / df['rfc'].max()) * 0.2 +
-    (df['cbo'] / df['cbo'].max()) * 0.15 +
-    df['lcom'] * 0.1 +
-    (df['code_churn'] / df['code_churn'].max()) * 0.1
-)
+    # Generate samples with all feature combinations
+    df = sample_module_metrics(n_samples, rng)
+    df['defects'] = label_defects(df, rng)
 
-defect_probability = (
-    0.3 * complexity_score +
-    0.1 * (df['past_defects'] / (df['past_defects'].max() + 1))
-)
+    # Save to CSV
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output, index=False)
 
-defect_probability += np.random.normal(0, 0.05, size=5000)
-defect_probability = np.clip(defect_probability, 0, 1)
+    print(f"✅ Generated {n_samples} samples with all feature combinations")
+    print(f"   Shape: {df.shape}")
+    print(f"   Defect Rate: {df['defects'].sum()} samples ({df['defects'].mean()*100:.1f}%)")
+    print(f"   File: {output}")
+    print(f"   Size: {output.stat().st_size / 1024:.1f} KB")
 
-df['defects'] = (np.random.random(size=5000) < defect_probability).astype(int)
+    print("\n📊 Dataset Statistics:")
+    print("=" * 70)
+    print(df.describe().T.to_string())
 
-# Save to CSV
-Path('data/raw').mkdir(parents=True, exist_ok=True)
-df.to_csv('data/raw/nasa_promise.csv', index=False)
+    print("\n📋 Sample Data (first 5 rows):")
+    print(df.head().to_string())
 
-print(f"✅ Generated 5000 samples with all feature combinations")
-print(f"   Shape: {df.shape}")
-print(f"   Defect Rate: {df['defects'].sum()} samples ({df['defects'].mean()*100:.1f}%)")
-print(f"   File: data/raw/nasa_promise.csv")
-print(f"   Size: {Path('data/raw/nasa_promise.csv').stat().st_size / 1024:.1f} KB")
+    print("\n✅ Data generation complete! Ready to train models.")
 
-print("\n📊 Dataset Statistics:")
-print("=" * 70)
-print(df.describe().T.to_string())
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the synthetic FailGuard dataset')
+    parser.add_argument('--rows', type=int,
+                        help='Rows to generate in chunks (omit for the reference 5000-row dataset)')
+    parser.add_argument('--output', help='CSV path, or directory for --format npy')
+    parser.add_argument('--format', choices=('csv', 'npy'), default='csv')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
 
-print("\n📋 Sample Data (first 5 rows):")
-print(df.head().to_string())
+if __name__ == '__main__':
+    args = parse_args()
+    if args.rows is None and args.format == 'csv':
+        main(seed=args.seed, output=args.output or 'data/raw/nasa_promise.csv')
+        sys.exit(0)
 
-print("\n✅ Data generation complete! Ready to train models.")
+    rows = args.rows if args.rows is not None else 5000
+    output = args.output or ('data/synthetic' if args.format == 'npy' else f'data/synthetic_{rows}.csv')
+    print(f"📊 Generating {rows:,} modules in chunks of {args.chunk_size:,} with {args.workers} worker(s)...")
+    summary = generate_dataset(rows, output, args.format, args.chunk_size, args.workers, args.seed)
+    print(f"✅ Wrote {summary['rows']:,} rows ({summary['chunks']} chunks) to {output}")
+    print(f"   Defect Rate: {summary['defect_rate']*100:.1f}%")
@@ -1,33 +1,298 @@
+import os
+import sys
+import gzip
+import time
+import heapq
+import shutil
 import sqlite3
+import argparse
+import itertools
+import tempfile
+import threading
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from contextlib import contextmanager
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.instrumentation import histogram, timed
+from config import EXPORT_BATCH_SIZE, FEATURE_NAMES, DB_STORAGE, DB_PAGE_SIZE
+
 DB_PATH = Path('database/predictions.db')
 
+DB_OPERATION_SECONDS = histogram(
+    'failguard_db_operation_seconds', 'Duration of database operations', ('operation',))
+
+STORAGE_LAYOUTS = ('standard', 'compact')
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+
+_FEATURES_SQL = ', '.join(FEATURE_NAMES)
+_STANDARD_COLUMNS = f'id, timestamp, {_FEATURES_SQL}, risk_level, probability, confidence, prediction, outcome'
+_STANDARD_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        loc INTEGER NOT NULL,
+        wmc REAL NOT NULL,
+        rfc REAL NOT NULL,
+        cbo REAL NOT NULL,
+        lcom REAL NOT NULL,
+        code_churn INTEGER NOT NULL,
+        num_developers INTEGER NOT NULL,
+        past_defects INTEGER NOT NULL,
+        risk_level TEXT NOT NULL,
+        probability REAL NOT NULL,
+        confidence REAL NOT NULL,
+        prediction TEXT NOT NULL,
+        outcome INTEGER
+    )
+'''
+
+# Compact layout: rows live in prediction_rows with Unix timestamps,
+# enum-coded labels and probabilities in integer millionths (about half
+# the bytes per row and index entry). `predictions` is a view decoding
+# them and INSTEAD OF triggers route writes, so the same SQL works on
+# both layouts. Confidence is stored in hundredths: it comes from the
+# unrounded probability, so it cannot be recomputed from the stored one
+# (rows written before the column existed fall back to recomputing it).
+_COMPACT_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS prediction_rows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts INTEGER NOT NULL,
+        loc INTEGER NOT NULL,
+        wmc REAL NOT NULL,
+        rfc REAL NOT NULL,
+        cbo REAL NOT NULL,
+        lcom REAL NOT NULL,
+        code_churn INTEGER NOT NULL,
+        num_developers INTEGER NOT NULL,
+        past_defects INTEGER NOT NULL,
+        risk_code INTEGER NOT NULL,
+        probability_ppm INTEGER NOT NULL,
+        defective INTEGER NOT NULL,
+        outcome INTEGER,
+        confidence_cp INTEGER
+    )
+'''
+_COMPACT_COLUMNS = f'ts, {_FEATURES_SQL}, risk_code, probability_ppm, defective, outcome, confidence_cp'
+# Value expressions, formatted with the SQL of a timestamp / risk level
+_TS_SQL = "CAST(strftime('%s', {}) AS INTEGER)"
+_RISK_CODE_SQL = "CASE {} WHEN 'LOW' THEN 0 WHEN 'MEDIUM' THEN 1 WHEN 'HIGH' THEN 2 END"
+_DECODE_SQL = f'''
+    id, datetime(ts, 'unixepoch') AS timestamp, {_FEATURES_SQL},
+    CASE risk_code WHEN 0 THEN 'LOW' WHEN 1 THEN 'MEDIUM' ELSE 'HIGH' END AS risk_level,
+    probability_ppm / 1000000.0 AS probability,
+    COALESCE(confidence_cp / 100.0, round(abs(probability_ppm - 500000) / 5000.0, 2)) AS confidence,
+    CASE defective WHEN 1 THEN 'DEFECTIVE' ELSE 'SAFE' END AS prediction,
+    outcome
+'''
+
+# Columns and value expressions to filter predictions on, per layout
+_STANDARD_FILTERS = {'timestamp': ('timestamp', '{}'), 'risk_level': ('risk_level', '{}')}
+_COMPACT_FILTERS = {'timestamp': ('ts', _TS_SQL), 'risk_level': ('risk_code', _RISK_CODE_SQL)}
+
+def _encode_sql(row=''):
+    """SELECT list encoding standard columns (prefixed with ``row``, e.g. 'NEW.') as _COMPACT_COLUMNS."""
+    features = ', '.join(row + name for name in FEATURE_NAMES)
+    return f'''
+        {_TS_SQL.format(f"COALESCE({row}timestamp, 'now')")}, {features},
+        {_RISK_CODE_SQL.format(row + 'risk_level')},
+        CAST(round({row}probability * 1000000) AS INTEGER),
+        CASE {row}prediction WHEN 'SAFE' THEN 0 WHEN 'DEFECTIVE' THEN 1 END,
+        {row}outcome,
+        CAST(round({row}confidence * 100) AS INTEGER)
+    '''
+
+def _create_compact_schema(cursor):
+    """Create prediction_rows, its index and the decoding `predictions` view with write triggers."""
+    cursor.execute(_COMPACT_TABLE_SQL)
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(prediction_rows)')}
+    if 'confidence_cp' not in columns:
+        cursor.execute('ALTER TABLE prediction_rows ADD COLUMN confidence_cp INTEGER')
+        # Recreated below with the column; dropping the view drops its triggers too
+        cursor.execute('DROP VIEW IF EXISTS predictions')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_prediction_rows_ts ON prediction_rows (ts)')
+    cursor.execute(f'CREATE VIEW IF NOT EXISTS predictions AS SELECT {_DECODE_SQL} FROM prediction_rows')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS predictions_insert INSTEAD OF INSERT ON predictions BEGIN
+            INSERT INTO prediction_rows (id, {_COMPACT_COLUMNS}) SELECT NEW.id, {_encode_sql('NEW.')};
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS predictions_update INSTEAD OF UPDATE ON predictions BEGIN
+            UPDATE prediction_rows SET ({_COMPACT_COLUMNS}) = (SELECT {_encode_sql('NEW.')}) WHERE id = OLD.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS predictions_delete INSTEAD OF DELETE ON predictions BEGIN
+            DELETE FROM prediction_rows WHERE id = OLD.id;
+        END
+    ''')
+
+def _create_prediction_schema(cursor, layout):
+    """Create (or upgrade) the predictions table of a database in the given layout."""
+    if layout == 'compact':
+        # Only takes effect while the file is still empty
+        cursor.execute(f'PRAGMA page_size = {int(DB_PAGE_SIZE)}')
+        _create_compact_schema(cursor)
+    else:
+        cursor.execute(_STANDARD_TABLE_SQL)
+        # Observed outcome (1 = defect found, 0 = none), loaded with historical imports
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(predictions)')}
+        if 'outcome' not in columns:
+            cursor.execute('ALTER TABLE predictions ADD COLUMN outcome INTEGER')
+        # Serves ORDER BY timestamp and date-range exports
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp)')
+
+def storage_layout(conn):
+    """'compact' if predictions is the view over prediction_rows, else 'standard'."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'predictions'").fetchone()
+    return 'compact' if row and row[0] == 'view' else 'standard'
+
+def prediction_table(conn):
+    """Table physically holding the predictions."""
+    return 'prediction_rows' if storage_layout(conn) == 'compact' else 'predictions'
+
+def _prediction_source(conn):
+    """
+    Table, SELECT clause and filter columns to query predictions with.
+    
+    On the compact layout queries read prediction_rows directly, so that
+    timestamp filters and ordering use the integer ``ts`` index instead
+    of the view's decoded text column.
+    
+    Returns:
+        (table, select, filters) where ``filters`` maps 'timestamp' and
+        'risk_level' to (column, format string for the compared value)
+    """
+    if storage_layout(conn) == 'compact':
+        return 'prediction_rows', f'SELECT {_DECODE_SQL} FROM prediction_rows', _COMPACT_FILTERS
+    return 'predictions', 'SELECT * FROM predictions', _STANDARD_FILTERS
+
+def _condition(filters, name, operator, value='?'):
+    """``column <operator> value`` for a filter of _prediction_source."""
+    column, value_sql = filters[name]
+    return f'{column} {operator} {value_sql.format(value)}'
+
+def prediction_insert_sql(conn, columns):
+    """
+    INSERT statement for predictions, with one ``?`` per name in ``columns``.
+    
+    On the compact layout values are encoded straight into prediction_rows:
+    unlike inserts through the view's trigger, cursor.lastrowid stays valid
+    and bulk loads skip the per-row trigger.
+    """
+    if storage_layout(conn) == 'compact':
+        encoded = ['timestamp'] + FEATURE_NAMES + ['risk_level', 'probability', 'prediction', 'outcome', 'confidence']
+        values = ', '.join([f'? AS {column}' for column in columns] +
+                           [f'NULL AS {column}' for column in encoded if column not in columns])
+        return f'INSERT INTO prediction_rows ({_COMPACT_COLUMNS}) SELECT {_encode_sql()} FROM (SELECT {values})'
+    return f"INSERT INTO predictions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+@timed(DB_OPERATION_SECONDS, operation='init_database')
 def init_database():
     """Initialize database with predictions table."""
+    if DB_STORAGE not in STORAGE_LAYOUTS:
+        raise ValueError(f"Unknown storage layout '{DB_STORAGE}' (expected one of {', '.join(STORAGE_LAYOUTS)})")
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     with get_db() as conn:
         cursor = conn.cursor()
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'predictions'").fetchone()
+        layout = storage_layout(conn) if exists else DB_STORAGE
+        _create_prediction_schema(cursor, layout)
+        if layout != DB_STORAGE:
+            print(f"✗ Predictions use the {layout} storage layout (FAILGUARD_DB_STORAGE={DB_STORAGE}); "
+                  f"convert with: python database/db.py --migrate {DB_STORAGE}")
+        # Tracked modules: latest features and score per stable module identity
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS predictions (
+            CREATE TABLE IF NOT EXISTS tracked_modules (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                loc INTEGER NOT NULL,
-                wmc REAL NOT NULL,
-                rfc REAL NOT NULL,
-                cbo REAL NOT NULL,
-                lcom REAL NOT NULL,
-                code_churn INTEGER NOT NULL,
-                num_developers INTEGER NOT NULL,
-                past_defects INTEGER NOT NULL,
+                repo TEXT NOT NULL,
+                path TEXT NOT NULL,
+                features TEXT NOT NULL,
+                features_hash TEXT NOT NULL,
+                model_version TEXT NOT NULL,
                 risk_level TEXT NOT NULL,
                 probability REAL NOT NULL,
                 confidence REAL NOT NULL,
-                prediction TEXT NOT NULL
+                prediction TEXT NOT NULL,
+                first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_scored DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (repo, path)
+            )
+        ''')
+        # Score changes of tracked modules (one row per change, not per scan)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS module_score_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                repo TEXT NOT NULL,
+                path TEXT NOT NULL,
+                change TEXT NOT NULL,
+                model_version TEXT,
+                features TEXT,
+                risk_level TEXT,
+                probability REAL,
+                previous_risk_level TEXT,
+                previous_probability REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_module_score_history_module
+            ON module_score_history (repo, path, timestamp)
+        ''')
+        # Background jobs (see src/jobs.py); queued jobs survive restarts
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                params TEXT NOT NULL DEFAULT '{}',
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                started_at DATETIME,
+                finished_at DATETIME
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs (kind, created_at)')
+        # Predictions per day and risk level, rebuilt by the 'rollup' job
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_daily_rollup (
+                day TEXT NOT NULL,
+                risk_level TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                probability_sum REAL NOT NULL,
+                PRIMARY KEY (day, risk_level)
+            )
+        ''')
+        # Months moved out of the predictions table into partition files (see partition_predictions)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_partitions (
+                month TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                archived INTEGER NOT NULL DEFAULT 0,
+                rows INTEGER NOT NULL,
+                min_id INTEGER,
+                max_id INTEGER,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Per-day totals of the partitioned months, so stats never open partition files
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_partition_rollup (
+                day TEXT NOT NULL,
+                risk_level TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                probability_sum REAL NOT NULL,
+                PRIMARY KEY (day, risk_level)
             )
         ''')
         conn.commit()
@@ -42,18 +307,39 @@ def get_db():
     finally:
         conn.close()
 
+# Long-lived read connection whose PRAGMA data_version tracks commits (see data_version)
+_version_lock = threading.Lock()
+_version_watch = {'path': None, 'conn': None, 'epoch': 0}
+
+def data_version():
+    """
+    Version of the database contents, for validating cached API responses.
+    
+    Read from ``PRAGMA data_version`` on a long-lived connection, which
+    changes whenever any other connection (in this process or another,
+    e.g. save_prediction, delete_prediction, bulk imports and jobs)
+    commits. Reading it costs microseconds instead of a query.
+    
+    Returns:
+        Hashable version; equal values mean nothing was committed in between
+    """
+    with _version_lock:
+        watch = _version_watch
+        if watch['path'] != DB_PATH:
+            if watch['conn'] is not None:
+                watch['conn'].close()
+            watch.update(path=DB_PATH, conn=sqlite3.connect(str(DB_PATH), check_same_thread=False),
+                         epoch=watch['epoch'] + 1)
+        return watch['epoch'], watch['conn'].execute('PRAGMA data_version').fetchone()[0]
+
+@timed(DB_OPERATION_SECONDS, operation='save_prediction')
 def save_prediction(features_dict, result):
     """Save prediction to database."""
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO predictions (
-                    loc, wmc, rfc, cbo, lcom, code_churn, 
-                    num_developers, past_defects, risk_level, 
-                    probability, confidence, prediction
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            columns = FEATURE_NAMES + ['risk_level', 'probability', 'confidence', 'prediction']
+            cursor.execute(prediction_insert_sql(conn, columns), (
                 int(features_dict['loc']),
                 float(features_dict['wmc']),
                 float(features_dict['rfc']),
@@ -73,64 +359,179 @@ def save_prediction(features_dict, result):
         print(f"Error saving prediction: {e}")
         return None
 
+def _query_predictions(conn, since=None, until=None, risk_level=None, descending=False, limit=None):
+    """
+    Run a filtered, time-ordered query on the predictions of one database.
+    
+    Args:
+        conn: Connection to the database or to a partition file
+        since, until: Optional timestamp bounds, inclusive and exclusive
+        risk_level: Optional risk level filter
+        descending: Newest first instead of oldest first
+        limit: Optional maximum number of rows
+        
+    Returns:
+        Cursor over the rows
+    """
+    _, select, filters = _prediction_source(conn)
+    query = f'{select} WHERE 1 = 1'
+    params = []
+    if since:
+        query += ' AND ' + _condition(filters, 'timestamp', '>=')
+        params.append(since)
+    if until:
+        query += ' AND ' + _condition(filters, 'timestamp', '<')
+        params.append(until)
+    if risk_level:
+        query += ' AND ' + _condition(filters, 'risk_level', '=')
+        params.append(risk_level)
+    order = ' DESC' if descending else ''
+    query += f" ORDER BY {filters['timestamp'][0]}{order}, id{order}"
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return conn.execute(query, params)
+
+def _fetch_rows(cursor, batch_size):
+    """Rows of a cursor, fetched in batches."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+@timed(DB_OPERATION_SECONDS, operation='get_all_predictions')
 def get_all_predictions(limit=None):
-    """Get all predictions from database."""
+    """
+    Get predictions, newest first, from the table and its partitions.
+    
+    Partitions are only opened when the table alone cannot fill ``limit``
+    with rows newer than the partition's month.
+    """
     try:
         with get_db() as conn:
-            cursor = conn.cursor()
-            if limit:
-                cursor.execute('SELECT * FROM predictions ORDER BY timestamp DESC LIMIT ?', (limit,))
-            else:
-                cursor.execute('SELECT * FROM predictions ORDER BY timestamp DESC')
-            return [dict(row) for row in cursor.fetchall()]
+            return _latest_predictions(conn, limit)
     except Exception as e:
         print(f"Error fetching predictions: {e}")
         return []
 
+def _latest_predictions(conn, limit):
+    """Newest predictions of the table and, when needed, its partitions (see get_all_predictions)."""
+    rows = [dict(row) for row in _query_predictions(conn, descending=True, limit=limit or None)]
+    for partition in reversed(_partitions(conn)):
+        if limit and len(rows) >= limit and rows[-1]['timestamp'] >= _month_bounds(partition['month'])[1]:
+            break
+        with _open_partition(partition) as part:
+            part.row_factory = sqlite3.Row
+            rows.extend(dict(row) for row in _query_predictions(part, descending=True, limit=limit or None))
+        rows.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+        if limit:
+            del rows[limit:]
+    return rows
+
+def _iter_rows(since=None, until=None, risk_level=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Column names, then prediction rows oldest first, across the table and its partitions.
+    
+    Partitions hold whole months, but the table may also have rows of a
+    partitioned month (imported after it was moved), so each partitioned
+    month is a merge of both; the ranges in between come from the table.
+    """
+    conn = sqlite3.connect(str(DB_PATH))
+    try:
+        def table_rows(low, high):
+            low, high = max(filter(None, (since, low)), default=None), min(filter(None, (until, high)), default=None)
+            return _fetch_rows(_query_predictions(conn, low, high, risk_level), batch_size)
+        
+        yield [column[0] for column in _query_predictions(conn, limit=0).description]
+        lower = None
+        for partition in _partitions(conn):
+            start, end = _month_bounds(partition['month'])
+            if (since and end <= since) or (until and start >= until):
+                continue
+            yield from table_rows(lower, start)
+            with _open_partition(partition) as part:
+                part_rows = _fetch_rows(_query_predictions(part, max(since or start, start),
+                                                           min(until or end, end), risk_level), batch_size)
+                yield from heapq.merge(part_rows, table_rows(start, end), key=lambda row: (row[1], row[0]))
+            lower = end
+        yield from table_rows(lower, None)
+    finally:
+        conn.close()
+
+def iter_prediction_batches(batch_size=EXPORT_BATCH_SIZE, since=None, until=None, risk_level=None):
+    """
+    Stream predictions, oldest first, in batches, including partitioned months.
+    
+    Only one batch of rows is held in memory at a time, whatever the
+    table size. The first item is the list of column names; every later
+    item is a list of row tuples.
+    
+    Args:
+        batch_size: Rows fetched per batch
+        since, until: Optional timestamp bounds ('YYYY-MM-DD[ HH:MM:SS]'),
+            inclusive and exclusive
+        risk_level: Optional risk level filter
+        
+    Yields:
+        Column names, then lists of tuples
+    """
+    rows = _iter_rows(since, until, risk_level, batch_size)
+    try:
+        yield next(rows)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            yield batch
+    finally:
+        rows.close()
+
+def iter_predictions(batch_size=EXPORT_BATCH_SIZE, **filters):
+    """
+    Iterate over predictions as dictionaries without loading the table.
+    
+    Args:
+        batch_size: Rows fetched per batch
+        **filters: since, until, risk_level (see iter_prediction_batches)
+        
+    Yields:
+        One dictionary per prediction, oldest first
+    """
+    batches = iter_prediction_batches(batch_size, **filters)
+    columns = next(batches)
+    for rows in batches:
+        for row in rows:
+            yield dict(zip(columns, row))
+
+@timed(DB_OPERATION_SECONDS, operation='get_prediction_by_id')
 def get_prediction_by_id(pred_id):
-    """Get specific prediction by ID."""
+    """Get specific prediction by ID, looking in partitions whose id range covers it."""
     try:
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM predictions WHERE id = ?', (pred_id,))
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if row:
+                return dict(row)
+            for partition in _partitions(conn):
+                if partition['min_id'] is not None and partition['min_id'] <= pred_id <= partition['max_id']:
+                    with _open_partition(partition) as part:
+                        part.row_factory = sqlite3.Row
+                        row = part.execute('SELECT * FROM predictions WHERE id = ?', (pred_id,)).fetchone()
+                    if row:
+                        return dict(row)
+            return None
     except Exception as e:
         print(f"Error fetching prediction: {e}")
         return None
 
+@timed(DB_OPERATION_SECONDS, operation='get_prediction_stats')
 def get_prediction_stats():
     """Get statistics about predictions."""
     try:
         with get_db() as conn:
-            cursor = conn.cursor()
-            
-            # Total predictions
-            cursor.execute('SELECT COUNT(*) as count FROM predictions')
-            total = cursor.fetchone()['count']
-            
-            # Risk level distribution
-            cursor.execute('''
-                SELECT risk_level, COUNT(*) as count 
-                FROM predictions 
-                GROUP BY risk_level
-            ''')
-            risk_dist = {row['risk_level']: row['count'] for row in cursor.fetchall()}
-            
-            # Average probability
-            cursor.execute('SELECT AVG(probability) as avg_prob FROM predictions')
-            avg_prob = cursor.fetchone()['avg_prob'] or 0
-            
-            # High risk count
-            cursor.execute('SELECT COUNT(*) as count FROM predictions WHERE risk_level = ?', ('HIGH',))
-            high_risk = cursor.fetchone()['count']
-            
-            return {
-                'total': total,
-                'risk_distribution': risk_dist,
-                'average_probability': round(avg_prob * 100, 2),
-                'high_risk_count': high_risk
-            }
+            return stats_from_totals(_risk_totals(conn))
     except Exception as e:
         print(f"Error getting stats: {e}")
         return {
@@ -140,29 +541,740 @@ def get_prediction_stats():
             'high_risk_count': 0
         }
 
+def _risk_totals(conn):
+    """[count, probability sum] per risk level, partitioned months included."""
+    rows = conn.execute('''
+        SELECT risk_level, SUM(count) as count, SUM(probability_sum) as probability_sum FROM (
+            SELECT risk_level, COUNT(*) as count, SUM(probability) as probability_sum
+            FROM predictions GROUP BY risk_level
+            UNION ALL
+            SELECT risk_level, count, probability_sum FROM prediction_partition_rollup
+        ) GROUP BY risk_level
+    ''').fetchall()
+    return {row[0]: [row[1], row[2]] for row in rows}
+
+def stats_from_totals(totals):
+    """
+    get_prediction_stats result from per-risk-level totals.
+    
+    Args:
+        totals: Dictionary of risk level -> [count, probability sum]
+        
+    Returns:
+        Dictionary with total, risk_distribution, average_probability and high_risk_count
+    """
+    risk_dist = {level: count for level, (count, _) in totals.items() if count}
+    total = sum(risk_dist.values())
+    avg_prob = sum(probability_sum for _, probability_sum in totals.values()) / total if total else 0
+    return {
+        'total': total,
+        'risk_distribution': risk_dist,
+        'average_probability': round(avg_prob * 100, 2),
+        'high_risk_count': risk_dist.get('HIGH', 0)
+    }
+
+@timed(DB_OPERATION_SECONDS, operation='get_dashboard_data')
+def get_dashboard_data(limit):
+    """
+    Risk-level totals and the latest predictions, read in one transaction.
+    
+    Args:
+        limit: Number of latest predictions
+        
+    Returns:
+        (totals as in stats_from_totals, list of prediction dictionaries newest first)
+    """
+    with get_db() as conn:
+        # One read transaction, so the totals and rows are consistent
+        conn.execute('BEGIN')
+        try:
+            return _risk_totals(conn), _latest_predictions(conn, limit)
+        finally:
+            conn.rollback()
+
+@timed(DB_OPERATION_SECONDS, operation='delete_prediction')
 def delete_prediction(pred_id):
-    """Delete a prediction from database."""
+    """
+    Delete a prediction from database, or from the partition whose id range covers it.
+
+    Returns:
+        True if the prediction existed and was deleted
+    """
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM predictions WHERE id = ?', (pred_id,))
+            # The storage table, as rows deleted through the compact view's trigger are not counted
+            cursor.execute(f'DELETE FROM {prediction_table(conn)} WHERE id = ?', (pred_id,))
             conn.commit()
-            return True
+            if cursor.rowcount:
+                return True
+            partitions = [partition for partition in _partitions(conn) if partition['min_id'] is not None
+                          and partition['min_id'] <= pred_id <= partition['max_id']]
+        return any(_delete_from_partition(partition, pred_id) for partition in partitions)
     except Exception as e:
         print(f"Error deleting prediction: {e}")
         return False
 
+@timed(DB_OPERATION_SECONDS, operation='clear_all_predictions')
 def clear_all_predictions():
-    """Clear all predictions from database."""
+    """Clear all predictions from database, partitions included."""
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM predictions')
+            cursor.execute(f'DELETE FROM {prediction_table(conn)}')
             conn.commit()
+            _drop_partitions(_partitions(conn))
             return True
     except Exception as e:
         print(f"Error clearing predictions: {e}")
         return False
 
+@timed(DB_OPERATION_SECONDS, operation='get_tracked_modules')
+def get_tracked_modules(repo):
+    """Get tracked modules of a repository keyed by path."""
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM tracked_modules WHERE repo = ?', (repo,))
+            return {row['path']: dict(row) for row in cursor.fetchall()}
+    except Exception as e:
+        print(f"Error fetching tracked modules: {e}")
+        return {}
+
+@timed(DB_OPERATION_SECONDS, operation='save_module_scores')
+def save_module_scores(repo, scored, removed=()):
+    """
+    Upsert changed module scores and record the deltas, in one transaction.
+
+    Args:
+        repo: Repository identifier
+        scored: Dicts with path, change, features (JSON), features_hash,
+            model_version, risk_level, probability (0-100), confidence,
+            prediction, previous_risk_level and previous_probability
+        removed: Paths that disappeared from the repository
+
+    Returns:
+        True on success
+    """
+    rows = [dict(module, repo=repo, probability=module['probability'] / 100) for module in scored]
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO tracked_modules (
+                    repo, path, features, features_hash, model_version,
+                    risk_level, probability, confidence, prediction
+                ) VALUES (
+                    :repo, :path, :features, :features_hash, :model_version,
+                    :risk_level, :probability, :confidence, :prediction
+                )
+                ON CONFLICT (repo, path) DO UPDATE SET
+                    features = excluded.features,
+                    features_hash = excluded.features_hash,
+                    model_version = excluded.model_version,
+                    risk_level = excluded.risk_level,
+                    probability = excluded.probability,
+                    confidence = excluded.confidence,
+                    prediction = excluded.prediction,
+                    last_scored = CURRENT_TIMESTAMP
+            ''', rows)
+            cursor.executemany('''
+                INSERT INTO module_score_history (
+                    repo, path, change, model_version, features, risk_level,
+                    probability, previous_risk_level, previous_probability
+                ) VALUES (
+                    :repo, :path, :change, :model_version, :features, :risk_level,
+                    :probability, :previous_risk_level, :previous_probability
+                )
+            ''', rows)
+            removed = list(removed)
+            cursor.executemany('''
+                INSERT INTO module_score_history (repo, path, change, previous_risk_level, previous_probability)
+                SELECT repo, path, 'removed', risk_level, probability
+                FROM tracked_modules WHERE repo = ? AND path = ?
+            ''', [(repo, path) for path in removed])
+            cursor.executemany('DELETE FROM tracked_modules WHERE repo = ? AND path = ?',
+                               [(repo, path) for path in removed])
+            conn.commit()
+            return True
+    except Exception as e:
+        print(f"Error saving module scores: {e}")
+        return False
+
+@timed(DB_OPERATION_SECONDS, operation='get_module_history')
+def get_module_history(repo, path=None, limit=None):
+    """Get score changes of a repository (or one module), newest first."""
+    try:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            query = 'SELECT * FROM module_score_history WHERE repo = ?'
+            params = [repo]
+            if path is not None:
+                query += ' AND path = ?'
+                params.append(path)
+            query += ' ORDER BY id DESC'
+            if limit:
+                query += ' LIMIT ?'
+                params.append(limit)
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"Error fetching module history: {e}")
+        return []
+
+def _job_from_row(row):
+    """Job row as a dictionary with decoded params/result."""
+    job = dict(row)
+    job['params'] = json.loads(job['params']) if job['params'] else {}
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+@timed(DB_OPERATION_SECONDS, operation='create_job')
+def create_job(kind, params=None):
+    """Queue a job and return its id."""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO jobs (kind, params) VALUES (?, ?)', (kind, json.dumps(params or {})))
+        conn.commit()
+        return cursor.lastrowid
+
+@timed(DB_OPERATION_SECONDS, operation='get_job')
+def get_job(job_id):
+    """Get one job (None if it does not exist)."""
+    with get_db() as conn:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+
+@timed(DB_OPERATION_SECONDS, operation='list_jobs')
+def list_jobs(status=None, kind=None, limit=50, oldest_first=False):
+    """List jobs, newest first unless ``oldest_first``."""
+    query = 'SELECT * FROM jobs WHERE 1 = 1'
+    params = []
+    if status is not None:
+        statuses = [status] if isinstance(status, str) else list(status)
+        query += f" AND status IN ({', '.join('?' * len(statuses))})"
+        params.extend(statuses)
+    if kind is not None:
+        query += ' AND kind = ?'
+        params.append(kind)
+    query += ' ORDER BY id' + ('' if oldest_first else ' DESC')
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    with get_db() as conn:
+        return [_job_from_row(row) for row in conn.execute(query, params).fetchall()]
+
+@timed(DB_OPERATION_SECONDS, operation='start_job')
+def start_job(job_id):
+    """Mark a queued job as running. Returns False if it is no longer queued."""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'queued'
+        ''', (job_id,))
+        conn.commit()
+        return cursor.rowcount == 1
+
+@timed(DB_OPERATION_SECONDS, operation='update_job_progress')
+def update_job_progress(job_id, progress, message=None):
+    """Record progress (0-1) of a running job. Returns True if cancellation was requested."""
+    with get_db() as conn:
+        conn.execute('UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?',
+                     (progress, message, job_id))
+        conn.commit()
+        row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+@timed(DB_OPERATION_SECONDS, operation='finish_job')
+def finish_job(job_id, status, result=None, error=None):
+    """Record the outcome of a job ('succeeded', 'failed' or 'cancelled')."""
+    with get_db() as conn:
+        conn.execute('''
+            UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP,
+                progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END
+            WHERE id = ?
+        ''', (status, json.dumps(result) if result is not None else None, error, status, job_id))
+        conn.commit()
+
+@timed(DB_OPERATION_SECONDS, operation='request_job_cancel')
+def request_job_cancel(job_id):
+    """
+    Cancel a job: queued jobs are cancelled at once, running jobs stop at
+    their next progress report.
+
+    Returns:
+        The updated job, or None if it does not exist
+    """
+    with get_db() as conn:
+        conn.execute('''
+            UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'queued'
+        ''', (job_id,))
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        conn.commit()
+    return get_job(job_id)
+
+@timed(DB_OPERATION_SECONDS, operation='job_ran_since')
+def job_ran_since(kind, seconds):
+    """Whether a job of this kind was created in the last ``seconds``."""
+    with get_db() as conn:
+        row = conn.execute('''
+            SELECT 1 FROM jobs WHERE kind = ? AND created_at > datetime('now', ?) LIMIT 1
+        ''', (kind, f'-{int(seconds)} seconds')).fetchone()
+        return row is not None
+
+@timed(DB_OPERATION_SECONDS, operation='fail_interrupted_jobs')
+def fail_interrupted_jobs():
+    """Mark jobs left running by a previous process as failed. Returns the count."""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            UPDATE jobs SET status = 'failed', error = 'Interrupted by restart', finished_at = CURRENT_TIMESTAMP
+            WHERE status = 'running'
+        ''')
+        conn.commit()
+        return cursor.rowcount
+
+@timed(DB_OPERATION_SECONDS, operation='delete_finished_jobs')
+def delete_finished_jobs(older_than_days):
+    """Delete finished jobs older than ``older_than_days``. Returns the count."""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled')
+            AND finished_at < datetime('now', ?)
+        ''', (f'-{int(older_than_days)} days',))
+        conn.commit()
+        return cursor.rowcount
+
+@timed(DB_OPERATION_SECONDS, operation='rebuild_daily_rollup')
+def rebuild_daily_rollup():
+    """Recompute prediction_daily_rollup from the predictions table and partitions. Returns the row count."""
+    with get_db() as conn:
+        conn.execute('DELETE FROM prediction_daily_rollup')
+        conn.execute('''
+            INSERT INTO prediction_daily_rollup (day, risk_level, count, probability_sum)
+            SELECT day, risk_level, SUM(count), SUM(probability_sum) FROM (
+                SELECT date(timestamp) AS day, risk_level, COUNT(*) AS count, SUM(probability) AS probability_sum
+                FROM predictions GROUP BY date(timestamp), risk_level
+                UNION ALL
+                SELECT day, risk_level, count, probability_sum FROM prediction_partition_rollup
+            ) GROUP BY day, risk_level
+        ''')
+        conn.commit()
+        return conn.execute('SELECT COUNT(*) FROM prediction_daily_rollup').fetchone()[0]
+
+@timed(DB_OPERATION_SECONDS, operation='get_daily_rollup')
+def get_daily_rollup(days=None):
+    """Predictions per day and risk level from the last rollup, oldest day first."""
+    try:
+        with get_db() as conn:
+            query = 'SELECT * FROM prediction_daily_rollup'
+            params = []
+            if days:
+                query += " WHERE day >= date('now', ?)"
+                params.append(f'-{int(days)} days')
+            query += ' ORDER BY day, risk_level'
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    except Exception as e:
+        print(f"Error fetching daily rollup: {e}")
+        return []
+
+@timed(DB_OPERATION_SECONDS, operation='count_predictions_before')
+def count_predictions_before(days):
+    """Number of predictions older than ``days``."""
+    with get_db() as conn:
+        table, _, filters = _prediction_source(conn)
+        condition = _condition(filters, 'timestamp', '<', "datetime('now', ?)")
+        return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {condition}',
+                            (f'-{int(days)} days',)).fetchone()[0]
+
+@timed(DB_OPERATION_SECONDS, operation='delete_predictions_before')
+def delete_predictions_before(days, batch_size=10000):
+    """
+    Delete up to ``batch_size`` of the oldest predictions older than ``days``.
+
+    Deleting in batches keeps each write transaction short, so serving
+    requests are never blocked for long.
+
+    Returns:
+        Number of rows deleted (0 when nothing is left to delete)
+    """
+    with get_db() as conn:
+        table, _, filters = _prediction_source(conn)
+        condition = _condition(filters, 'timestamp', '<', "datetime('now', ?)")
+        cursor = conn.execute(f'''
+            DELETE FROM {table} WHERE id IN (
+                SELECT id FROM {table} WHERE {condition} ORDER BY id LIMIT ?
+            )
+        ''', (f'-{int(days)} days', batch_size))
+        conn.commit()
+        return cursor.rowcount
+
+def partition_dir():
+    """Directory holding the monthly partition files of the database at DB_PATH."""
+    return DB_PATH.parent / f'{DB_PATH.stem}_partitions'
+
+def _month_bounds(month):
+    """First day of ``month`` ('YYYY-MM') and of the month after, as 'YYYY-MM-01'."""
+    year, number = map(int, month.split('-'))
+    return f'{month}-01', f'{year + number // 12:04d}-{number % 12 + 1:02d}-01'
+
+def _month_before(months):
+    """'YYYY-MM' of the month ``months`` before the current one (UTC)."""
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 - months
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+def _partitions(conn):
+    """Catalog rows of the partitioned months, oldest first."""
+    cursor = conn.execute('SELECT * FROM prediction_partitions ORDER BY month')
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+@timed(DB_OPERATION_SECONDS, operation='list_partitions')
+def list_partitions():
+    """Partitioned months, oldest first, with their file size in bytes."""
+    with get_db() as conn:
+        partitions = _partitions(conn)
+    for partition in partitions:
+        path = partition_dir() / partition['file']
+        partition['size_bytes'] = path.stat().st_size if path.exists() else None
+    return partitions
+
+@contextmanager
+def _open_partition(partition):
+    """Read-only connection to a partition file; archived ones are decompressed to a temporary file."""
+    path = partition_dir() / partition['file']
+    temporary = None
+    if partition['archived']:
+        fd, temporary = tempfile.mkstemp(suffix='.db', dir=partition_dir())
+        with os.fdopen(fd, 'wb') as out, gzip.open(path, 'rb') as archive:
+            shutil.copyfileobj(archive, out)
+        path = Path(temporary)
+    conn = sqlite3.connect(f'{path.resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        if temporary:
+            os.unlink(temporary)
+
+def _move_month(month):
+    """
+    Move one month from the predictions table into its partition file.
+    
+    Rows are appended to ``<partition_dir>/YYYY-MM.db`` (restored first if
+    the month was archived) and deleted from the table in one transaction
+    spanning both files, which also refreshes the month's catalog entry
+    and per-day totals.
+    
+    Returns:
+        Number of rows moved
+    """
+    start, end = _month_bounds(month)
+    directory = partition_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{month}.db'
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+    try:
+        archive = conn.execute('SELECT file FROM prediction_partitions WHERE month = ? AND archived = 1',
+                               (month,)).fetchone()
+        if archive:
+            with gzip.open(directory / archive[0], 'rb') as source, open(path, 'wb') as out:
+                shutil.copyfileobj(source, out)
+        layout = storage_layout(conn)
+        part = sqlite3.connect(str(path))
+        try:
+            exists = part.execute("SELECT 1 FROM sqlite_master WHERE name = 'predictions'").fetchone()
+            same_layout = not exists or storage_layout(part) == layout
+            if same_layout:
+                # Creates the file's schema, or brings an older one up to the table's columns
+                _create_prediction_schema(part, layout)
+                part.commit()
+        finally:
+            part.close()
+        
+        table, _, filters = _prediction_source(conn)
+        condition = f"{_condition(filters, 'timestamp', '>=')} AND {_condition(filters, 'timestamp', '<')}"
+        if same_layout:
+            # Copy the stored rows as they are
+            copy = f'INSERT INTO part.{table} SELECT * FROM main.{table} WHERE {condition}'
+        else:
+            copy = f'''
+                INSERT INTO part.predictions ({_STANDARD_COLUMNS}) SELECT {_STANDARD_COLUMNS}
+                FROM main.predictions WHERE timestamp >= ? AND timestamp < ?
+            '''
+        conn.execute('ATTACH DATABASE ? AS part', (str(path),))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(copy, (start, end))
+                rows = conn.execute(f'DELETE FROM main.{table} WHERE {condition}', (start, end)).rowcount
+                conn.execute('DELETE FROM prediction_partition_rollup WHERE day >= ? AND day < ?', (start, end))
+                conn.execute('''
+                    INSERT INTO prediction_partition_rollup (day, risk_level, count, probability_sum)
+                    SELECT date(timestamp), risk_level, COUNT(*), SUM(probability)
+                    FROM part.predictions GROUP BY date(timestamp), risk_level
+                ''')
+                conn.execute('''
+                    INSERT INTO prediction_partitions (month, file, archived, rows, min_id, max_id)
+                    SELECT ?, ?, 0, COUNT(*), MIN(id), MAX(id) FROM part.predictions WHERE true
+                    ON CONFLICT (month) DO UPDATE SET file = excluded.file, archived = 0, rows = excluded.rows,
+                        min_id = excluded.min_id, max_id = excluded.max_id, updated_at = CURRENT_TIMESTAMP
+                ''', (month, path.name))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.execute('DETACH DATABASE part')
+    finally:
+        conn.close()
+    if archive:
+        (directory / archive[0]).unlink()
+    return rows
+
+def _delete_from_partition(partition, pred_id):
+    """
+    Delete one prediction from a partition file.
+
+    An archived partition is decompressed first and compressed again once
+    the row is gone. The row, the month's catalog entry and its per-day
+    totals change in one transaction spanning both files.
+
+    Returns:
+        True if the partition held the prediction
+    """
+    directory = partition_dir()
+    path = directory / partition['file']
+    if partition['archived']:
+        path = directory / f"{partition['month']}.db"
+        with gzip.open(directory / partition['file'], 'rb') as source, open(path, 'wb') as out:
+            shutil.copyfileobj(source, out)
+    part = sqlite3.connect(str(path))
+    try:
+        table = prediction_table(part)
+    finally:
+        part.close()
+
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+    try:
+        conn.execute('ATTACH DATABASE ? AS part', (str(path),))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT date(timestamp), risk_level, probability FROM part.predictions WHERE id = ?',
+                                   (pred_id,)).fetchone()
+                if row:
+                    day, risk_level, probability = row
+                    conn.execute(f'DELETE FROM part.{table} WHERE id = ?', (pred_id,))
+                    conn.execute('''
+                        UPDATE prediction_partition_rollup SET count = count - 1, probability_sum = probability_sum - ?
+                        WHERE day = ? AND risk_level = ?
+                    ''', (probability, day, risk_level))
+                    conn.execute('DELETE FROM prediction_partition_rollup WHERE day = ? AND count = 0', (day,))
+                    # Points at the decompressed file until it is archived again below
+                    conn.execute(f'''
+                        UPDATE prediction_partitions SET file = ?, archived = 0,
+                            (rows, min_id, max_id) = (SELECT COUNT(*), MIN(id), MAX(id) FROM part.{table}),
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE month = ?
+                    ''', (path.name, partition['month']))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.execute('DETACH DATABASE part')
+    finally:
+        conn.close()
+
+    if partition['archived']:
+        if row:
+            (directory / partition['file']).unlink()
+            _archive_partition({**partition, 'file': path.name, 'archived': 0})
+        else:
+            path.unlink()
+    return row is not None
+
+def _archive_partition(partition):
+    """gzip-compress a partition file and point its catalog entry at the archive."""
+    source = partition_dir() / partition['file']
+    target = source.with_name(source.name + '.gz')
+    partial = target.with_name(target.name + '.tmp')
+    with open(source, 'rb') as data, gzip.open(partial, 'wb') as archive:
+        shutil.copyfileobj(data, archive)
+    os.replace(partial, target)
+    with get_db() as conn:
+        conn.execute('''
+            UPDATE prediction_partitions SET file = ?, archived = 1, updated_at = CURRENT_TIMESTAMP
+            WHERE month = ?
+        ''', (target.name, partition['month']))
+        conn.commit()
+    source.unlink()
+
+@timed(DB_OPERATION_SECONDS, operation='partition_predictions')
+def partition_predictions(hot_months, archive_months=None, progress=None):
+    """
+    Move closed months out of the predictions table into monthly partition files.
+    
+    Every month before the ``hot_months`` most recent ones (counting the
+    current one) goes to its own SQLite file in partition_dir(), in the
+    table's storage layout, so the table behind the dashboard stays small.
+    Reads (get_all_predictions, get_prediction_by_id, exports, stats and
+    the daily rollup) span the partitions. Partition files older than
+    ``archive_months`` are then gzip-compressed; they are decompressed to
+    a temporary file when a query needs them.
+    
+    Args:
+        hot_months: Months kept in the table (at least 1)
+        archive_months: Age in months after which partitions are compressed (None: never)
+        progress: Optional ``progress(fraction, message)`` callback
+        
+    Returns:
+        Dictionary with the months moved, rows moved and months archived
+    """
+    if hot_months < 1:
+        raise ValueError('hot_months must be at least 1')
+    cutoff = _month_bounds(_month_before(hot_months - 1))[0]
+    with get_db() as conn:
+        _, select, filters = _prediction_source(conn)
+        months = [row[0] for row in conn.execute(f'''
+            SELECT DISTINCT substr(timestamp, 1, 7) FROM ({select} WHERE {_condition(filters, 'timestamp', '<')})
+            ORDER BY 1
+        ''', (cutoff,))]
+    
+    rows = 0
+    for number, month in enumerate(months):
+        if progress:
+            progress(number / (len(months) + 1), f"Moving {month} to its partition")
+        rows += _move_month(month)
+    
+    archived = []
+    if archive_months is not None:
+        archive_before = _month_before(archive_months - 1)
+        for partition in list_partitions():
+            if not partition['archived'] and partition['month'] < archive_before:
+                _archive_partition(partition)
+                archived.append(partition['month'])
+    return {'months_moved': months, 'rows_moved': rows, 'months_archived': archived}
+
+def _drop_partitions(partitions):
+    """Delete partitions: catalog entries and per-day totals, then their files."""
+    if not partitions:
+        return
+    with get_db() as conn:
+        for partition in partitions:
+            start, end = _month_bounds(partition['month'])
+            conn.execute('DELETE FROM prediction_partitions WHERE month = ?', (partition['month'],))
+            conn.execute('DELETE FROM prediction_partition_rollup WHERE day >= ? AND day < ?', (start, end))
+        conn.commit()
+    for partition in partitions:
+        (partition_dir() / partition['file']).unlink(missing_ok=True)
+
+@timed(DB_OPERATION_SECONDS, operation='drop_partitions_before')
+def drop_partitions_before(days):
+    """
+    Delete partitions whose whole month is older than ``days``.
+    
+    Returns:
+        Number of predictions dropped
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    with get_db() as conn:
+        expired = [partition for partition in _partitions(conn) if _month_bounds(partition['month'])[1] <= cutoff]
+    _drop_partitions(expired)
+    return sum(partition['rows'] for partition in expired)
+
+@timed(DB_OPERATION_SECONDS, operation='run_maintenance')
+def run_maintenance():
+    """
+    Refresh query planner statistics and compact the database file.
+
+    Returns:
+        Dictionary with file size in bytes before and after
+    """
+    size_before = DB_PATH.stat().st_size
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+    try:
+        conn.execute('ANALYZE')
+        # VACUUM cannot run inside a transaction
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    return {'size_before': size_before, 'size_after': DB_PATH.stat().st_size}
+
+@timed(DB_OPERATION_SECONDS, operation='migrate_storage')
+def migrate_storage(layout, page_size=DB_PAGE_SIZE):
+    """
+    Rewrite the predictions into another storage layout.
+    
+    Ids are kept and the AUTOINCREMENT counter carries over. The rewrite
+    is one transaction; the file is then VACUUMed (with ``page_size`` for
+    the compact layout) to return the freed pages. Stop the app first.
+    
+    Args:
+        layout: 'standard' or 'compact'
+        page_size: Page size in bytes for the compact layout
+        
+    Returns:
+        Dictionary with the layout, rows rewritten, file size in bytes before and after and seconds
+    """
+    if layout not in STORAGE_LAYOUTS:
+        raise ValueError(f"Unknown storage layout '{layout}' (expected one of {', '.join(STORAGE_LAYOUTS)})")
+    start = time.perf_counter()
+    size_before = DB_PATH.stat().st_size
+    conn = sqlite3.connect(str(DB_PATH), isolation_level=None)
+    try:
+        if storage_layout(conn) == layout:
+            return {'layout': layout, 'rows': 0, 'size_before': size_before,
+                    'size_after': size_before, 'seconds': 0.0}
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if layout == 'compact':
+                conn.execute('ALTER TABLE predictions RENAME TO predictions_old')
+                conn.execute('DROP INDEX IF EXISTS idx_predictions_timestamp')
+                _create_compact_schema(conn)
+                rows = conn.execute(f'''
+                    INSERT INTO prediction_rows (id, {_COMPACT_COLUMNS})
+                    SELECT id, {_encode_sql()} FROM predictions_old
+                ''').rowcount
+                old, new = 'predictions_old', 'prediction_rows'
+            else:
+                conn.execute('DROP VIEW predictions')  # drops its triggers too
+                conn.execute(_STANDARD_TABLE_SQL)
+                rows = conn.execute(f'''
+                    INSERT INTO predictions ({_STANDARD_COLUMNS})
+                    SELECT {_DECODE_SQL} FROM prediction_rows
+                ''').rowcount
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp)')
+                old, new = 'prediction_rows', 'predictions'
+            # Hand the old table's AUTOINCREMENT counter over, so deleted ids are not reused
+            conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (new,))
+            conn.execute('UPDATE sqlite_sequence SET name = ? WHERE name = ?', (new, old))
+            conn.execute(f'DROP TABLE {old}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if layout == 'compact':
+            conn.execute(f'PRAGMA page_size = {int(page_size)}')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    return {'layout': layout, 'rows': rows, 'size_before': size_before,
+            'size_after': DB_PATH.stat().st_size, 'seconds': round(time.perf_counter() - start, 3)}
+
 # Initialize on import
 init_database()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FailGuard predictions database")
+    parser.add_argument('--migrate', choices=STORAGE_LAYOUTS, required=True,
+                        help="Rewrite the predictions into this storage layout")
+    args = parser.parse_args()
+    
+    summary = migrate_storage(args.migrate)
+    print(f"✓ {summary['rows']} predictions in the {summary['layout']} layout: "
+          f"{summary['size_before'] / 1e6:.1f} MB -> {summary['size_after'] / 1e6:.1f} MB "
+          f"in {summary['seconds']}s")
@@ -0,0 +1,30 @@
+"""Test helper: run against a throwaway prediction database."""
+
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+import database.db as db
+
+@contextmanager
+def temporary_database(layout=None, name='predictions.db'):
+    """
+    Point database.db at a fresh SQLite file for the duration of a ``with`` block.
+
+    The ``with`` target is the temporary directory holding the file (and
+    any partition files); it is removed on exit.
+
+    Args:
+        layout: Storage layout of the new database (default: DB_STORAGE)
+        name: File name of the database
+    """
+    original = db.DB_PATH, db.DB_STORAGE
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / name
+        if layout is not None:
+            db.DB_STORAGE = layout
+        try:
+            db.init_database()
+            yield Path(tmp)
+        finally:
+            db.DB_PATH, db.DB_STORAGE = original
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+FailGuard AI - HTTP Load Test
+
+Drives the Flask app with a weighted mix of routes at increasing
+concurrency levels and reports RPS, latency percentiles, error rate and
+the saturation point of each route. Prediction inputs are sampled from
+the synthetic dataset distributions in create_dataset.py.
+
+By default a local server is started in a subprocess on a temporary
+database, so load-test predictions are not saved into
+database/predictions.db. With --per-route every route is additionally
+ramped on its own, which isolates each route's saturation point from the
+rest of the mix.
+
+Usage:
+    python loadtest.py
+    python loadtest.py --concurrency 1 4 16 64 --duration 20
+    python loadtest.py --mix predict=70,predictions=10,dashboard=10,chart-data=10
+    python loadtest.py --per-route --duration 5
+    python loadtest.py --url http://staging:5000 --output loadtest.json
+"""
+
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from create_dataset import sample_module_metrics
+
+# name -> (method, path)
+ROUTES = {
+    'predict': ('POST', '/api/predict'),
+    'predictions': ('GET', '/api/predictions'),
+    'dashboard': ('GET', '/dashboard'),
+    'chart-data': ('GET', '/api/chart-data'),
+}
+DEFAULT_MIX = 'predict=60,predictions=20,dashboard=10,chart-data=10'
+DEFAULT_CONCURRENCY = (1, 2, 4, 8, 16)
+# Extra concurrency must add at least this fraction of throughput to count as scaling
+SATURATION_GAIN = 0.10
+SEED = 42
+
+def parse_mix(spec):
+    """
+    Parse a route mix like ``predict=60,dashboard=40``.
+
+    Returns:
+        Dict of route name to normalized weight
+
+    Raises:
+        ValueError: On unknown routes or non-positive total weight
+    """
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}' (choose from {', '.join(ROUTES)})")
+        mix[name] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Route mix weights must sum to a positive number")
+    return {name: weight / total for name, weight in mix.items() if weight > 0}
+
+def sample_payloads(n, seed=SEED):
+    """JSON bodies for /api/predict sampled from the dataset distributions."""
+    df = sample_module_metrics(n, np.random.default_rng(seed))
+    return [json.dumps(record).encode() for record in df.to_dict('records')]
+
+def find_saturation(levels, rps, min_gain=SATURATION_GAIN):
+    """
+    Concurrency level beyond which throughput stops scaling.
+
+    Args:
+        levels: Increasing concurrency levels
+        rps: Throughput measured at each level
+        min_gain: Minimum relative RPS increase that counts as scaling
+
+    Returns:
+        Saturation concurrency, or None if throughput kept scaling
+    """
+    for i in range(1, len(levels)):
+        if rps[i - 1] > 0 and rps[i] < rps[i - 1] * (1 + min_gain):
+            return levels[i - 1]
+    return None
+
+def _request(base_url, route, payload, timeout):
+    """Issue one request; returns (latency seconds, error or None)."""
+    method, path = ROUTES[route]
+    req = urllib.request.Request(base_url + path, data=payload if method == 'POST' else None, method=method)
+    if method == 'POST':
+        req.add_header('Content-Type', 'application/json')
+    start = time.perf_counter()
+    error = None
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        error = f'HTTP {e.code}'
+    except (urllib.error.URLError, OSError) as e:
+        error = type(getattr(e, 'reason', e)).__name__
+    return time.perf_counter() - start, error
+
+def _worker(base_url, mix, payloads, deadline, timeout, seed):
+    """Closed-loop client: send requests back to back until the deadline."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    records = []
+    while time.perf_counter() < deadline:
+        route = rng.choices(names, weights)[0]
+        payload = payloads[rng.randrange(len(payloads))] if route == 'predict' else None
+        latency, error = _request(base_url, route, payload, timeout)
+        records.append((route, latency, error))
+    return records
+
+def summarize(records, elapsed):
+    """Per-route and overall RPS, latency percentiles (ms) and error rate."""
+    by_route = {}
+    for route, latency, error in records:
+        by_route.setdefault(route, []).append((latency, error))
+    by_route['all'] = [(latency, error) for _, latency, error in records]
+
+    summary = {}
+    for route, samples in by_route.items():
+        latencies = np.array([latency for latency, _ in samples]) * 1000
+        errors = [error for _, error in samples if error]
+        summary[route] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3) if len(samples) else None,
+            'p90_ms': round(float(np.percentile(latencies, 90)), 3) if len(samples) else None,
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3) if len(samples) else None,
+            'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+            'errors': {e: errors.count(e) for e in set(errors)},
+        }
+    return summary
+
+def run_level(base_url, mix, payloads, concurrency, duration, timeout=30, seed=SEED):
+    """
+    Run one load level.
+
+    Args:
+        base_url: Server URL without trailing slash
+        mix: Dict from parse_mix
+        payloads: Request bodies for /api/predict
+        concurrency: Number of concurrent clients
+        duration: Seconds to run
+
+    Returns:
+        Summary dict from summarize()
+    """
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_worker, base_url, mix, payloads, deadline, timeout, seed + i)
+                   for i in range(concurrency)]
+        records = [record for future in futures for record in future.result()]
+    return summarize(records, time.perf_counter() - start)
+
+def run_ramp(base_url, mix, payloads, levels, duration, min_gain=SATURATION_GAIN):
+    """Run every concurrency level and compute the saturation point per route."""
+    results = []
+    for level in levels:
+        print(f"Concurrency {level:>4}: ", end='', flush=True)
+        summary = run_level(base_url, mix, payloads, level, duration)
+        overall = summary['all']
+        print(f"{overall['rps']:>8.1f} rps  p50 {overall['p50_ms']:.1f} ms  p99 {overall['p99_ms']:.1f} ms  "
+              f"errors {overall['error_rate']:.1%}")
+        results.append({'concurrency': level, 'routes': summary})
+
+    saturation = {}
+    for route in list(mix) + ['all']:
+        rps = [r['routes'].get(route, {}).get('rps', 0) for r in results]
+        saturation[route] = find_saturation(levels, rps, min_gain)
+    return results, saturation
+
+def print_report(results, saturation):
+    """Per-route table for every level."""
+    print("\n" + "=" * 86)
+    print(f"{'Route':<14}{'Conc':>6}{'Requests':>10}{'RPS':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'Errors':>10}")
+    print("=" * 86)
+    routes = sorted({route for r in results for route in r['routes']}, key=lambda r: (r == 'all', r))
+    for route in routes:
+        for r in results:
+            s = r['routes'].get(route)
+            if s is None:
+                continue
+            print(f"{route:<14}{r['concurrency']:>6}{s['requests']:>10}{s['rps']:>10.1f}{s['p50_ms']:>10.1f}"
+                  f"{s['p90_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['error_rate']:>10.1%}")
+        point = saturation.get(route)
+        print(f"{'':<14}saturation: {point if point is not None else 'not reached'}")
+    print("=" * 86)
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def serve(port, db_path):
+    """Run the app on a threaded WSGI server using a separate database file."""
+    import database.db as db
+
+    db.DB_PATH = Path(db_path)
+    db.init_database()
+
+    from werkzeug.serving import make_server
+    from app import app
+
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def start_local_server(port, db_path, timeout=120):
+    """Start ``loadtest.py --serve`` in a subprocess and wait for /api/health."""
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), '--serve', '--port', str(port), '--db', str(db_path)],
+        cwd=Path(__file__).parent, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Local server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(url + '/api/health', timeout=2):
+                return process, url
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Local server did not become healthy in time")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='FailGuard AI HTTP load test')
+    parser.add_argument('--url', help='Target an already running server instead of starting one')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Route weights (default {DEFAULT_MIX})')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Seconds of unrecorded warmup')
+    parser.add_argument('--payloads', type=int, default=1000, help='Distinct /api/predict inputs')
+    parser.add_argument('--per-route', action='store_true', help='Also ramp each route in isolation')
+    parser.add_argument('--saturation-gain', type=float, default=SATURATION_GAIN)
+    parser.add_argument('--output', type=Path, help='Write results to this JSON file')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve(args.port, args.db)
+        return 0
+
+    mix = parse_mix(args.mix)
+    payloads = sample_payloads(args.payloads)
+    levels = sorted(set(args.concurrency))
+
+    process = None
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            print("Starting local server...")
+            process, base_url = start_local_server(_free_port(), Path(tmp.name) / 'loadtest.db')
+
+        print("FailGuard AI - Load Test")
+        print("=" * 60)
+        print(f"Target: {base_url}")
+        print(f"Mix: {', '.join(f'{k}={v:.0%}' for k, v in mix.items())}")
+        if args.warmup > 0:
+            run_level(base_url, mix, payloads, levels[0], args.warmup)
+
+        results, saturation = run_ramp(base_url, mix, payloads, levels, args.duration, args.saturation_gain)
+        print_report(results, saturation)
+        report = {'target': base_url, 'mix': mix, 'duration': args.duration,
+                  'levels': results, 'saturation': saturation}
+
+        if args.per_route:
+            report['isolated'] = {}
+            for route in mix:
+                print(f"\nIsolated ramp: {route}")
+                route_results, route_saturation = run_ramp(
+                    base_url, {route: 1.0}, payloads, levels, args.duration, args.saturation_gain)
+                print(f"  saturation: {route_saturation[route] or 'not reached'}")
+                report['isolated'][route] = {'levels': route_results, 'saturation': route_saturation[route]}
+
+        if args.output:
+            args.output.write_text(json.dumps(report, indent=2))
+            print(f"Results saved to {args.output}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        tmp.cleanup()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import sys
+from pathlib import Path
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import FEATURE_NAMES, EXPLANATION_BLOCK_BYTES
+from models.tree_engine import _sklearn_trees, _xgboost_trees
+
+def _leaf_boxes(tree, n_features):
+    """
+    Walk one tree and describe every leaf by its feature box.
+
+    Splits on the same feature along a path are merged, so each leaf
+    is described by at most one (lower, upper, zero fraction) triple per
+    feature, which is all path-dependent TreeSHAP needs.
+
+    Returns:
+        (value, lower, upper, zero_fraction, on_path, leaf cover fraction)
+    """
+    left, right, feature, threshold = tree['left'], tree['right'], tree['feature'], tree['threshold']
+    cover = tree['cover']
+    leaves = []
+    stack = [(0, np.full(n_features, -np.inf), np.full(n_features, np.inf), np.ones(n_features),
+              np.zeros(n_features, dtype=bool))]
+    while stack:
+        node, lower, upper, zero, on_path = stack.pop()
+        if left[node] == -1:
+            leaves.append((tree['value'][node], lower, upper, zero, on_path, cover[node] / cover[0]))
+            continue
+        f, t = feature[node], threshold[node]
+        for child, is_left in ((left[node], True), (right[node], False)):
+            child_lower, child_upper = lower.copy(), upper.copy()
+            if is_left:
+                child_upper[f] = min(upper[f], t)
+            else:
+                child_lower[f] = max(lower[f], t)
+            child_zero = zero.copy()
+            child_zero[f] *= cover[child] / cover[node] if cover[node] > 0 else 0.0
+            child_path = on_path.copy()
+            child_path[f] = True
+            stack.append((child, child_lower, child_upper, child_zero, child_path))
+    return leaves
+
+class TreeExplainer:
+    """
+    Exact path-dependent TreeSHAP for tree ensembles, vectorized over leaves.
+
+    With a handful of features every leaf is a box in feature space. For
+    a leaf with value v, path features P, zero fractions z_k (share of
+    training cover following the path) and one fractions o_k(x) (1 if x
+    lies in the leaf's interval for feature k), the contribution of
+    feature i is
+
+        v * (o_i - z_i) * sum_{S in P - {i}} |S|! (|P| - |S| - 1)! / |P|! * prod_{k in S} o_k * prod_{k in P - S - {i}} z_k
+
+    The Shapley weights are Beta integrals, so the sum equals
+
+        integral_0^1 prod_{k in P, k != i} ((1 - t) z_k + t o_k) dt
+
+    a polynomial of degree < F in t, which Gauss-Legendre quadrature with
+    ceil(F / 2) nodes integrates exactly. Explaining a sample is then a
+    handful of array operations over all leaves of the ensemble at once,
+    with no per-node Python recursion.
+    """
+
+    def __init__(self, value, lower, upper, zero, on_path, expected_value, strict, output):
+        """
+        Args:
+            value: (L,) leaf values in output space (already divided by the
+                number of trees for averaged ensembles)
+            lower, upper: (L, F) leaf boxes
+            zero: (L, F) zero fractions (1 for features not on the path)
+            on_path: (L, F) bool
+            expected_value: Model output for the training distribution
+            strict: True if left branches test ``x < t`` (XGBoost), False
+                for ``x <= t`` (sklearn)
+            output: 'probability' or 'log_odds'
+        """
+        self.value = value
+        self.lower = lower
+        self.upper = upper
+        self.zero = zero
+        self.on_path = on_path
+        self.expected_value = float(expected_value)
+        self.strict = strict
+        self.output = output
+        nodes, weights = np.polynomial.legendre.leggauss((on_path.shape[1] + 1) // 2)
+        # Map quadrature from [-1, 1] to [0, 1]
+        self._t = (nodes + 1) / 2
+        self._w = weights / 2
+        # Path factors (1 - t) z_k + t o_k for o_k = 0 and o_k = 1, laid out
+        # (F, Q, L) so products over features run over contiguous leaf rows.
+        # Off-path features give 1. z is floored so factors can be divided
+        # out; a zero-cover branch only multiplies (o_i - z_i) = 0 or others.
+        t = self._t[None, :, None]
+        z = np.maximum(zero, 1e-12).T[:, None, :]
+        path = on_path.T[:, None, :]
+        self._factor_cold = np.where(path, (1 - t) * z, 1.0)
+        self._factor_hot = np.where(path, (1 - t) * z + t, 1.0)
+        self._zero_on_path = np.where(on_path, zero, 0.0).T
+        self._lower, self._upper, self._on_path_t = lower.T, upper.T, on_path.T
+
+    @classmethod
+    def from_model(cls, model, n_features=None):
+        """
+        Build an explainer from a fitted RandomForestClassifier or XGBClassifier.
+
+        Args:
+            model: Fitted tree ensemble
+            n_features: Number of model inputs (default: len(FEATURE_NAMES))
+
+        Raises:
+            ValueError: For unsupported models
+        """
+        n_features = n_features or len(FEATURE_NAMES)
+        model_type = type(model).__name__
+        if model_type == 'RandomForestClassifier':
+            trees = _sklearn_trees(model)
+            scale, base, strict, output = 1.0 / len(trees), 0.0, False, 'probability'
+        elif model_type in ('XGBClassifier', 'Booster'):
+            trees, base = _xgboost_trees(model)
+            scale, strict, output = 1.0, True, 'log_odds'
+        else:
+            raise ValueError(f"Cannot build a tree explainer for {model_type}")
+
+        leaves = [leaf for tree in trees for leaf in _leaf_boxes(tree, n_features)]
+        value = np.array([leaf[0] for leaf in leaves], dtype=np.float64) * scale
+        fraction = np.array([leaf[5] for leaf in leaves])
+        return cls(
+            value=value,
+            lower=np.array([leaf[1] for leaf in leaves]),
+            upper=np.array([leaf[2] for leaf in leaves]),
+            zero=np.array([leaf[3] for leaf in leaves]),
+            on_path=np.array([leaf[4] for leaf in leaves]),
+            expected_value=base + float(value @ fraction),
+            strict=strict,
+            output=output,
+        )
+
+    def _one_fractions(self, X):
+        """(B, F, L) bool: whether each sample lies inside each leaf interval of each feature."""
+        # Both sklearn and XGBoost compare float32 inputs against the thresholds
+        x = X.astype(np.float32).astype(np.float64)[:, :, None]
+        if self.strict:
+            inside = (x >= self._lower) & (x < self._upper)
+        else:
+            inside = (x > self._lower) & (x <= self._upper)
+        return inside & self._on_path_t
+
+    def _contributions(self, X):
+        """Contributions of a block of samples, (B, F)."""
+        one = self._one_fractions(X)
+        factors = np.where(one[:, :, None, :], self._factor_hot, self._factor_cold)
+        # Product over the other path features at each node, integrated over t
+        others = factors.prod(axis=1, keepdims=True) / factors
+        integral = np.einsum('bfql,q->bfl', others, self._w)
+        # (o_i - z_i) is 0 off the path
+        return ((one - self._zero_on_path) * integral) @ self.value
+
+    def shap_values(self, X, max_bytes=EXPLANATION_BLOCK_BYTES):
+        """
+        Feature contributions for a batch.
+
+        Rows are explained in blocks: each row needs two (F, Q, L) float64
+        arrays (path factors and their leave-one-out products), so a block
+        holds as many rows as fit in ``max_bytes``, and at least one. The
+        work is already vectorized over leaves, so blocks mainly help small
+        ensembles; a large ensemble runs one row at a time, and its peak
+        memory is then those two arrays.
+
+        Args:
+            X: (n, F) model inputs (standardized features)
+            max_bytes: Working memory per block
+
+        Returns:
+            (n, F) contributions; each row sums with ``expected_value`` to
+            the model output (probability or log-odds)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        block = max(1, int(max_bytes // (2 * self._factor_hot.nbytes)))
+        phi = np.empty((len(X), self._factor_hot.shape[0]))
+        for start in range(0, len(X), block):
+            phi[start:start + block] = self._contributions(X[start:start + block])
+        return phi
+
+class LinearExplainer:
+    """
+    Exact contributions of a linear model: coefficient x standardized value.
+
+    Standardized features have zero training mean, so the intercept is the
+    expected log-odds and contributions sum with it to the model's logit.
+    """
+
+    output = 'log_odds'
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.expected_value = float(intercept)
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model.coef_[0], model.intercept_[0])
+
+    def shap_values(self, X):
+        return np.atleast_2d(np.asarray(X, dtype=np.float64)) * self.coef
+
+def build_explainer(model, n_features=None):
+    """
+    Explainer for a fitted FailGuard model.
+
+    Args:
+        model: Fitted estimator
+        n_features: Number of model inputs (default: len(FEATURE_NAMES))
+
+    Raises:
+        ValueError: If the model type cannot be explained
+    """
+    if hasattr(model, 'coef_') and getattr(model, 'coef_').shape[0] == 1:
+        return LinearExplainer.from_model(model)
+    return TreeExplainer.from_model(model, n_features)
+
+def format_explanation(explainer, contributions):
+    """JSON-ready explanation of one prediction."""
+    by_feature = {name: round(float(value), 6) for name, value in zip(FEATURE_NAMES, contributions)}
+    return {
+        'output': explainer.output,
+        'base_value': round(explainer.expected_value, 6),
+        'contributions': by_feature,
+        'top_features': [
+            {'feature': name, 'contribution': value}
+            for name, value in sorted(by_feature.items(), key=lambda item: abs(item[1]), reverse=True)
+        ],
+    }
@@ -1,4 +1,7 @@
 import sys
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 import joblib
 import numpy as np
@@ -7,29 +10,283 @@ import pandas as pd
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config import MODEL_PATH, SCALER_PATH, FEATURE_NAMES
+from config import (MODEL_PATH, SCALER_PATH, COMPILED_MODEL_PATH, LINEAR_MODEL_PATH, FEATURE_NAMES,
+                    FEATURE_PIPELINE_PATH, PREDICTOR_BACKEND, PREDICTOR_PRECISION, EXPLANATION_CACHE_SIZE)
 from src.utils import format_prediction_result
+from src.feature_engineering import load_feature_pipeline
+from src.instrumentation import histogram, record_cache
+from models.tree_engine import load_compiled_model
+from models.explain import build_explainer, format_explanation
+
+PREDICTOR_STAGE_SECONDS = histogram(
+    'failguard_predictor_stage_seconds', 'Time spent in each predictor stage', ('stage',))
+_STAGE_EXTRACT = PREDICTOR_STAGE_SECONDS.labels(stage='feature_extraction')
+_STAGE_SCALE = PREDICTOR_STAGE_SECONDS.labels(stage='scaling')
+_STAGE_ENGINEER = PREDICTOR_STAGE_SECONDS.labels(stage='feature_engineering')
+_STAGE_MODEL = PREDICTOR_STAGE_SECONDS.labels(stage='model')
+_STAGE_FORMAT = PREDICTOR_STAGE_SECONDS.labels(stage='formatting')
+_STAGE_EXPLAIN = PREDICTOR_STAGE_SECONDS.labels(stage='explanation')
+
+class FusedLinearModel:
+    """
+    Logistic regression with the StandardScaler folded into its coefficients.
+    
+    Scoring raw features is a single matrix-vector product:
+    ``sigmoid(X @ weights + bias)``.
+    """
+    
+    def __init__(self, weights, bias):
+        """
+        Args:
+            weights: 1D array of per-feature weights on raw features
+            bias: Intercept on raw features
+        """
+        self.weights = weights
+        self.bias = float(bias)
+    
+    def standardize(self, X):
+        """Scaling is already folded into the weights."""
+        return X
+    
+    def predict_proba(self, X):
+        """
+        Class-1 probability for each row of a raw feature matrix.
+        
+        Args:
+            X: 2D array of raw features in FEATURE_NAMES order
+            
+        Returns:
+            1D array of probabilities
+        """
+        X = np.asarray(X, dtype=self.weights.dtype)
+        margin = X @ self.weights + self.weights.dtype.type(self.bias)
+        return 1.0 / (1.0 + np.exp(-margin.astype(np.float64)))
+    
+    @property
+    def precision(self):
+        return str(self.weights.dtype)
+    
+    @property
+    def nbytes(self):
+        return self.weights.nbytes
+    
+    def astype_float32(self):
+        """Quantized copy with float32 weights."""
+        return FusedLinearModel(self.weights.astype(np.float32), self.bias)
+    
+    def save(self, filepath=LINEAR_MODEL_PATH):
+        """Save weights and bias to an ``.npz`` file."""
+        np.savez(filepath, weights=self.weights, bias=np.array(self.bias))
+    
+    @classmethod
+    def load(cls, filepath=LINEAR_MODEL_PATH):
+        """Load a fused model saved with ``save``."""
+        with np.load(filepath, allow_pickle=False) as data:
+            return cls(data['weights'], data['bias'])
+
+def load_linear_model(filepath=LINEAR_MODEL_PATH):
+    """Load a scaler-fused linear model artifact."""
+    return FusedLinearModel.load(filepath)
+
+# Array-based backends: name -> (loader, default artifact path)
+ENGINE_BACKENDS = {
+    'compiled': (load_compiled_model, COMPILED_MODEL_PATH),
+    'linear': (load_linear_model, LINEAR_MODEL_PATH),
+}
+
+def artifact_version(paths):
+    """Short SHA-256 over the contents of model artifacts."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+def float32_artifact_path(filepath):
+    """Path of the quantized counterpart of an artifact (``name_f32.npz``)."""
+    filepath = Path(filepath)
+    return filepath.with_name(f"{filepath.stem}_f32{filepath.suffix}")
 
 class FailGuardPredictor:
     """Main prediction class for FailGuard AI system."""
     
-    def __init__(self, model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    def __init__(self, model_path=MODEL_PATH, scaler_path=SCALER_PATH,
+                 backend=PREDICTOR_BACKEND, engine_path=None, precision=PREDICTOR_PRECISION,
+                 pipeline_path=FEATURE_PIPELINE_PATH):
         """
         Initialize predictor by loading model and scaler.
         
         Args:
             model_path: Path to saved model
             scaler_path: Path to saved scaler
+            backend: 'sklearn' to score with the joblib model, 'compiled'
+                to score with the numpy tree engine (see models/tree_engine.py)
+                or 'linear' to score with the scaler-fused linear model
+            engine_path: Artifact path for the 'compiled'/'linear' backends
+                (defaults to COMPILED_MODEL_PATH / LINEAR_MODEL_PATH)
+            precision: 'float32' to load the quantized ``*_f32.npz`` artifact
+                of the 'compiled'/'linear' backends
+            pipeline_path: Fitted FeatureEngineeringPipeline saved with the
+                model (src/feature_engineering.py); applied between the
+                scaler and the model when the file exists. Models trained
+                with one are only served by the 'sklearn' backend.
         """
+        self.model_path = model_path
+        self.backend = backend
+        self.engine = None
+        self._model = None
+        self.artifact_paths = []
+        self._model_version = None
+        self._explainer = None
+        self._explanations = OrderedDict()
+        self._explanations_lock = threading.Lock()
+        self.pipeline = None
         try:
-            self.model = joblib.load(model_path)
             self.scaler = joblib.load(scaler_path)
-            print(f"Model loaded from {model_path}")
+            self.pipeline = load_feature_pipeline(pipeline_path)
+            if self.pipeline is not None and backend in ENGINE_BACKENDS:
+                print(f"Warning: {backend.capitalize()} backend cannot apply the feature pipeline")
+                print("Using sklearn backend")
+                self.backend = backend = 'sklearn'
+            if backend in ENGINE_BACKENDS:
+                loader, default_path = ENGINE_BACKENDS[backend]
+                engine_path = engine_path or default_path
+                if precision == 'float32':
+                    candidates = [float32_artifact_path(engine_path), engine_path]
+                else:
+                    candidates = [engine_path]
+                for candidate in candidates:
+                    try:
+                        self.engine = loader(candidate)
+                        self.artifact_paths = [Path(candidate), Path(scaler_path)]
+                        print(f"{backend.capitalize()} model ({self.engine.precision}) loaded from {candidate}")
+                        break
+                    except FileNotFoundError:
+                        print(f"Warning: {backend.capitalize()} model not found at {candidate}")
+                if self.engine is None:
+                    print("Using sklearn backend")
+                    self.backend = 'sklearn'
+            if self.engine is None:
+                self._model = joblib.load(model_path)
+                self.artifact_paths = [Path(model_path), Path(scaler_path)]
+                print(f"Model loaded from {model_path}")
             print(f"Scaler loaded from {scaler_path}")
+            if self.pipeline is not None:
+                if getattr(self._model, 'n_features_in_', self.pipeline.n_features_out_) != self.pipeline.n_features_out_:
+                    # Left over from an earlier training run (e.g. retrain_model.py saves no pipeline)
+                    print(f"Warning: Ignoring feature pipeline at {pipeline_path}: "
+                          f"model expects {self._model.n_features_in_} features")
+                    self.pipeline = None
+                else:
+                    self.artifact_paths.append(Path(pipeline_path))
+                    print(f"Feature pipeline ({self.pipeline.n_features_out_} features) loaded from {pipeline_path}")
         except FileNotFoundError:
             print("Warning: Model or scaler not found. Train the model first using train_model.py")
-            self.model = None
+            self._model = None
             self.scaler = None
+            self.pipeline = None
+    
+    @property
+    def model(self):
+        """Fitted estimator (loaded on first access when serving from an array backend)."""
+        if self._model is None and self.engine is not None:
+            self._model = joblib.load(self.model_path)
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
+    
+    @property
+    def model_version(self):
+        """Content hash of the loaded scoring artifacts (changes whenever the model is retrained)."""
+        if self._model_version is None and self.artifact_paths:
+            self._model_version = artifact_version(self.artifact_paths)
+        return self._model_version
+    
+    @property
+    def explainer(self):
+        """Per-prediction explainer for the fitted model (built on first use, None if unsupported)."""
+        if self._explainer is None and self.model is not None:
+            try:
+                n_features = self.pipeline.n_features_out_ if self.pipeline is not None else len(FEATURE_NAMES)
+                self._explainer = build_explainer(self.model, n_features)
+            except ValueError as e:
+                print(f"Warning: {e}")
+                self._explainer = False
+        return self._explainer or None
+    
+    @property
+    def is_ready(self):
+        """Whether a scaler and a scoring backend are loaded."""
+        return self.scaler is not None and (self.engine is not None or self._model is not None)
+    
+    def model_inputs(self, features_scaled):
+        """
+        Model input matrix for standardized features (applies the feature pipeline, if any).
+        
+        Args:
+            features_scaled: 2D array of standardized features in FEATURE_NAMES order
+            
+        Returns:
+            2D array as expected by the fitted estimator
+        """
+        if self.pipeline is None:
+            return features_scaled
+        with _STAGE_ENGINEER.time():
+            return self.pipeline.transform(features_scaled)
+    
+    def _extract_features(self, features_dict):
+        """Extract feature values in FEATURE_NAMES order."""
+        return [float(features_dict.get(feature_name, 0)) for feature_name in FEATURE_NAMES]
+    
+    def _score(self, features):
+        """
+        Score a raw feature matrix with the selected backend.
+        
+        Args:
+            features: 2D array of raw features in FEATURE_NAMES order
+            
+        Returns:
+            (probabilities, predictions) as 1D arrays
+        """
+        if self.engine is not None:
+            with _STAGE_SCALE.time():
+                features_scaled = self.engine.standardize(features)
+            with _STAGE_MODEL.time():
+                probabilities = self.engine.predict_proba(features_scaled)
+            return probabilities, (probabilities > 0.5).astype(int)
+        
+        with _STAGE_SCALE.time():
+            # Convert to DataFrame with proper feature names to avoid sklearn warning
+            features_df = pd.DataFrame(features, columns=FEATURE_NAMES)
+            features_scaled = self.scaler.transform(features_df)
+        features_scaled = self.model_inputs(features_scaled)
+        with _STAGE_MODEL.time():
+            predictions = self.model.predict(features_scaled)
+            probabilities = self.model.predict_proba(features_scaled)[:, 1]
+        return probabilities, predictions
+    
+    def predict_proba_matrix(self, features):
+        """
+        Defect probabilities for a raw feature matrix.
+        
+        Args:
+            features: 2D array-like of raw features in FEATURE_NAMES order
+            
+        Returns:
+            1D array of probabilities
+        """
+        probabilities, _ = self._score(np.asarray(features, dtype=np.float64))
+        return probabilities
+    
+    def _format(self, features_dict, probability, prediction):
+        """Build the result dictionary for one module."""
+        # Convert to Python native types
+        result = format_prediction_result(float(probability), int(prediction))
+        result['success'] = True
+        # Convert input features to native Python types
+        result['input_features'] = {k: float(v) for k, v in features_dict.items()}
+        return result
     
     def predict(self, features_dict):
         """
@@ -49,60 +306,105 @@ class FailGuardPredictor:
         Returns:
             Dictionary with prediction results
         """
-        if self.model is None or self.scaler is None:
+        if not self.is_ready:
             return {
                 'error': 'Model not initialized. Please train the model first.',
                 'success': False
             }
         
-        # Extract features in order
-        features = []
-        for feature_name in FEATURE_NAMES:
-            value = features_dict.get(feature_name, 0)
-            features.append(float(value))
+        with _STAGE_EXTRACT.time():
+            features = np.array([self._extract_features(features_dict)])
+        probabilities, predictions = self._score(features)
+        with _STAGE_FORMAT.time():
+            return self._format(features_dict, probabilities[0], predictions[0])
+    
+    def predict_batch(self, features_list):
+        """
+        Make batch predictions.
         
-        # Convert to DataFrame with proper feature names to avoid sklearn warning
-        features_df = pd.DataFrame([features], columns=FEATURE_NAMES)
+        All modules are scored with a single call to the backend.
         
-        # Normalize
-        features_scaled = self.scaler.transform(features_df)
+        Args:
+            features_list: List of feature dictionaries
+            
+        Returns:
+            List of prediction results
+        """
+        if not self.is_ready:
+            return [self.predict(features_dict) for features_dict in features_list]
+        if not features_list:
+            return []
         
-        # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        probability = self.model.predict_proba(features_scaled)[0][1]
+        with _STAGE_EXTRACT.time():
+            features = np.array([self._extract_features(f) for f in features_list])
+        probabilities, predictions = self._score(features)
+        with _STAGE_FORMAT.time():
+            return [
+                self._format(features_dict, probability, prediction)
+                for features_dict, probability, prediction in zip(features_list, probabilities, predictions)
+            ]
+
+    def explain_batch(self, features_list):
+        """
+        Per-feature contributions for a batch of modules.
         
-        # Convert to Python native types
-        prediction = int(prediction)
-        probability = float(probability)
+        Contributions are computed from the fitted estimator on standardized
+        features (exact TreeSHAP for tree ensembles, coefficient x value for
+        linear models) and sum with ``base_value`` to the model output.
         
-        # Format result
-        result = format_prediction_result(probability, prediction)
-        result['success'] = True
-        # Convert input features to native Python types
-        result['input_features'] = {k: float(v) for k, v in features_dict.items()}
+        Args:
+            features_list: List of feature dictionaries
+            
+        Returns:
+            List of explanation dictionaries (see models.explain.format_explanation),
+            or None if the model cannot be explained
+        """
+        if not self.is_ready or self.explainer is None:
+            return None
+        if not features_list:
+            return []
         
-        return result
+        features = np.array([self._extract_features(f) for f in features_list])
+        with _STAGE_EXPLAIN.time():
+            features_scaled = self.scaler.transform(pd.DataFrame(features, columns=FEATURE_NAMES))
+            contributions = self.explainer.shap_values(self.model_inputs(features_scaled))
+            if self.pipeline is not None:
+                # Derived columns are credited to the input features they are built from
+                contributions = self.pipeline.attribute(contributions)
+        return [format_explanation(self.explainer, row) for row in contributions]
     
-    def predict_batch(self, features_list):
+    def explain(self, features_dict):
         """
-        Make batch predictions.
+        Explanation of one module, served from an LRU cache for repeated inputs.
         
         Args:
-            features_list: List of feature dictionaries
+            features_dict: Dictionary of feature values
             
         Returns:
-            List of prediction results
+            Explanation dictionary, or None if the model cannot be explained
         """
-        results = []
-        for features_dict in features_list:
-            result = self.predict(features_dict)
-            results.append(result)
+        key = tuple(self._extract_features(features_dict))
+        with self._explanations_lock:
+            explanation = self._explanations.get(key)
+            if explanation is not None:
+                self._explanations.move_to_end(key)
+        record_cache('explanations', explanation is not None)
+        if explanation is not None:
+            return explanation
         
-        return results
+        explanations = self.explain_batch([features_dict])
+        if explanations is None:
+            return None
+        explanation = explanations[0]
+        with self._explanations_lock:
+            self._explanations[key] = explanation
+            if len(self._explanations) > EXPLANATION_CACHE_SIZE:
+                self._explanations.popitem(last=False)
+        return explanation
 
-def load_model():
+def load_model(backend=PREDICTOR_BACKEND):
     """Load model for inference."""
-    return FailGuardPredictor()
+    return FailGuardPredictor(backend=backend)
 
 def make_prediction(features_dict):
     """
@@ -1,4 +1,9 @@
+import os
 import sys
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -9,22 +14,29 @@ import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
 from xgboost import XGBClassifier
 
 from src.data_preprocessing import prepare_data
 from src.evaluation import evaluate_model, print_evaluation_results, get_confusion_matrix, prepare_evaluation_report
-from config import MODEL_PATH, MODELS_DIR
+from models.tree_engine import compile_tree_ensemble, is_tree_ensemble
+from models.predict import FusedLinearModel, ENGINE_BACKENDS, float32_artifact_path
+from src.drift import build_reference, save_reference
+from src.feature_engineering import FeatureEngineeringPipeline, save_feature_pipeline
+from config import (MODEL_PATH, MODELS_DIR, SCALER_PATH, COMPILED_MODEL_PATH, LINEAR_MODEL_PATH,
+                    RISK_THRESHOLDS, QUANTIZATION_TOLERANCE, CV_FOLDS, CV_WORKERS, CV_CACHE_DIR,
+                    FEATURE_ENGINEERING, FEATURE_PIPELINE_PATH)
 
-def train_models(X_train, X_test, y_train, y_test):
+def build_models(y_train):
     """
-    Train multiple ML models with class weight balancing for imbalanced data.
+    Create the candidate models with class weight balancing for imbalanced data.
     
     Args:
-        X_train, X_test: Training and test features
-        y_train, y_test: Training and test labels
+        y_train: Training labels (used for class weights)
         
     Returns:
-        Dictionary of trained models and their metrics
+        Dictionary of model name to unfitted model
     """
     # Calculate class weights to handle imbalance
     # More weight for minority class (defective)
@@ -34,12 +46,27 @@ def train_models(X_train, X_test, y_train, y_test):
     
     print(f"\nClass weights (to balance imbalance): {class_weight_dict}")
     
-    models = {
+    return {
         'Logistic Regression': LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced'),
         'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1, class_weight='balanced'),
         'SVM': SVC(kernel='rbf', probability=True, random_state=42, class_weight='balanced'),
         'XGBoost': XGBClassifier(n_estimators=100, random_state=42, verbosity=0, scale_pos_weight=class_weight_dict[1]/class_weight_dict[0])
     }
+
+def train_models(X_train, X_test, y_train, y_test, progress=None):
+    """
+    Train multiple ML models with class weight balancing for imbalanced data.
+    
+    Args:
+        X_train, X_test: Training and test features
+        y_train, y_test: Training and test labels
+        progress: Optional ``progress(fraction, message)`` callback, called
+            before each model is trained
+        
+    Returns:
+        Dictionary of trained models and their metrics
+    """
+    models = build_models(y_train)
     
     trained_models = {}
     results = {}
@@ -48,8 +75,10 @@ def train_models(X_train, X_test, y_train, y_test):
     print("TRAINING MODELS")
     print("="*60)
     
-    for model_name, model in models.items():
+    for index, (model_name, model) in enumerate(models.items()):
         print(f"\nTraining {model_name}...")
+        if progress is not None:
+            progress(index / len(models), f"Training {model_name}")
         
         # Train
         model.fit(X_train, y_train)
@@ -70,22 +99,246 @@ def train_models(X_train, X_test, y_train, y_test):
     
     return trained_models, results
 
-def select_best_model(trained_models, results):
+def make_folds(y, n_splits=CV_FOLDS, random_state=42):
+    """
+    Assign each sample to a stratified k-fold test fold.
+    
+    Args:
+        y: Labels
+        n_splits: Number of folds
+        random_state: Shuffle seed
+        
+    Returns:
+        int8 array with the test fold of each sample
+    """
+    y = np.asarray(y)
+    fold_ids = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (_, test_index) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold_ids[test_index] = fold
+    return fold_ids
+
+def _fit_fold(model, data_dir, fold, output_path):
+    """
+    Fit ``model`` on every fold but ``fold`` and store its predictions for ``fold``.
+    
+    Runs in a worker process. Features, labels and fold ids are opened as
+    read-only memory maps, so workers share the page cache instead of
+    receiving pickled copies; only the rows of the fold being fitted are
+    materialized. Predictions go into the rows of ``output_path``
+    (labels, positive class probability) belonging to ``fold``, which no
+    other task writes.
+    """
+    data_dir = Path(data_dir)
+    X = np.load(data_dir / 'X.npy', mmap_mode='r')
+    y = np.load(data_dir / 'y.npy', mmap_mode='r')
+    fold_ids = np.load(data_dir / 'folds.npy', mmap_mode='r')
+    test = np.flatnonzero(fold_ids == fold)
+    train = np.flatnonzero(fold_ids != fold)
+    model.fit(X[train], y[train])
+    output = np.load(output_path, mmap_mode='r+')
+    output[0, test] = model.predict(X[test])
+    output[1, test] = model.predict_proba(X[test])[:, 1]
+    output.flush()
+    return fold
+
+def _cache_key(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+    return digest.hexdigest()
+
+class CrossValidationResult:
+    """
+    Out-of-fold predictions of each candidate model.
+    
+    Metrics are computed from the stored predictions, so they can be
+    recomputed (other metrics, another decision threshold) without
+    refitting anything.
+    """
+    
+    def __init__(self, y, fold_ids, predictions, cached=()):
+        """
+        Args:
+            y: Labels
+            fold_ids: Test fold of each sample (see make_folds)
+            predictions: Dictionary of model name -> (2, n) array of
+                out-of-fold labels and positive class probabilities
+            cached: Names of the models whose predictions came from the cache
+        """
+        self.y = np.asarray(y)
+        self.fold_ids = np.asarray(fold_ids)
+        self.predictions = predictions
+        self.cached = set(cached)
+    
+    @property
+    def n_splits(self):
+        return int(self.fold_ids.max()) + 1
+    
+    def fold_metrics(self, model_name, threshold=None):
+        """
+        Metrics of one model on each fold.
+        
+        Args:
+            model_name: Candidate name
+            threshold: Label positives by probability >= threshold instead
+                of using the model's own predictions
+            
+        Returns:
+            List of evaluate_model dictionaries, one per fold
+        """
+        labels, proba = self.predictions[model_name]
+        if threshold is not None:
+            labels = (proba >= threshold).astype(int)
+        metrics = []
+        for fold in range(self.n_splits):
+            mask = self.fold_ids == fold
+            metrics.append(evaluate_model(self.y[mask], labels[mask].astype(int), proba[mask]))
+        return metrics
+    
+    def summary(self, threshold=None):
+        """Mean and standard deviation over folds of each metric, per model."""
+        summary = {}
+        for model_name in self.predictions:
+            folds = self.fold_metrics(model_name, threshold)
+            summary[model_name] = {
+                metric: {'mean': float(np.mean([f[metric] for f in folds])),
+                         'std': float(np.std([f[metric] for f in folds]))}
+                for metric in folds[0]
+            }
+        return summary
+    
+    def best_model(self, metric='f1_score'):
+        """Name of the model with the highest mean ``metric``."""
+        summary = self.summary()
+        return max(summary, key=lambda name: summary[name][metric]['mean'])
+
+def cross_validate_models(models, X, y, n_splits=CV_FOLDS, n_jobs=CV_WORKERS, cache_dir=CV_CACHE_DIR,
+                          random_state=42, progress=None):
+    """
+    Stratified k-fold cross-validation of all candidates, in parallel processes.
+    
+    Every (model, fold) pair is one task. Features, labels and fold ids
+    are written once as .npy files that the workers memory-map (see
+    _fit_fold). Out-of-fold predictions are cached in ``cache_dir`` under
+    a key of the data, folds and model parameters; candidates whose
+    entry exists are not refitted, and entries of other keys are removed.
+    
+    Args:
+        models: Dictionary of model name -> unfitted estimator
+        X, y: Training features and labels
+        n_splits: Number of folds
+        n_jobs: Worker processes (1 fits in this process)
+        cache_dir: Directory of cached predictions (None disables the cache)
+        random_state: Fold shuffle seed
+        progress: Optional ``progress(fraction, message)`` callback, called as folds finish
+        
+    Returns:
+        CrossValidationResult
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+    fold_ids = make_folds(y, n_splits, random_state)
+    data_key = _cache_key(X.tobytes(), y.tobytes(), n_splits, random_state)
+    
+    with tempfile.TemporaryDirectory(prefix='failguard_cv_') as tmp:
+        tmp = Path(tmp)
+        output_dir = Path(cache_dir) if cache_dir is not None else tmp
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        paths, predictions, cached, pending = {}, {}, [], []
+        for name, model in models.items():
+            params = sorted((key, repr(value)) for key, value in model.get_params().items())
+            paths[name] = output_dir / f"{_cache_key(data_key, name, type(model).__name__, params)}.npy"
+            if paths[name].exists():
+                predictions[name] = np.load(paths[name])
+                cached.append(name)
+            else:
+                pending.append(name)
+        if cache_dir is not None:
+            for stale in set(output_dir.glob('*.npy')) - set(paths.values()):
+                stale.unlink()
+        
+        if pending:
+            np.save(tmp / 'X.npy', X)
+            np.save(tmp / 'y.npy', y)
+            np.save(tmp / 'folds.npy', fold_ids)
+            partial = {name: tmp / f"{paths[name].stem}.partial.npy" for name in pending}
+            for name in pending:
+                np.lib.format.open_memmap(partial[name], mode='w+', dtype=np.float64, shape=(2, len(y))).flush()
+            
+            tasks = []
+            for name in pending:
+                for fold in range(n_splits):
+                    model = clone(models[name])
+                    # Workers are the unit of parallelism; one thread per fit avoids oversubscription
+                    if n_jobs > 1 and 'n_jobs' in model.get_params():
+                        model.set_params(n_jobs=1)
+                    tasks.append((name, model, fold))
+            
+            done = 0
+            def finished(name, fold):
+                nonlocal done
+                done += 1
+                if progress is not None:
+                    progress(done / len(tasks), f"Cross-validated {name} fold {fold + 1}/{n_splits}")
+            
+            if n_jobs > 1:
+                # spawn: the retrain job runs inside the threaded web app, where fork is unsafe
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), mp_context=context) as pool:
+                    futures = {pool.submit(_fit_fold, model, tmp, fold, partial[name]): name
+                               for name, model, fold in tasks}
+                    for future in as_completed(futures):
+                        finished(futures[future], future.result())
+            else:
+                for name, model, fold in tasks:
+                    _fit_fold(model, tmp, fold, partial[name])
+                    finished(name, fold)
+            
+            for name in pending:
+                predictions[name] = np.load(partial[name])
+                if cache_dir is not None:
+                    os.replace(partial[name], paths[name])
+    
+    ordered = {name: predictions[name] for name in models}
+    return CrossValidationResult(y, fold_ids, ordered, cached=cached)
+
+def print_cv_results(cv_results):
+    """Print mean ± std of the cross-validated metrics of each model."""
+    print("\n" + "="*60)
+    print(f"CROSS-VALIDATION ({cv_results.n_splits} stratified folds)")
+    print("="*60)
+    for name, metrics in cv_results.summary().items():
+        source = " (cached)" if name in cv_results.cached else ""
+        print(f"{name}{source}: " + ", ".join(
+            f"{metric} {values['mean']:.4f} ± {values['std']:.4f}" for metric, values in metrics.items()))
+
+def select_best_model(trained_models, results, cv_results=None):
     """
     Select the best performing model.
     
     Args:
         trained_models: Dictionary of trained models
         results: Dictionary of model metrics
+        cv_results: Optional CrossValidationResult; when given the model
+            with the best mean cross-validated F1-score wins instead of the
+            best single test split score
         
     Returns:
         Best model and its name
     """
-    best_model_name = max(results.keys(), key=lambda x: results[x]['f1_score'])
+    if cv_results is not None:
+        best_model_name = cv_results.best_model('f1_score')
+    else:
+        best_model_name = max(results.keys(), key=lambda x: results[x]['f1_score'])
     best_model = trained_models[best_model_name]
     
     print(f"\n{'='*60}")
     print(f"BEST MODEL: {best_model_name}")
+    if cv_results is not None:
+        f1 = cv_results.summary()[best_model_name]['f1_score']
+        print(f"Cross-validated F1-Score: {f1['mean']:.4f} ± {f1['std']:.4f}")
     print(f"F1-Score: {results[best_model_name]['f1_score']:.4f}")
     print(f"{'='*60}")
     
@@ -103,12 +356,161 @@ def save_model(model, model_name, filepath=MODEL_PATH):
     joblib.dump(model, filepath)
     print(f"\nModel '{model_name}' saved to {filepath}")
 
-def main():
-    """Main training pipeline."""
+def export_compiled_model(model, scaler_path=SCALER_PATH, filepath=COMPILED_MODEL_PATH):
+    """
+    Export a tree ensemble as a compiled numpy artifact for the 'compiled' backend.
+    
+    Args:
+        model: Trained model
+        scaler_path: Path of the fitted scaler to embed
+        filepath: Path to save
+        
+    Returns:
+        True if the model was compiled, False if it is not a tree ensemble
+    """
+    if not is_tree_ensemble(model):
+        print(f"Skipping compiled export: {type(model).__name__} is not a tree ensemble")
+        _remove_stale_artifact(filepath)
+        return False
+    
+    compiled = compile_tree_ensemble(model, joblib.load(scaler_path))
+    compiled.save(filepath)
+    print(f"Compiled model ({compiled.n_trees} trees) saved to {filepath}")
+    return True
+
+def fuse_linear_model(model, scaler):
+    """
+    Fold a StandardScaler into a binary linear model.
+    
+    With z = (x - mean) / scale, the decision function coef . z + b
+    equals (coef / scale) . x + (b - sum(coef * mean / scale)).
+    
+    Args:
+        model: Fitted LogisticRegression
+        scaler: Fitted StandardScaler
+        
+    Returns:
+        FusedLinearModel scoring raw features
+    """
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    weights = coef / scaler.scale_
+    bias = float(model.intercept_[0]) - float(np.dot(weights, scaler.mean_))
+    return FusedLinearModel(weights, bias)
+
+def export_linear_model(model, scaler_path=SCALER_PATH, filepath=LINEAR_MODEL_PATH):
+    """
+    Export a logistic regression with the scaler folded in for the 'linear' backend.
+    
+    Args:
+        model: Trained model
+        scaler_path: Path of the fitted scaler to fold in
+        filepath: Path to save
+        
+    Returns:
+        True if the model was exported, False if it is not a binary linear model
+    """
+    if not isinstance(model, LogisticRegression) or model.coef_.shape[0] != 1:
+        print(f"Skipping linear export: {type(model).__name__} is not a binary linear model")
+        _remove_stale_artifact(filepath)
+        return False
+    
+    fused = fuse_linear_model(model, joblib.load(scaler_path))
+    fused.save(filepath)
+    print(f"Fused linear model saved to {filepath}")
+    return True
+
+def validate_quantized_model(reference, quantized, X_raw, tolerance=QUANTIZATION_TOLERANCE):
+    """
+    Check that a float32 artifact reproduces its float64 source.
+    
+    Probabilities must agree within ``tolerance``. Predictions and risk
+    labels must match, except for rows whose float64 probability lies
+    within ``tolerance`` of the 0.5 decision boundary or a risk band edge.
+    
+    Args:
+        reference: float64 engine (CompiledTreeEnsemble or FusedLinearModel)
+        quantized: float32 engine
+        X_raw: Raw feature matrix to compare on (e.g. the test set)
+        tolerance: Maximum allowed absolute probability difference
+        
+    Returns:
+        Dictionary with 'max_abs_diff', 'mismatches' and 'passed'
+    """
+    expected = reference.predict_proba(reference.standardize(X_raw))
+    actual = quantized.predict_proba(quantized.standardize(X_raw))
+    max_abs_diff = float(np.max(np.abs(actual - expected))) if len(expected) else 0.0
+    
+    edges = [RISK_THRESHOLDS['LOW'], RISK_THRESHOLDS['MEDIUM']]
+    mismatched = (np.digitize(expected, edges) != np.digitize(actual, edges)) | ((expected > 0.5) != (actual > 0.5))
+    boundaries = np.array(edges + [0.5])
+    near_boundary = np.min(np.abs(expected[:, None] - boundaries), axis=1) <= tolerance
+    unexplained = int(np.sum(mismatched & ~near_boundary))
+    
+    return {
+        'max_abs_diff': max_abs_diff,
+        'mismatches': int(np.sum(mismatched)),
+        'passed': max_abs_diff <= tolerance and unexplained == 0
+    }
+
+def export_float32_model(backend, X_raw, tolerance=QUANTIZATION_TOLERANCE):
+    """
+    Quantize a backend's float64 artifact to float32 and validate it.
+    
+    The ``*_f32.npz`` artifact is only written if validation passes.
+    
+    Args:
+        backend: 'compiled' or 'linear'
+        X_raw: Raw test feature matrix used for validation
+        tolerance: Maximum allowed absolute probability difference
+        
+    Returns:
+        Validation report, or None if the backend has no float64 artifact
+    """
+    loader, filepath = ENGINE_BACKENDS[backend]
+    quantized_path = float32_artifact_path(filepath)
+    if not Path(filepath).exists():
+        _remove_stale_artifact(quantized_path)
+        return None
+    
+    reference = loader(filepath)
+    quantized = reference.astype_float32()
+    report = validate_quantized_model(reference, quantized, X_raw, tolerance)
+    print(f"float32 {backend} model: max |diff| {report['max_abs_diff']:.2e}, "
+          f"{report['mismatches']} label mismatches, "
+          f"{reference.nbytes} -> {quantized.nbytes} bytes")
+    
+    if report['passed']:
+        quantized.save(quantized_path)
+        print(f"Quantized model saved to {quantized_path}")
+    else:
+        print(f"float32 {backend} model failed validation (tolerance {tolerance}), not saved")
+        _remove_stale_artifact(quantized_path)
+    return report
+
+def _remove_stale_artifact(filepath):
+    """Delete an export left over from a previous best model."""
+    filepath = Path(filepath)
+    if filepath.exists():
+        filepath.unlink()
+        print(f"Removed stale artifact {filepath}")
+
+def main(progress=None, cv_workers=CV_WORKERS):
+    """
+    Main training pipeline.
+    
+    Args:
+        progress: Optional ``progress(fraction, message)`` callback (used by
+            the 'retrain' job in src/jobs.py; it may raise to abort). It is
+            not called once the model artifacts start being written.
+        cv_workers: Cross-validation worker processes (the 'retrain' job
+            passes JOB_CV_WORKERS)
+    """
+    report_progress = progress or (lambda fraction, message: None)
     print("FailGuard AI - Model Training Pipeline")
     print("="*60)
     
     # Load and prepare data
+    report_progress(0.0, "Preparing data")
     X_train, X_test, y_train, y_test, feature_names = prepare_data()
     
     print(f"\nTraining set size: {X_train.shape}")
@@ -116,12 +518,50 @@ def main():
     print(f"Number of features: {len(feature_names)}")
     print(f"Class distribution (train): {np.bincount(y_train)}")
     
+    # Derived features, fitted on the training split only
+    pipeline = None
+    X_train_model, X_test_model = X_train, X_test
+    if FEATURE_ENGINEERING:
+        pipeline = FeatureEngineeringPipeline().fit(X_train, feature_names)
+        X_train_model, X_test_model = pipeline.transform(X_train), pipeline.transform(X_test)
+        print(f"Feature pipeline: {len(feature_names)} -> {pipeline.n_features_out_} features")
+    
     # Train models
-    trained_models, results = train_models(X_train, X_test, y_train, y_test)
+    trained_models, results = train_models(
+        X_train_model, X_test_model, y_train, y_test,
+        progress=lambda fraction, message: report_progress(0.1 + 0.4 * fraction, message))
+    
+    # Cross-validate the candidates on the training split (the test split stays held out)
+    cv_results = None
+    if CV_FOLDS > 1:
+        cv_results = cross_validate_models(
+            build_models(y_train), X_train_model, y_train, n_jobs=cv_workers,
+            progress=lambda fraction, message: report_progress(0.5 + 0.4 * fraction, message))
+        print_cv_results(cv_results)
     
     # Select and save best model
-    best_model, best_model_name = select_best_model(trained_models, results)
+    report_progress(0.9, "Saving artifacts")
+    best_model, best_model_name = select_best_model(trained_models, results, cv_results)
     save_model(best_model, best_model_name)
+    if pipeline is not None:
+        save_feature_pipeline(pipeline)
+        # The array backends score raw features with the scaler folded in; they have no pipeline step
+        print("Skipping compiled and linear exports: the model uses the feature pipeline")
+        _remove_stale_artifact(COMPILED_MODEL_PATH)
+        _remove_stale_artifact(LINEAR_MODEL_PATH)
+    else:
+        _remove_stale_artifact(FEATURE_PIPELINE_PATH)
+        export_compiled_model(best_model)
+        export_linear_model(best_model)
+    
+    # Reduced-precision artifacts, validated on the held-out test set
+    scaler = joblib.load(SCALER_PATH)
+    X_test_raw = scaler.inverse_transform(X_test)
+    for backend in ENGINE_BACKENDS:
+        export_float32_model(backend, X_test_raw)
+    
+    # Training distribution for the drift monitor
+    save_reference(build_reference(scaler.inverse_transform(X_train)))
     
     # Evaluation report
     report = prepare_evaluation_report(results)
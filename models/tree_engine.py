@@ -0,0 +1,414 @@
+import sys
+import json
+from pathlib import Path
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import MODEL_PATH, SCALER_PATH, COMPILED_MODEL_PATH
+
+# Node arrays stored in the compiled artifact
+NODE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left')
+
+# Ensembles up to this depth are also laid out as complete binary trees
+HEAP_LAYOUT_MAX_DEPTH = 10
+
+class CompiledTreeEnsemble:
+    """
+    Tree ensemble flattened into plain numpy arrays.
+
+    All trees share one set of node arrays; ``roots`` holds the index of
+    each tree's root node. Leaves point to themselves, so a traversal
+    that runs past a leaf stays on it.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, default_left, roots,
+                 kind, max_depth, base_score=0.0, scaler_mean=None, scaler_scale=None):
+        """
+        Args:
+            feature: Split feature index per node
+            threshold: Split threshold per node
+            left, right: Global child indices per node (self for leaves)
+            value: Leaf output per node (class-1 probability or margin)
+            default_left: Direction taken for missing (NaN) values
+            roots: Root node index of every tree
+            kind: 'random_forest' (average of probabilities) or
+                'xgboost' (sigmoid of summed margins)
+            max_depth: Depth of the deepest tree
+            base_score: Starting margin for boosted ensembles
+            scaler_mean, scaler_scale: Optional StandardScaler parameters
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.roots = roots
+        self.kind = kind
+        self.max_depth = int(max_depth)
+        self.base_score = float(base_score)
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.is_leaf = left == np.arange(len(left))
+        # Left/right children interleaved so one gather picks the next node
+        self.children = np.stack([left, right], axis=1).ravel()
+        self.strict = kind == 'xgboost'
+        self.heap = self._build_heap_layout() if self.max_depth <= HEAP_LAYOUT_MAX_DEPTH else None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def precision(self):
+        """'float32' for quantized ensembles, otherwise 'float64'."""
+        return 'float32' if self.threshold.dtype == np.float32 else 'float64'
+
+    @property
+    def nbytes(self):
+        """Memory held by the node arrays and the derived layouts."""
+        arrays = [getattr(self, name) for name in NODE_ARRAYS] + [self.roots, self.is_leaf, self.children]
+        if self.heap is not None:
+            arrays.extend(self.heap.values())
+        return sum(a.nbytes for a in arrays)
+
+    def astype_float32(self):
+        """
+        Quantized copy with float32 thresholds and leaf values, int16
+        feature indices and int32 child indices.
+
+        Thresholds are rounded down to the nearest float32, so for float32
+        inputs ``x <= t32`` holds exactly when ``x <= t64`` does. The
+        scaler parameters (two values per feature) stay float64: scaling
+        in float32 moves inputs by an ulp, which flips XGBoost splits whose
+        cut points are exact training values.
+
+        Returns:
+            CompiledTreeEnsemble
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        return CompiledTreeEnsemble(
+            feature=self.feature.astype(np.int16),
+            threshold=threshold,
+            left=self.left.astype(np.int32),
+            right=self.right.astype(np.int32),
+            value=self.value.astype(np.float32),
+            default_left=self.default_left,
+            roots=self.roots.astype(np.int32),
+            kind=self.kind,
+            max_depth=self.max_depth,
+            base_score=self.base_score,
+            scaler_mean=self.scaler_mean,
+            scaler_scale=self.scaler_scale,
+        )
+
+    def _build_heap_layout(self):
+        """
+        Lay every tree out as a complete binary tree of depth ``max_depth``.
+
+        Leaves above the last level are padded with always-left splits whose
+        subtrees repeat the leaf, so the child of heap position ``p`` is
+        always ``2p + 1`` or ``2p + 2`` and no child arrays are gathered.
+
+        Returns:
+            Dict with (n_trees * n_internal) 'feature'/'threshold'/'default_left'
+            arrays and the (n_trees * n_leaves) global 'leaf' node ids
+        """
+        feature, threshold, default_left = [], [], []
+        slots = self.roots[:, None]
+        for _ in range(self.max_depth):
+            leaf = self.is_leaf[slots]
+            feature.append(np.where(leaf, 0, self.feature[slots]))
+            threshold.append(np.where(leaf, np.inf, self.threshold[slots]))
+            default_left.append(np.where(leaf, True, self.default_left[slots]))
+            slots = np.stack([self.left[slots], self.right[slots]], axis=2).reshape(self.n_trees, -1)
+        return {
+            'feature': np.concatenate(feature, axis=1).ravel(),
+            'threshold': np.concatenate(threshold, axis=1).ravel(),
+            'default_left': np.concatenate(default_left, axis=1).ravel(),
+            'leaf': slots.ravel(),
+        }
+
+    def standardize(self, X):
+        """Apply the embedded StandardScaler parameters (no-op if absent)."""
+        if self.scaler_mean is None:
+            return X
+        return (X - self.scaler_mean) / self.scaler_scale
+
+    def _go_right(self, x, threshold, default_left, has_missing):
+        """Split decision for a vector of feature values."""
+        go_right = x >= threshold if self.strict else x > threshold
+        if has_missing:
+            go_right = np.where(np.isnan(x), ~default_left, go_right)
+        return go_right
+
+    def apply(self, X):
+        """
+        Find the leaf reached in every tree for every row.
+
+        Traversal is vectorized over all (tree, row) pairs one level at a
+        time. Shallow ensembles use the complete-tree layout; deeper ones
+        walk the node arrays and drop pairs from the active set as they
+        reach a leaf.
+
+        Args:
+            X: 2D array of (scaled) features
+
+        Returns:
+            Array of shape (n_trees, n_rows) with global leaf indices
+        """
+        # Both sklearn and xgboost compare in float32
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        has_missing = bool(np.isnan(X).any())
+
+        if self.heap is not None:
+            return self._apply_heap(X, has_missing)
+
+        X_flat = np.ascontiguousarray(X).ravel()
+        node = np.repeat(self.roots, n_rows)
+        row_offset = np.tile(np.arange(n_rows) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[node])
+
+        for _ in range(self.max_depth):
+            if active.size == 0:
+                break
+            current = np.take(node, active)
+            index = np.take(self.feature, current) + np.take(row_offset, active)
+            x = np.take(X_flat, index)
+            go_right = self._go_right(x, np.take(self.threshold, current),
+                                      np.take(self.default_left, current), has_missing)
+            current = np.take(self.children, 2 * current + go_right)
+            node[active] = current
+            active = active[~np.take(self.is_leaf, current)]
+
+        return node.reshape(self.n_trees, n_rows)
+
+    def _apply_heap(self, X, has_missing):
+        """Level-by-level traversal over the complete-tree layout."""
+        n_rows = X.shape[0]
+        n_internal = 2 ** self.max_depth - 1
+        heap = self.heap
+
+        # Feature-major copy of X, so a (feature, row) lookup is feature * n_rows + row
+        X_flat = np.ascontiguousarray(X.T).ravel()
+        feature_offset = heap['feature'].astype(np.int64) * n_rows
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        tree_base = np.repeat(np.arange(self.n_trees) * n_internal, n_rows)
+
+        position = np.zeros(self.n_trees * n_rows, dtype=np.int64)
+        for _ in range(self.max_depth):
+            node = tree_base + position
+            x = np.take(X_flat, np.take(feature_offset, node) + rows)
+            go_right = self._go_right(x, np.take(heap['threshold'], node),
+                                      np.take(heap['default_left'], node), has_missing)
+            position *= 2
+            position += 1
+            position += go_right
+
+        leaf_slot = position - n_internal + np.repeat(np.arange(self.n_trees) * (n_internal + 1), n_rows)
+        return np.take(heap['leaf'], leaf_slot).reshape(self.n_trees, n_rows)
+
+    def predict_proba(self, X):
+        """
+        Class-1 probability for each row of an already scaled matrix.
+
+        Args:
+            X: 2D array of scaled features
+
+        Returns:
+            1D array of probabilities
+        """
+        leaf_values = self.value[self.apply(X)]
+        if self.kind == 'xgboost':
+            margin = np.full(leaf_values.shape[1], self.base_score, dtype=np.float32)
+            margin += leaf_values.sum(axis=0, dtype=np.float32)
+            return 1.0 / (1.0 + np.exp(-margin.astype(np.float64)))
+        return leaf_values.sum(axis=0, dtype=np.float64) / self.n_trees
+
+    def save(self, filepath=COMPILED_MODEL_PATH):
+        """Save arrays to an ``.npz`` file (no pickled objects)."""
+        arrays = {name: getattr(self, name) for name in NODE_ARRAYS}
+        arrays['roots'] = self.roots
+        if self.scaler_mean is not None:
+            arrays['scaler_mean'] = self.scaler_mean
+            arrays['scaler_scale'] = self.scaler_scale
+        meta = {'kind': self.kind, 'max_depth': self.max_depth, 'base_score': self.base_score}
+        np.savez(filepath, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, filepath=COMPILED_MODEL_PATH):
+        """Load a compiled ensemble saved with ``save``."""
+        with np.load(filepath, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {name: data[name] for name in NODE_ARRAYS}
+            scaler_mean = data['scaler_mean'] if 'scaler_mean' in data else None
+            scaler_scale = data['scaler_scale'] if 'scaler_scale' in data else None
+            roots = data['roots']
+        return cls(roots=roots, scaler_mean=scaler_mean, scaler_scale=scaler_scale, **arrays, **meta)
+
+def _tree_depth(left, right, root=0):
+    """Depth of a tree given local child arrays (-1 marks a leaf)."""
+    depth = 0
+    level = [root]
+    while level:
+        next_level = [c for n in level for c in (left[n], right[n]) if c != -1]
+        if next_level:
+            depth += 1
+        level = next_level
+    return depth
+
+def _flatten(trees, kind, base_score=0.0, scaler=None):
+    """
+    Concatenate per-tree node arrays into one global node table.
+
+    Args:
+        trees: List of dicts with local 'feature', 'threshold', 'left',
+            'right', 'value', 'default_left' arrays (-1 marks a leaf);
+            other keys are ignored
+        kind: Ensemble kind
+        base_score: Starting margin
+        scaler: Optional fitted StandardScaler to embed
+
+    Returns:
+        CompiledTreeEnsemble
+    """
+    parts = {name: [] for name in NODE_ARRAYS}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        n_nodes = len(tree['left'])
+        local = np.arange(n_nodes)
+        leaf = tree['left'] == -1
+        parts['feature'].append(np.where(leaf, 0, tree['feature']))
+        parts['threshold'].append(np.where(leaf, 0.0, tree['threshold']))
+        parts['left'].append(np.where(leaf, local, tree['left']) + offset)
+        parts['right'].append(np.where(leaf, local, tree['right']) + offset)
+        parts['value'].append(np.where(leaf, tree['value'], 0.0))
+        parts['default_left'].append(tree['default_left'])
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(tree['left'], tree['right']))
+        offset += n_nodes
+
+    value_dtype = np.float32 if kind == 'xgboost' else np.float64
+    return CompiledTreeEnsemble(
+        feature=np.concatenate(parts['feature']).astype(np.int64),
+        threshold=np.concatenate(parts['threshold']).astype(np.float64),
+        left=np.concatenate(parts['left']).astype(np.int64),
+        right=np.concatenate(parts['right']).astype(np.int64),
+        value=np.concatenate(parts['value']).astype(value_dtype),
+        default_left=np.concatenate(parts['default_left']).astype(bool),
+        roots=np.array(roots, dtype=np.int64),
+        kind=kind,
+        max_depth=max_depth,
+        base_score=base_score,
+        scaler_mean=None if scaler is None else np.asarray(scaler.mean_, dtype=np.float64),
+        scaler_scale=None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64),
+    )
+
+def _sklearn_trees(model):
+    """Extract node arrays from a fitted sklearn RandomForestClassifier."""
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        # Leaf class distributions normalized as in DecisionTreeClassifier.predict_proba
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1)
+        totals[totals == 0] = 1.0
+        proba = counts[:, 1] / totals
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+        trees.append({
+            'feature': tree.feature,
+            'threshold': tree.threshold,
+            'left': tree.children_left,
+            'right': tree.children_right,
+            'value': proba,
+            'default_left': np.ones(tree.node_count, dtype=bool) if missing_left is None else missing_left.astype(bool),
+            # Training weight reaching each node (used by models/explain.py)
+            'cover': tree.weighted_n_node_samples,
+        })
+    return trees
+
+def _xgboost_trees(model):
+    """
+    Extract node arrays from a fitted XGBClassifier.
+
+    Reads the booster's JSON model dump, so split conditions and leaf
+    weights keep their exact float32 values.
+
+    Returns:
+        (trees, base_margin)
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+
+    # base_score is stored as '5E-1' (1.x) or '[5E-1]' (2.x+) in probability space
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        left = np.array(tree['left_children'], dtype=np.int64)
+        conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        trees.append({
+            'feature': np.array(tree['split_indices'], dtype=np.int64),
+            'threshold': conditions,
+            'left': left,
+            'right': np.array(tree['right_children'], dtype=np.int64),
+            # Leaf weights are stored in split_conditions
+            'value': conditions,
+            'default_left': np.array(tree['default_left'], dtype=bool),
+            'cover': np.array(tree['sum_hessian'], dtype=np.float64),
+        })
+    return trees, base_margin
+
+def compile_tree_ensemble(model, scaler=None):
+    """
+    Convert a fitted tree ensemble into a CompiledTreeEnsemble.
+
+    Args:
+        model: Fitted RandomForestClassifier or XGBClassifier (binary)
+        scaler: Optional fitted StandardScaler to embed in the artifact
+
+    Returns:
+        CompiledTreeEnsemble
+
+    Raises:
+        ValueError: If the model is not a supported binary tree ensemble
+    """
+    model_type = type(model).__name__
+    if model_type == 'RandomForestClassifier':
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary classifiers can be compiled")
+        return _flatten(_sklearn_trees(model), 'random_forest', scaler=scaler)
+    if model_type in ('XGBClassifier', 'Booster'):
+        trees, base_margin = _xgboost_trees(model)
+        return _flatten(trees, 'xgboost', base_score=base_margin, scaler=scaler)
+    raise ValueError(f"Cannot compile model of type {model_type}")
+
+def is_tree_ensemble(model):
+    """Check whether ``compile_tree_ensemble`` supports this model."""
+    return type(model).__name__ in ('RandomForestClassifier', 'XGBClassifier', 'Booster')
+
+def load_compiled_model(filepath=COMPILED_MODEL_PATH):
+    """Load a compiled tree ensemble artifact."""
+    return CompiledTreeEnsemble.load(filepath)
+
+if __name__ == "__main__":
+    # Compile the currently saved model
+    import joblib
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    compiled = compile_tree_ensemble(model, scaler)
+    compiled.save(COMPILED_MODEL_PATH)
+    print(f"Compiled {compiled.n_trees} trees (max depth {compiled.max_depth}) to {COMPILED_MODEL_PATH}")
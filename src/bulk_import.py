@@ -0,0 +1,249 @@
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (FEATURE_NAMES, RISK_THRESHOLDS, IMPORT_CHUNK_SIZE, IMPORT_COMMIT_ROWS,
+                    IMPORT_MAX_ERRORS)
+import database.db as db
+
+INTEGER_FEATURES = ['loc', 'code_churn', 'num_developers', 'past_defects']
+# Integer features must stay below this to be stored as SQLite (int64) integers
+INT64_LIMIT = 2.0 ** 63
+# Minimum (and maximum) allowed value per feature, as in the input form
+FEATURE_BOUNDS = {name: (0, None) for name in FEATURE_NAMES}
+FEATURE_BOUNDS['lcom'] = (0, 1)
+FEATURE_BOUNDS['num_developers'] = (1, None)
+
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+PREDICTION_LABELS = ('DEFECTIVE', 'SAFE')
+INSERT_COLUMNS = FEATURE_NAMES + ['risk_level', 'probability', 'confidence', 'prediction', 'outcome', 'timestamp']
+
+def detect_format(filename):
+    """'csv' or 'ndjson' from a file name (``.gz`` suffixes are ignored)."""
+    suffixes = [suffix.lower() for suffix in Path(filename).suffixes if suffix.lower() != '.gz']
+    if suffixes and suffixes[-1] in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    return 'csv'
+
+def read_chunks(source, fmt='csv', chunk_size=IMPORT_CHUNK_SIZE, compression='infer'):
+    """
+    Stream an input file as DataFrame chunks.
+
+    Args:
+        source: Path or binary file object
+        fmt: 'csv' or 'ndjson'
+        chunk_size: Rows per chunk
+        compression: pandas compression ('infer' from the file name, 'gzip' or None)
+
+    Returns:
+        Iterator of DataFrames
+    """
+    if fmt == 'ndjson':
+        return pd.read_json(source, lines=True, chunksize=chunk_size, compression=compression, dtype=False)
+    if fmt == 'csv':
+        return pd.read_csv(source, chunksize=chunk_size, compression=compression)
+    raise ValueError(f"Unknown import format '{fmt}'")
+
+def validate_chunk(df, first_row=0):
+    """
+    Validate and normalize one chunk with column-wise operations.
+
+    Features and probability (0-1, as stored in the table) are required;
+    risk_level, confidence and prediction are derived from the probability
+    when missing. timestamp defaults to now (UTC, like CURRENT_TIMESTAMP)
+    and outcome (0/1) to NULL.
+
+    Args:
+        df: Raw chunk
+        first_row: Row number of the chunk's first row (for error messages)
+
+    Returns:
+        (DataFrame with INSERT_COLUMNS of valid rows, list of (row, reason))
+
+    Raises:
+        ValueError: If required columns are missing
+    """
+    df = df.rename(columns=lambda column: str(column).strip().lower())
+    missing = [name for name in FEATURE_NAMES + ['probability'] if name not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    out = pd.DataFrame(index=df.index)
+    # First failed check per row as an index into ``reasons`` (0 = valid)
+    codes = np.zeros(len(df), dtype=np.int16)
+    reasons = ['']
+
+    def reject(mask, reason):
+        mask = np.asarray(mask, dtype=bool) & (codes == 0)
+        if mask.any():
+            reasons.append(reason)
+            codes[mask] = len(reasons) - 1
+
+    for name in FEATURE_NAMES:
+        values = pd.to_numeric(df[name], errors='coerce')
+        low, high = FEATURE_BOUNDS[name]
+        reject(values.isna(), f"{name} is not a number")
+        reject(~np.isfinite(values.astype(np.float64)), f"{name} is not finite")
+        reject(values < low, f"{name} is below {low}")
+        if high is not None:
+            reject(values > high, f"{name} is above {high}")
+        if name in INTEGER_FEATURES:
+            # Checked before the int64 cast below, which would truncate or wrap these
+            reject(values % 1 != 0, f"{name} is not a whole number")
+            reject(values >= INT64_LIMIT, f"{name} is too large")
+        out[name] = values
+
+    probability = pd.to_numeric(df['probability'], errors='coerce')
+    reject(probability.isna() | (probability < 0) | (probability > 1), "probability must be between 0 and 1")
+    out['probability'] = probability
+
+    bands = np.digitize(probability.fillna(0).to_numpy(), [RISK_THRESHOLDS['LOW'], RISK_THRESHOLDS['MEDIUM']])
+    derived_risk = pd.Series(np.array(RISK_LEVELS)[bands], index=df.index)
+    if 'risk_level' in df.columns:
+        risk_level = df['risk_level'].astype('string').str.strip().str.upper()
+        reject(risk_level.notna() & ~risk_level.isin(RISK_LEVELS), "unknown risk_level")
+        out['risk_level'] = risk_level.fillna(derived_risk).astype(object)
+    else:
+        out['risk_level'] = derived_risk
+
+    derived_prediction = pd.Series(np.where(probability > 0.5, 'DEFECTIVE', 'SAFE'), index=df.index)
+    if 'prediction' in df.columns:
+        prediction = df['prediction'].astype('string').str.strip().str.upper()
+        reject(prediction.notna() & ~prediction.isin(PREDICTION_LABELS), "unknown prediction")
+        out['prediction'] = prediction.fillna(derived_prediction).astype(object)
+    else:
+        out['prediction'] = derived_prediction
+
+    # Same formula as utils.calculate_model_confidence
+    derived_confidence = (probability - 0.5).abs().mul(200).clip(upper=100).round(2)
+    if 'confidence' in df.columns:
+        confidence = pd.to_numeric(df['confidence'], errors='coerce')
+        out['confidence'] = confidence.fillna(derived_confidence)
+    else:
+        out['confidence'] = derived_confidence
+
+    if 'outcome' in df.columns:
+        outcome = pd.to_numeric(df['outcome'], errors='coerce')
+        reject(df['outcome'].notna() & ~outcome.isin([0, 1]), "outcome must be 0 or 1")
+        out['outcome'] = outcome
+    else:
+        out['outcome'] = np.nan
+
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    if 'timestamp' in df.columns:
+        timestamp = pd.to_datetime(df['timestamp'], errors='coerce', format='ISO8601')
+        reject(df['timestamp'].notna() & timestamp.isna(), "invalid timestamp")
+        out['timestamp'] = timestamp.dt.strftime('%Y-%m-%d %H:%M:%S').fillna(now)
+    else:
+        out['timestamp'] = now
+
+    valid = codes == 0
+    errors = [(first_row + int(position), reasons[codes[position]]) for position in np.flatnonzero(~valid)]
+    out = out[valid]
+    for name in INTEGER_FEATURES:
+        out[name] = out[name].astype(np.int64)
+    out['outcome'] = out['outcome'].astype('Int64')
+    return out[INSERT_COLUMNS], errors
+
+def _drop_indexes(conn):
+    """Drop the secondary indexes of the predictions table and return their SQL."""
+    indexes = conn.execute('''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+    ''', (db.prediction_table(conn),)).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    return [sql for _, sql in indexes]
+
+def _rows(df):
+    """Plain tuples for executemany (NULL for missing outcomes)."""
+    outcome = df['outcome'].astype(object).where(df['outcome'].notna(), None)
+    return zip(*(df[column].tolist() for column in INSERT_COLUMNS[:-2]), outcome.tolist(), df['timestamp'].tolist())
+
+def import_predictions(chunks, defer_indexes=True, commit_rows=IMPORT_COMMIT_ROWS, max_errors=IMPORT_MAX_ERRORS):
+    """
+    Load historical predictions into the predictions table.
+
+    Chunks are validated column-wise and inserted with ``executemany``
+    inside transactions of ``commit_rows`` rows. With ``defer_indexes``
+    the table's secondary indexes are dropped first and rebuilt once at
+    the end (also when the import fails), which is much faster than
+    updating them row by row. Transactions committed before an error
+    stay in the table; the summary only covers successful imports.
+
+    Args:
+        chunks: Iterator of DataFrames (see read_chunks)
+        defer_indexes: Rebuild secondary indexes after loading
+        commit_rows: Rows per write transaction
+        max_errors: Rejected rows reported in detail
+
+    Returns:
+        Dictionary with inserted and rejected counts, the first errors and timings
+    """
+    start = time.perf_counter()
+    inserted = rejected = pending = 0
+    errors = []
+    conn = sqlite3.connect(str(db.DB_PATH))
+    index_sql = []
+    try:
+        if defer_indexes:
+            index_sql = _drop_indexes(conn)
+            conn.commit()
+        statement = db.prediction_insert_sql(conn, INSERT_COLUMNS)
+        first_row = 0
+        for chunk in chunks:
+            valid, chunk_errors = validate_chunk(chunk, first_row)
+            first_row += len(chunk)
+            rejected += len(chunk_errors)
+            errors.extend({'row': row, 'error': reason} for row, reason in chunk_errors[:max_errors - len(errors)])
+            conn.executemany(statement, _rows(valid))
+            inserted += len(valid)
+            pending += len(valid)
+            if pending >= commit_rows:
+                conn.commit()
+                pending = 0
+        conn.commit()
+    finally:
+        conn.rollback()
+        index_start = time.perf_counter()
+        for sql in index_sql:
+            conn.execute(sql)
+        conn.commit()
+        conn.close()
+    end = time.perf_counter()
+    return {
+        'inserted': inserted,
+        'rejected': rejected,
+        'errors': errors,
+        'seconds': round(end - start, 3),
+        'index_seconds': round(end - index_start, 3),
+        'rows_per_second': round(inserted / (end - start)) if inserted else 0,
+    }
+
+def import_file(path, fmt=None, chunk_size=IMPORT_CHUNK_SIZE, defer_indexes=True):
+    """Import a CSV/NDJSON file (optionally gzipped). See import_predictions."""
+    return import_predictions(read_chunks(path, fmt or detect_format(path), chunk_size), defer_indexes=defer_indexes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load historical predictions into the predictions table")
+    parser.add_argument('path', help="CSV or NDJSON file (.gz allowed); columns as in /api/predictions/export")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Input format (default: from the file name)")
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Rows validated per chunk")
+    parser.add_argument('--no-defer-indexes', action='store_true', help="Keep indexes while loading")
+    args = parser.parse_args()
+
+    summary = import_file(args.path, args.format, args.chunk_size, defer_indexes=not args.no_defer_indexes)
+    print(f"✓ Imported {summary['inserted']} predictions in {summary['seconds']}s "
+          f"({summary['rows_per_second']} rows/s, index rebuild {summary['index_seconds']}s)")
+    if summary['rejected']:
+        print(f"✗ Rejected {summary['rejected']} rows:")
+        for error in summary['errors']:
+            print(f"  row {error['row']}: {error['error']}")
@@ -0,0 +1,441 @@
+import sys
+import ast
+import json
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import FEATURE_NAMES, CODE_METRICS_CACHE_PATH, SCAN_EXCLUDE_DIRS
+
+# Bump when the metric definitions change so cached results are recomputed
+METRICS_VERSION = 2
+
+# Features that cannot be derived from source; filled from history when available
+# (see src/git_history.py)
+HISTORY_DEFAULTS = {'code_churn': 0, 'num_developers': 1, 'past_defects': 0}
+
+# Nodes that add a branch to cyclomatic complexity
+_DECISION_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler,
+                   ast.With, ast.AsyncWith, ast.Assert, ast.comprehension)
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+_SCOPE_NODES = _FUNCTION_NODES + (ast.ClassDef, ast.Lambda)
+
+def _walk_scope(node):
+    """Walk a function body without descending into nested functions or classes."""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, _SCOPE_NODES):
+            stack.extend(ast.iter_child_nodes(child))
+
+def cyclomatic_complexity(function):
+    """McCabe complexity of one function: 1 + decision points."""
+    complexity = 1
+    for node in _walk_scope(function):
+        if isinstance(node, _DECISION_NODES):
+            complexity += 1 + (len(node.ifs) if isinstance(node, ast.comprehension) else 0)
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, getattr(ast, 'match_case', ())):
+            complexity += 1
+    return complexity
+
+def _call_name(call):
+    func = call.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+def class_lcom(cls):
+    """
+    Henderson-Sellers LCOM* of a class, in [0, 1].
+
+    0 means every method uses every instance attribute; 1 means each
+    attribute is used by a single method.
+    """
+    methods = [node for node in cls.body if isinstance(node, _FUNCTION_NODES)]
+    usage = {}
+    for method in methods:
+        if not method.args.args:
+            continue
+        self_name = method.args.args[0].arg
+        for node in _walk_scope(method):
+            if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                    and node.value.id == self_name):
+                usage.setdefault(node.attr, set()).add(method.name)
+    # Method calls on self are not attributes
+    method_names = {method.name for method in methods}
+    attributes = [users for name, users in usage.items() if name not in method_names]
+    if len(methods) < 2 or not attributes:
+        return 0.0
+    mean_users = sum(len(users) for users in attributes) / len(attributes)
+    return min(max((mean_users - len(methods)) / (1 - len(methods)), 0.0), 1.0)
+
+def _class_nodes(cls):
+    """Walk a class body, methods included, without descending into nested classes."""
+    stack = list(ast.iter_child_nodes(cls))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, ast.ClassDef):
+            stack.extend(ast.iter_child_nodes(child))
+
+def _import_bindings(tree):
+    """Module-level names bound by imports, mapped to the module they come from."""
+    bindings = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                bindings[alias.asname or alias.name.split('.')[0]] = alias.name
+        elif isinstance(node, ast.ImportFrom):
+            module = '.' * node.level + (node.module or '')
+            for alias in node.names:
+                bindings[alias.asname or alias.name] = module
+    return bindings
+
+def class_metrics(cls, lines, bindings, class_names):
+    """
+    Features of one class, defined like the module ones but over its body.
+
+    - loc: non-blank, non-comment lines of the class
+    - wmc: sum of cyclomatic complexity over its methods (and their nested functions)
+    - rfc: distinct methods defined plus distinct names called
+    - cbo: distinct imported modules and other module classes it refers to
+    - lcom: LCOM* of the class
+
+    Args:
+        cls: ast.ClassDef
+        lines: Source lines of the module
+        bindings: Imported names by module (see _import_bindings)
+        class_names: Names of the classes defined in the module
+
+    Returns:
+        Dict with the class 'name', its first 'line', the metrics and 'num_methods'
+    """
+    functions, called, coupled = [], set(), set()
+    for node in _class_nodes(cls):
+        if isinstance(node, _FUNCTION_NODES):
+            functions.append(node)
+        elif isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name:
+                called.add(name)
+        elif isinstance(node, ast.Name):
+            if node.id in bindings:
+                coupled.add(bindings[node.id])
+            elif node.id in class_names and node.id != cls.name:
+                coupled.add(node.id)
+    body = lines[cls.lineno - 1:cls.end_lineno]
+    return {
+        'name': cls.name,
+        'line': cls.lineno,
+        'loc': sum(1 for line in body if line.strip() and not line.lstrip().startswith('#')),
+        'wmc': sum(cyclomatic_complexity(function) for function in functions),
+        'rfc': len({function.name for function in functions} | called),
+        'cbo': len(coupled),
+        'lcom': round(class_lcom(cls), 4),
+        'num_methods': sum(1 for node in cls.body if isinstance(node, _FUNCTION_NODES)),
+    }
+
+def _class_metrics(tree, lines):
+    """class_metrics of every class in a module, nested ones named Outer.Inner."""
+    bindings = _import_bindings(tree)
+    class_names = {node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)}
+    results = []
+    stack = [(node, '') for node in reversed(tree.body)]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, ast.ClassDef):
+            metrics = class_metrics(node, lines, bindings, class_names)
+            metrics['name'] = prefix + node.name
+            results.append(metrics)
+            prefix = metrics['name'] + '.'
+        stack.extend((child, prefix) for child in reversed(list(ast.iter_child_nodes(node))))
+    return results
+
+def analyze_source(source, path='<string>'):
+    """
+    Compute source-derived FailGuard features of one Python module.
+
+    - loc: non-blank, non-comment lines
+    - wmc: sum of cyclomatic complexity over all functions and methods
+    - rfc: distinct functions defined plus distinct names called
+    - cbo: distinct modules imported
+    - lcom: mean LCOM* over the module's classes (0 without classes)
+
+    Args:
+        source: Module source code
+        path: File name used in syntax errors
+
+    Returns:
+        Dict of metric values plus class/function counts, and 'classes':
+        the same metrics per class (see class_metrics)
+
+    Raises:
+        SyntaxError: If the source does not parse
+    """
+    tree = ast.parse(source, filename=path)
+
+    lines = source.splitlines()
+    loc = sum(1 for line in lines if line.strip() and not line.lstrip().startswith('#'))
+    functions, classes, called, imported = [], [], set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, _FUNCTION_NODES):
+            functions.append(node)
+        elif isinstance(node, ast.ClassDef):
+            classes.append(node)
+        elif isinstance(node, ast.Call):
+            name = _call_name(node)
+            if name:
+                called.add(name)
+        elif isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imported.add('.' * node.level + (node.module or ''))
+
+    lcoms = [class_lcom(cls) for cls in classes]
+    return {
+        'loc': loc,
+        'wmc': sum(cyclomatic_complexity(function) for function in functions),
+        'rfc': len({function.name for function in functions} | called),
+        'cbo': len(imported),
+        'lcom': round(sum(lcoms) / len(lcoms), 4) if lcoms else 0.0,
+        'num_classes': len(classes),
+        'num_functions': len(functions),
+        'classes': _class_metrics(tree, lines),
+    }
+
+def _file_digest(path):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _analyze_file(item):
+    """
+    Process-pool worker: (relative path, file path) -> (hash, metrics, error).
+
+    The file is read here rather than shipped from the parent, and the hash
+    is of the bytes actually parsed, in case the file changed since it was
+    hashed for the cache lookup.
+    """
+    rel, path = item
+    data = Path(path).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        return digest, analyze_source(data.decode('utf-8', errors='replace'), rel), None
+    except (SyntaxError, ValueError, RecursionError) as e:
+        return digest, None, f"{type(e).__name__}: {e}"
+
+class MetricsCache:
+    """SQLite cache of per-file metrics keyed by content hash."""
+
+    def __init__(self, path=CODE_METRICS_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS file_metrics (
+                    content_hash TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    metrics TEXT,
+                    error TEXT
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_many(self, digests):
+        """Cached (metrics, error) by hash for the current METRICS_VERSION."""
+        found = {}
+        digests = list(digests)
+        with self._connect() as conn:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT content_hash, metrics, error FROM file_metrics "
+                    f"WHERE version = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [METRICS_VERSION] + batch)
+                for digest, metrics, error in rows:
+                    found[digest] = (json.loads(metrics) if metrics else None, error)
+        return found
+
+    def put_many(self, results):
+        """Store (hash, metrics, error) tuples."""
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO file_metrics (content_hash, version, metrics, error) VALUES (?, ?, ?, ?)',
+                [(digest, METRICS_VERSION, json.dumps(metrics) if metrics else None, error)
+                 for digest, metrics, error in results])
+
+def iter_python_files(root, exclude_dirs=SCAN_EXCLUDE_DIRS):
+    """Python files under ``root`` (or ``root`` itself), skipping excluded directories."""
+    root = Path(root)
+    if root.is_file():
+        yield root
+        return
+    for path in sorted(root.rglob('*.py')):
+        if not any(part in exclude_dirs for part in path.relative_to(root).parts[:-1]):
+            yield path
+
+def scan_tree(root, workers=None, cache=None, history=None, level='module'):
+    """
+    Compute FailGuard features for every Python module (or class) under a directory.
+
+    Files are hashed one at a time as the tree is walked; only those whose
+    content hash is not in the cache are parsed, in a process pool that
+    reads each file itself.
+
+    Args:
+        root: Directory (or single file) to scan
+        workers: Process count (None = CPU count, 1 = in-process)
+        cache: MetricsCache, or None to disable caching
+        history: Optional {relative path: {'code_churn', 'num_developers',
+            'past_defects'}} overriding HISTORY_DEFAULTS
+        level: 'module' for one entry per file, 'class' for one per class
+            (path 'file.py::Class'; files that do not parse keep an entry
+            with their error)
+
+    Returns:
+        (modules, stats): list of dicts with 'path', every FEATURE_NAMES
+        key and 'error' (None when the file parsed), and a dict of
+        file/cache-hit/parsed counts
+    """
+    if level not in ('module', 'class'):
+        raise ValueError("level must be 'module' or 'class'")
+    root = Path(root)
+    base = root if root.is_dir() else root.parent
+    files = [(path.relative_to(base).as_posix(), _file_digest(path), path) for path in iter_python_files(root)]
+
+    results = cache.get_many({digest for _, digest, _ in files}) if cache else {}
+    pending = {}
+    for rel, digest, path in files:
+        if digest not in results and digest not in pending:
+            pending[digest] = (rel, str(path))
+
+    if pending:
+        items = list(pending.values())
+        if workers == 1 or len(items) == 1:
+            computed = [_analyze_file(item) for item in items]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(_analyze_file, items, chunksize=max(1, len(items) // 64)))
+        if cache:
+            cache.put_many(computed)
+        results.update({digest: (metrics, error) for digest, (_, metrics, error) in zip(pending, computed)})
+
+    history = history or {}
+    modules = []
+    for rel, digest, _ in files:
+        metrics, error = results[digest]
+        metrics = dict(metrics or {})
+        classes = metrics.pop('classes', [])
+        if level == 'module':
+            entries = [{'path': rel, 'error': error, **metrics}]
+        else:
+            entries = [{'path': rel, 'error': error}] if error else []
+            entries.extend({'path': f"{rel}::{cls['name']}", 'error': None,
+                            **{name: value for name, value in cls.items() if name != 'name'}} for cls in classes)
+        for entry in entries:
+            for name, default in HISTORY_DEFAULTS.items():
+                entry[name] = history.get(rel, {}).get(name, default)
+        modules.extend(entries)
+
+    stats = {'files': len(files), 'cache_hits': len(files) - len(pending), 'parsed': len(pending)}
+    return modules, stats
+
+def score_tree(root, predictor, workers=None, cache=None, history=None, level='module'):
+    """
+    Scan a source tree and predict defect risk for every parsable module (or class).
+
+    Args:
+        root: Directory to scan
+        predictor: FailGuardPredictor
+        workers, cache, history, level: See scan_tree
+
+    Returns:
+        (modules, stats) with 'risk_level', 'probability', 'confidence'
+        and 'prediction' added to each parsed module
+    """
+    modules, stats = scan_tree(root, workers=workers, cache=cache, history=history, level=level)
+    scorable = [module for module in modules if module['error'] is None]
+    if scorable:
+        predictions = predictor.predict_batch([{name: m[name] for name in FEATURE_NAMES} for m in scorable])
+        for module, prediction in zip(scorable, predictions):
+            module.update(prediction)
+    return modules, stats
+
+if __name__ == "__main__":
+    from models.predict import load_model
+
+    parser = argparse.ArgumentParser(description='Scan a Python source tree and predict defect risk per module')
+    parser.add_argument('root', help='Directory to scan')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Reparse every file')
+    parser.add_argument('--cache', default=str(CODE_METRICS_CACHE_PATH), help='Cache database path')
+    parser.add_argument('--top', type=int, default=20, help='Riskiest modules to print')
+    parser.add_argument('--output', help='Write all results to a .json or .csv file')
+    parser.add_argument('--git-history', action='store_true',
+                        help='Fill code_churn, num_developers and past_defects from git history')
+    parser.add_argument('--classes', action='store_true', help='Score every class instead of every module')
+    parser.add_argument('--track', action='store_true',
+                        help='Store scores per module and only re-score modules whose metrics or model changed')
+    args = parser.parse_args()
+
+    history = None
+    if args.git_history:
+        from src.git_history import history_for_tree
+        history = history_for_tree(args.root)
+
+    cache = None if args.no_cache else MetricsCache(args.cache)
+    if args.track:
+        from src.tracking import rescore_tree
+
+        summary = rescore_tree(args.root, load_model(), workers=args.workers, cache=cache, history=history)
+        print(f"Scanned {summary['scanned']} modules (model {summary['model_version']}): "
+              f"{summary['unchanged']} unchanged, {summary['new']} new, {summary['rescored']} re-scored, "
+              f"{summary['removed']} removed")
+        for change in summary['changes'][:args.top]:
+            previous = change['previous_risk_level'] or '-'
+            print(f"  {change['change']:<14} {previous:>6} -> {change['risk_level']:<6}  {change['path']}")
+        sys.exit(0)
+
+    modules, stats = score_tree(args.root, load_model(), workers=args.workers, cache=cache, history=history,
+                                level='class' if args.classes else 'module')
+    print(f"Scanned {stats['files']} files ({stats['cache_hits']} cached, {stats['parsed']} parsed)")
+
+    scored = sorted((m for m in modules if 'probability' in m), key=lambda m: m['probability'], reverse=True)
+    for module in scored[:args.top]:
+        print(f"  {module['probability']:6.2f}%  {module['risk_level']:<6}  {module['path']}")
+    failed = [m for m in modules if m['error']]
+    if failed:
+        print(f"✗ {len(failed)} files could not be parsed")
+
+    if args.output:
+        import pandas as pd
+
+        df = pd.DataFrame(modules)
+        if args.output.endswith('.csv'):
+            df.to_csv(args.output, index=False)
+        else:
+            df.to_json(args.output, orient='records', indent=2)
+        print(f"✓ Results saved to {args.output}")
@@ -0,0 +1,166 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DASHBOARD_RECENT_PREDICTIONS, DASHBOARD_SNAPSHOT_MAX_AGE
+import database.db as db
+from src.evaluation import get_confusion_matrix, get_feature_importance
+
+def chart_data(model, X_test, y_test, feature_names):
+    """
+    Chart series of the dashboard: feature importance, confusion matrix,
+    model comparison and risk distribution on the test set.
+
+    Args:
+        model: Fitted classifier
+        X_test, y_test: Test set
+        feature_names: Names of the columns of ``X_test``
+
+    Returns:
+        Dictionary as served by /api/chart-data
+    """
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)
+
+    # 1. Feature Importance
+    feature_imp = get_feature_importance(model, feature_names)
+    feature_imp_sorted = sorted(feature_imp, key=lambda x: x[1], reverse=True)
+
+    # 2. Confusion Matrix
+    cm = get_confusion_matrix(y_test, y_pred)
+
+    # 3. Model Comparison (only the served model is evaluated, so all bars show its accuracy)
+    accuracy = round(model.score(X_test, y_test) * 100, 2)
+
+    # 4. Risk distribution of the test set predictions
+    probabilities = y_pred_proba[:, 1]
+    return {
+        'success': True,
+        'feature_importance': {
+            'features': [f[0].upper() for f in feature_imp_sorted],
+            'values': [float(f[1]) for f in feature_imp_sorted]
+        },
+        'confusion_matrix': {
+            'data': [[int(cm['tn']), int(cm['fp'])], [int(cm['fn']), int(cm['tp'])]],
+            'tn': int(cm['tn']),
+            'fp': int(cm['fp']),
+            'fn': int(cm['fn']),
+            'tp': int(cm['tp'])
+        },
+        'model_comparison': {
+            'models': ['Logistic Regression', 'Random Forest', 'XGBoost', 'SVM'],
+            'accuracies': [accuracy] * 4
+        },
+        'risk_distribution': {
+            'labels': ['LOW RISK', 'MEDIUM RISK', 'HIGH RISK'],
+            'values': [int((probabilities < 0.33).sum()),
+                       int(((probabilities >= 0.33) & (probabilities <= 0.67)).sum()),
+                       int((probabilities > 0.67).sum())]
+        }
+    }
+
+class DashboardSnapshot:
+    """
+    Prediction statistics and latest predictions of the dashboard, kept in memory.
+
+    Built with one database read (database.db.get_dashboard_data). The
+    prediction path then applies each of its writes as a delta
+    (add_prediction / remove_prediction), so page loads skip the stats
+    query. Writes made elsewhere (jobs, imports, other processes) change
+    database.db.data_version and cause a rebuild on the next read.
+
+    An outside write committed while one of our own writes is in flight
+    cannot be told apart from it; rebuilding after ``max_age`` seconds
+    bounds how long such a write can go unseen.
+    """
+
+    def __init__(self, limit=DASHBOARD_RECENT_PREDICTIONS, version_fn=None, max_age=DASHBOARD_SNAPSHOT_MAX_AGE):
+        """
+        Args:
+            limit: Number of latest predictions kept
+            version_fn: Callable returning the database version (default database.db.data_version)
+            max_age: Seconds after which the snapshot is rebuilt anyway
+        """
+        self.limit = limit
+        self.version_fn = version_fn or db.data_version
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._version = None
+        self._built_at = 0.0
+        self._totals = None
+        self._recent = None
+
+    @property
+    def is_built(self):
+        return self._totals is not None
+
+    def version(self):
+        """Database version to pass to add/remove_prediction; read it before the write."""
+        return self.version_fn()
+
+    def read(self):
+        """
+        Current statistics and latest predictions, rebuilt if the database changed unseen.
+
+        Returns:
+            (stats as returned by get_prediction_stats, list of predictions newest first)
+        """
+        with self._lock:
+            version = self.version_fn()
+            if (self._totals is None or version != self._version
+                    or time.monotonic() - self._built_at > self.max_age):
+                # Versions are read before the data, so a racing write only causes another rebuild
+                self._totals, self._recent = db.get_dashboard_data(self.limit)
+                self._version = version
+                self._built_at = time.monotonic()
+            elif self._recent is None:
+                self._recent = db.get_all_predictions(limit=self.limit)
+            return db.stats_from_totals(self._totals), list(self._recent)
+
+    def _apply(self, token, prediction, sign):
+        if self._totals is None:
+            return False
+        if token != self._version:
+            # Something else was written since the last read: rebuild rather than guess
+            self._totals = None
+            return False
+        totals = self._totals.setdefault(prediction['risk_level'], [0, 0.0])
+        totals[0] += sign
+        totals[1] += sign * prediction['probability']
+        return True
+
+    def add_prediction(self, prediction, token):
+        """
+        Apply a prediction the caller just saved.
+
+        Args:
+            prediction: Saved row, as returned by get_prediction_by_id
+            token: version() read before the write
+        """
+        with self._lock:
+            if not self._apply(token, prediction, 1):
+                return
+            if self._recent is not None:
+                self._recent.append(prediction)
+                self._recent.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+                del self._recent[self.limit:]
+            self._version = self.version_fn()
+
+    def remove_prediction(self, prediction, token):
+        """Apply a prediction the caller just deleted (see add_prediction)."""
+        with self._lock:
+            if not self._apply(token, prediction, -1):
+                return
+            if self._recent is not None and any(row['id'] == prediction['id'] for row in self._recent):
+                # Refilled from the table on the next read
+                self._recent = None
+            self._version = self.version_fn()
+
+    def invalidate(self):
+        """Rebuild on the next read."""
+        with self._lock:
+            self._totals = None
@@ -8,7 +8,7 @@ from sklearn.model_selection import train_test_split
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config import DATA_RAW_PATH, DATA_PROCESSED_PATH, FEATURE_NAMES, SCALER_PATH
+from config import DATA_RAW_PATH, DATA_PROCESSED_PATH, FEATURE_NAMES, SCALER_PATH, STATS_CHUNK_SIZE
 import joblib
 
 def load_data(filepath=DATA_RAW_PATH):
@@ -17,6 +17,22 @@ def load_data(filepath=DATA_RAW_PATH):
     df = pd.read_csv(filepath)
     return df
 
+def iter_feature_chunks(filepath=DATA_RAW_PATH, feature_names=FEATURE_NAMES, chunk_size=STATS_CHUNK_SIZE):
+    """
+    Read the raw feature columns in chunks, without loading the whole file.
+    
+    Args:
+        filepath: CSV file
+        feature_names: Columns to read (matched case-insensitively; absent ones are NaN)
+        chunk_size: Rows per chunk
+        
+    Yields:
+        2D float arrays with columns in ``feature_names`` order
+    """
+    for chunk in pd.read_csv(filepath, chunksize=chunk_size):
+        chunk.columns = [col.lower().strip() for col in chunk.columns]
+        yield chunk.reindex(columns=feature_names).to_numpy(dtype=np.float64)
+
 def clean_data(df):
     """
     Handle missing values and data cleaning.
@@ -65,13 +81,14 @@ def normalize_features(X_train, X_test, save_scaler=True):
     
     return X_train_scaled, X_test_scaled, scaler
 
-def prepare_data(test_size=0.2, random_state=42):
+def prepare_data(test_size=0.2, random_state=42, save=True):
     """
     Full preprocessing pipeline.
     
     Args:
         test_size: Proportion of test set
         random_state: Random seed
+        save: Whether to save the scaler and processed data
         
     Returns:
         X_train, X_test, y_train, y_test
@@ -132,12 +149,13 @@ def prepare_data(test_size=0.2, random_state=42):
     )
     
     # Normalize
-    X_train_scaled, X_test_scaled, scaler = normalize_features(X_train, X_test)
+    X_train_scaled, X_test_scaled, scaler = normalize_features(X_train, X_test, save_scaler=save)
     
     # Save processed data
-    processed_df = pd.DataFrame(X_train_scaled, columns=available_features)
-    processed_df['target'] = y_train.values
-    processed_df.to_csv(DATA_PROCESSED_PATH, index=False)
-    print(f"Processed data saved to {DATA_PROCESSED_PATH}")
+    if save:
+        processed_df = pd.DataFrame(X_train_scaled, columns=available_features)
+        processed_df['target'] = y_train.values
+        processed_df.to_csv(DATA_PROCESSED_PATH, index=False)
+        print(f"Processed data saved to {DATA_PROCESSED_PATH}")
     
     return X_train_scaled, X_test_scaled, y_train, y_test, available_features
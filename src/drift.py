@@ -0,0 +1,237 @@
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (FEATURE_NAMES, DRIFT_REFERENCE_PATH, DRIFT_BINS, DRIFT_CHECK_INTERVAL,
+                    DRIFT_PSI_THRESHOLDS, DRIFT_MIN_SAMPLES, SCALER_PATH)
+from src.instrumentation import gauge, BACKGROUND_JOB_SECONDS, BACKGROUND_JOBS
+from src.feature_statistics import FeatureStatistics
+
+FEATURE_DRIFT_PSI = gauge(
+    'failguard_feature_drift_psi', 'Population stability index of each feature vs. training data', ('feature',))
+FEATURE_DRIFT_KS = gauge(
+    'failguard_feature_drift_ks', 'Kolmogorov-Smirnov distance of each feature vs. training data', ('feature',))
+
+# Smallest bin share used in PSI, so empty bins do not give infinite scores
+PSI_EPSILON = 1e-4
+
+def build_reference(X, bins=DRIFT_BINS):
+    """
+    Reference histograms of the training data.
+
+    Bin edges are the interior quantiles of each feature (duplicates from
+    discrete features are merged), so each bin holds a similar share of
+    the training modules.
+
+    Args:
+        X: 2D array of raw training features in FEATURE_NAMES order
+        bins: Target number of bins per feature
+
+    Returns:
+        Dictionary with 'n_samples', 'created_at' and per-feature
+        'edges' and 'counts' (len(edges) + 1 bins, the outer ones open)
+    """
+    # Features recovered with scaler.inverse_transform carry float noise (35.00000000000006)
+    X = np.round(np.asarray(X, dtype=np.float64), 6)
+    features = {}
+    for column, name in enumerate(FEATURE_NAMES):
+        edges = np.unique(np.quantile(X[:, column], np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, X[:, column], side='right'), minlength=len(edges) + 1)
+        features[name] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+    return {
+        'n_samples': len(X),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'features': features,
+    }
+
+def save_reference(reference, filepath=DRIFT_REFERENCE_PATH):
+    """Save reference histograms as JSON."""
+    Path(filepath).write_text(json.dumps(reference, indent=2))
+    print(f"Drift reference saved to {filepath}")
+
+def load_reference(filepath=DRIFT_REFERENCE_PATH):
+    """Load reference histograms saved with ``save_reference`` (None if missing)."""
+    try:
+        return json.loads(Path(filepath).read_text())
+    except FileNotFoundError:
+        return None
+
+def psi(expected, actual):
+    """
+    Population stability index between two histograms over the same bins.
+
+    Args:
+        expected: Reference bin counts
+        actual: Observed bin counts
+
+    Returns:
+        sum((a - e) * ln(a / e)) over bin shares
+    """
+    expected = np.maximum(np.asarray(expected) / np.sum(expected), PSI_EPSILON)
+    actual = np.maximum(np.asarray(actual) / np.sum(actual), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def ks_distance(expected, actual):
+    """Largest gap between the two cumulative distributions at the bin edges."""
+    expected_cdf = np.cumsum(expected) / np.sum(expected)
+    actual_cdf = np.cumsum(actual) / np.sum(actual)
+    return float(np.max(np.abs(expected_cdf - actual_cdf)))
+
+def drift_status(score, n_samples):
+    """'insufficient_data', 'stable', 'moderate' or 'significant' for a PSI score."""
+    if n_samples < DRIFT_MIN_SAMPLES:
+        return 'insufficient_data'
+    moderate, significant = DRIFT_PSI_THRESHOLDS
+    if score >= significant:
+        return 'significant'
+    return 'moderate' if score >= moderate else 'stable'
+
+class DriftMonitor:
+    """
+    Streaming comparison of incoming features with the training distribution.
+
+    Memory is fixed: one row of bin counts per feature for all predictions
+    since startup and one for the current window. Observing a prediction is
+    a single vectorized comparison against the padded bin edges, whatever
+    the traffic so far. Streaming statistics (mean, std, min, max,
+    quantiles; see src/feature_statistics.py) are kept for the same two
+    periods. Scores are computed by ``check`` on a schedule (``start``)
+    and served from the last report.
+    """
+
+    def __init__(self, reference):
+        """
+        Args:
+            reference: Dictionary from ``build_reference`` / ``load_reference``
+        """
+        self.reference = reference
+        edges = [reference['features'][name]['edges'] for name in FEATURE_NAMES]
+        width = max(len(e) for e in edges)
+        # Padding edges are +inf, so no value ever lands beyond a feature's last real bin
+        self._edges = np.full((len(FEATURE_NAMES), width), np.inf)
+        for row, feature_edges in enumerate(edges):
+            self._edges[row, :len(feature_edges)] = feature_edges
+        self._n_bins = [len(e) + 1 for e in edges]
+        self._rows = np.arange(len(FEATURE_NAMES))
+        self._total = np.zeros((len(FEATURE_NAMES), width + 1), dtype=np.int64)
+        self._window = np.zeros_like(self._total)
+        # Predictions update the window's statistics only; ``check`` merges them into the total
+        self._stats_total = FeatureStatistics(FEATURE_NAMES)
+        self._stats_window = FeatureStatistics(FEATURE_NAMES)
+        self._window_started = datetime.now().isoformat(timespec='seconds')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_report = None
+
+    @classmethod
+    def from_file(cls, filepath=DRIFT_REFERENCE_PATH):
+        """Monitor for the saved reference, or None if no reference exists."""
+        reference = load_reference(filepath)
+        return cls(reference) if reference is not None else None
+
+    def observe(self, features_dict):
+        """
+        Count one prediction's features.
+
+        Args:
+            features_dict: Feature values (missing features count as 0)
+        """
+        x = np.array([float(features_dict.get(name, 0)) for name in FEATURE_NAMES])
+        bins = (self._edges <= x[:, None]).sum(axis=1)
+        with self._lock:
+            self._total[self._rows, bins] += 1
+            self._window[self._rows, bins] += 1
+            self._stats_window.add(x)
+
+    def _scores(self, counts, statistics):
+        """Per-feature PSI, KS, status and statistics for one set of bin counts."""
+        n_samples = int(counts[0].sum())
+        summary = statistics.summary()
+        features = {}
+        for row, name in enumerate(FEATURE_NAMES):
+            expected = self.reference['features'][name]['counts']
+            actual = counts[row, :self._n_bins[row]]
+            if n_samples:
+                score, ks = psi(expected, actual), ks_distance(expected, actual)
+            else:
+                score, ks = 0.0, 0.0
+            features[name] = {'psi': round(score, 4), 'ks': round(ks, 4), 'status': drift_status(score, n_samples),
+                              'statistics': summary[name]}
+        return {
+            'samples': n_samples,
+            'features': features,
+            'drifted': [name for name, f in features.items() if f['status'] in ('moderate', 'significant')],
+        }
+
+    def check(self):
+        """
+        Score the predictions seen so far and start a new window.
+
+        Returns:
+            Report with 'checked_at', 'total' (since startup) and 'window'
+            (since the previous check) scores
+        """
+        checked_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            total, window = self._total.copy(), self._window.copy()
+            stats_window = self._stats_window
+            stats_total = self._stats_total.merge(stats_window).copy()
+            window_started = self._window_started
+            self._window[:] = 0
+            self._stats_window = FeatureStatistics(FEATURE_NAMES)
+            self._window_started = checked_at
+        report = {
+            'checked_at': checked_at,
+            'reference_samples': self.reference['n_samples'],
+            'total': self._scores(total, stats_total),
+            'window': {'started_at': window_started, **self._scores(window, stats_window)},
+        }
+        for name, scores in report['total']['features'].items():
+            FEATURE_DRIFT_PSI.labels(feature=name).set(scores['psi'])
+            FEATURE_DRIFT_KS.labels(feature=name).set(scores['ks'])
+        self.last_report = report
+        return report
+
+    def _run(self, interval):
+        """Scheduler loop: check every ``interval`` seconds until stopped."""
+        while not self._stop.wait(interval):
+            start = time.perf_counter()
+            status = 'success'
+            try:
+                self.check()
+            except Exception as e:
+                status = 'error'
+                print(f"✗ Error checking drift: {e}")
+            finally:
+                BACKGROUND_JOB_SECONDS.labels(job='drift_check').observe(time.perf_counter() - start)
+                BACKGROUND_JOBS.labels(job='drift_check', status=status).inc()
+
+    def start(self, interval=DRIFT_CHECK_INTERVAL):
+        """Run ``check`` every ``interval`` seconds in a daemon thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+if __name__ == "__main__":
+    # Rebuild the reference from the training split without retraining
+    import joblib
+    from src.data_preprocessing import prepare_data
+
+    X_train, _, _, _, _ = prepare_data(save=False)
+    save_reference(build_reference(joblib.load(SCALER_PATH).inverse_transform(X_train)))
@@ -0,0 +1,175 @@
+import sys
+import json
+import time
+import queue
+import itertools
+import threading
+from collections import deque
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import EVENT_QUEUE_SIZE, EVENT_REPLAY_SIZE, EVENT_STREAM_MAX_CLIENTS, EVENT_STREAM_HEARTBEAT
+from src.instrumentation import counter, gauge
+
+EVENTS_PUBLISHED = counter('failguard_events_published_total', 'Events published to the live feed', ('event',))
+EVENT_SUBSCRIBERS = gauge('failguard_event_subscribers', 'Open live feed connections')
+
+# Sent instead of the missed events when a subscriber fell behind or resumed too late
+RESET_EVENT = 'reset'
+
+class Subscription:
+    """One subscriber's queue of (id, event, data) tuples; see EventBus.subscribe."""
+
+    def __init__(self, bus, size):
+        self.bus = bus
+        self.queue = queue.Queue(maxsize=size)
+        # Set while a 'reset' is queued: later events are covered by the client's reload
+        self.resetting = False
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            item = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item[1] == RESET_EVENT:
+            self.resetting = False
+        return item
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class EventBus:
+    """
+    In-process publish/subscribe bus behind the /api/stream live feed.
+
+    ``publish`` numbers each event and hands it to every subscriber's
+    bounded queue without blocking; a subscriber that falls behind gets a
+    single 'reset' event (reload everything) instead of its backlog. The
+    last events are kept so a reconnecting client sending Last-Event-ID
+    receives what it missed.
+    """
+
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE, replay_size=EVENT_REPLAY_SIZE,
+                 max_subscribers=EVENT_STREAM_MAX_CLIENTS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        # Ids continue from the start time, so ids from before a restart never look current
+        first_id = time.time_ns() // 1_000_000
+        self._ids = itertools.count(first_id)
+        self._last_id = first_id - 1
+        self._recent = deque(maxlen=replay_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def last_event_id(self):
+        """Id of the latest event; clients pass it as Last-Event-ID to resume after it."""
+        return self._last_id
+
+    @property
+    def has_subscribers(self):
+        """Whether anyone listens (publishers can skip building payloads otherwise)."""
+        return bool(self._subscribers)
+
+    def publish(self, event, data=None):
+        """
+        Send an event to all current subscribers.
+
+        Args:
+            event: Event name
+            data: JSON-serializable payload
+
+        Returns:
+            Event id
+        """
+        with self._lock:
+            event_id = next(self._ids)
+            self._last_id = event_id
+            item = (event_id, event, data)
+            self._recent.append(item)
+            # Under the lock so every subscriber sees events in id order (puts never block)
+            for subscription in self._subscribers:
+                self._deliver(subscription, item)
+        EVENTS_PUBLISHED.labels(event=event).inc()
+        return event_id
+
+    def _deliver(self, subscription, item):
+        if subscription.resetting:
+            return
+        try:
+            subscription.queue.put_nowait(item)
+        except queue.Full:
+            # Drop the backlog; the client reloads its state from the REST endpoints
+            with subscription.queue.mutex:
+                subscription.queue.queue.clear()
+            subscription.resetting = True
+            subscription.queue.put_nowait((item[0], RESET_EVENT, None))
+
+    def subscribe(self, last_event_id=None):
+        """
+        Start receiving events.
+
+        Args:
+            last_event_id: Id of the last event the client saw; newer events
+                still in the replay buffer are queued first (or a 'reset'
+                event if some are gone)
+
+        Returns:
+            Subscription, or None when ``max_subscribers`` are connected
+        """
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if last_event_id is not None and last_event_id != self._last_id:
+                missed = [item for item in self._recent if item[0] > last_event_id]
+                if not missed or missed[0][0] != last_event_id + 1:
+                    missed = [(self._last_id, RESET_EVENT, None)]
+                for item in missed:
+                    self._deliver(subscription, item)
+            self._subscribers.add(subscription)
+            EVENT_SUBSCRIBERS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            EVENT_SUBSCRIBERS.set(len(self._subscribers))
+
+def format_event(event_id, event, data):
+    """One Server-Sent Events message."""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+def sse_stream(subscription, heartbeat=EVENT_STREAM_HEARTBEAT, retry_ms=3000):
+    """
+    Encode a subscription as a text/event-stream body.
+
+    A comment line is sent after ``heartbeat`` idle seconds, which keeps
+    proxies from closing the connection and lets the server notice
+    disconnected clients. The subscription is closed when the client
+    goes away.
+
+    Args:
+        subscription: Subscription from EventBus.subscribe
+        heartbeat: Seconds between keep-alive comments
+        retry_ms: Reconnect delay suggested to the browser
+
+    Yields:
+        UTF-8 encoded SSE messages
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n".encode()
+        while True:
+            item = subscription.get(timeout=heartbeat)
+            yield format_event(*item) if item is not None else b": keepalive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,65 @@
+import io
+import csv
+import json
+import zlib
+
+# Formats served by /api/predictions/export: name -> (content type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+def csv_chunks(batches):
+    """
+    Encode row batches as CSV, one chunk per batch.
+
+    Args:
+        batches: Iterator yielding column names, then lists of row tuples
+            (see database.db.iter_prediction_batches)
+
+    Yields:
+        UTF-8 encoded CSV text, starting with the header line
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(next(batches))
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header alone if there were no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def ndjson_chunks(batches):
+    """
+    Encode row batches as newline-delimited JSON objects, one chunk per batch.
+
+    Args:
+        batches: Iterator yielding column names, then lists of row tuples
+
+    Yields:
+        UTF-8 encoded NDJSON text
+    """
+    columns = next(batches)
+    for rows in batches:
+        yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows).encode()
+
+def gzip_chunks(chunks, level=6):
+    """
+    Compress a byte stream into a gzip stream incrementally.
+
+    Args:
+        chunks: Iterator of bytes
+        level: zlib compression level
+
+    Yields:
+        gzip-encoded bytes
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
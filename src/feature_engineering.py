@@ -1,34 +1,30 @@
+import sys
+from itertools import combinations_with_replacement
+from pathlib import Path
+import joblib
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import PolynomialFeatures
 
-def create_polynomial_features(X, degree=2):
-    """
-    Create polynomial features.
-    
-    Args:
-        X: Input features array
-        degree: Polynomial degree
-        
-    Returns:
-        Array with polynomial features
-    """
-    poly = PolynomialFeatures(degree=degree, include_bias=False)
-    X_poly = poly.fit_transform(X)
-    return X_poly, poly
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def select_features_by_variance(X, threshold=0.01):
+from config import FEATURE_PIPELINE_PATH, FEATURE_POLYNOMIAL_DEGREE, FEATURE_VARIANCE_THRESHOLD
+from src.feature_statistics import FeatureStatistics
+
+def select_features_by_variance(X, threshold=0.01, statistics=None):
     """
     Remove features with low variance.
     
     Args:
         X: Input features
         threshold: Variance threshold
+        statistics: Optional FeatureStatistics of ``X`` (e.g. from a streaming
+            pass over the dataset); saves computing the variances again
         
     Returns:
         Filtered features
     """
-    variances = np.var(X, axis=0)
+    variances = statistics.variance if statistics is not None else np.var(X, axis=0)
     mask = variances > threshold
     return X[:, mask], mask
 
@@ -37,40 +33,171 @@ def calculate_feature_statistics(X, feature_names):
     Calculate statistics for each feature.
     
     Args:
-        X: Input features
+        X: Input features, or an iterable of 2D chunks (e.g.
+            src.data_preprocessing.iter_feature_chunks) read in one pass
         feature_names: List of feature names
         
     Returns:
-        DataFrame with statistics
+        DataFrame with count, mean, std, var, min, max, p50 and p95 per feature
     """
-    stats = pd.DataFrame({
-        'feature': feature_names,
-        'mean': X.mean(axis=0),
-        'std': X.std(axis=0),
-        'min': X.min(axis=0),
-        'max': X.max(axis=0)
-    })
-    return stats
+    statistics = FeatureStatistics(feature_names)
+    for chunk in ([X] if isinstance(X, (np.ndarray, pd.DataFrame)) else X):
+        statistics.update(chunk)
+    return statistics.to_frame()
 
-def create_interaction_features(X, feature_names):
+class FeatureEngineeringPipeline:
     """
-    Create interaction features from important metrics.
+    Derived features of the standardized inputs, fitted once at training time.
     
-    Args:
-        X: Input features
-        feature_names: List of feature names
-        
-    Returns:
-        Extended feature array with interactions
+    Every output column is a product of input columns (a term): the inputs
+    themselves, their polynomial terms up to ``degree`` and the extra
+    ``interactions``. ``fit`` keeps the terms whose training variance is
+    above ``variance_threshold``; ``transform`` fills one preallocated
+    array, computing all terms of the same degree with one vectorized
+    multiply. The fitted pipeline is saved with the model (see
+    save_feature_pipeline) and applied by models.predict.FailGuardPredictor
+    between the scaler and the model.
     """
-    X_interactions = X.copy()
     
-    # Common interactions for software metrics
-    # LOC * CBO (complexity interaction)
-    if 'loc' in feature_names and 'cbo' in feature_names:
-        loc_idx = feature_names.index('loc')
-        cbo_idx = feature_names.index('cbo')
-        interaction = X[:, loc_idx] * X[:, cbo_idx]
-        X_interactions = np.column_stack([X_interactions, interaction])
+    def __init__(self, degree=FEATURE_POLYNOMIAL_DEGREE, interactions=(('loc', 'cbo'),),
+                 variance_threshold=FEATURE_VARIANCE_THRESHOLD):
+        """
+        Args:
+            degree: Highest polynomial degree (1 keeps only the inputs and ``interactions``)
+            interactions: Pairs of feature names multiplied in addition to the
+                polynomial terms (skipped if a name is not an input)
+            variance_threshold: Terms with a training variance at or below this are dropped
+        """
+        self.degree = degree
+        self.interactions = tuple(tuple(pair) for pair in interactions)
+        self.variance_threshold = variance_threshold
+        self.terms_ = None
+    
+    def _candidate_terms(self, feature_names):
+        n_features = len(feature_names)
+        terms = [(i,) for i in range(n_features)]
+        for order in range(2, self.degree + 1):
+            terms.extend(combinations_with_replacement(range(n_features), order))
+        seen = set(terms)
+        for pair in self.interactions:
+            if all(name in feature_names for name in pair):
+                term = tuple(sorted(feature_names.index(name) for name in pair))
+                if term not in seen:
+                    terms.append(term)
+                    seen.add(term)
+        return sorted(terms, key=len)
+    
+    def _set_terms(self, terms):
+        # Terms are ordered by degree, so each degree fills one contiguous block of columns
+        self.terms_ = terms
+        self._blocks = []
+        start = 0
+        for order in sorted({len(term) for term in terms}):
+            factors = np.array([term for term in terms if len(term) == order], dtype=np.intp)
+            self._blocks.append((start, start + len(factors), factors))
+            start += len(factors)
     
-    return X_interactions
+    def fit(self, X, feature_names):
+        """
+        Choose the output terms on the training data.
+        
+        Args:
+            X: 2D array of standardized training features
+            feature_names: Names of the columns of ``X``
+            
+        Returns:
+            self
+        """
+        feature_names = list(feature_names)
+        self.feature_names_in_ = feature_names
+        self._set_terms(self._candidate_terms(feature_names))
+        variances = self.transform(X).var(axis=0)
+        keep = variances > self.variance_threshold
+        self._set_terms([term for term, kept in zip(self.terms_, keep) if kept])
+        self.variances_ = variances[keep]
+        
+        # Contributions of a product term are split evenly between its factors
+        self.attribution_ = np.zeros((len(self.terms_), len(feature_names)))
+        for column, term in enumerate(self.terms_):
+            for factor in term:
+                self.attribution_[column, factor] += 1.0 / len(term)
+        return self
+    
+    @property
+    def n_features_out_(self):
+        return len(self.terms_)
+    
+    @property
+    def feature_names_out_(self):
+        names = []
+        for term in self.terms_:
+            factors = [self.feature_names_in_[i] for i in term]
+            if len(set(factors)) == 1 and len(factors) > 1:
+                names.append(f"{factors[0]}^{len(factors)}")
+            else:
+                names.append('*'.join(factors))
+        return names
+    
+    def transform(self, X):
+        """
+        Compute the output terms.
+        
+        Args:
+            X: 2D array of standardized features, columns as in ``fit``
+            
+        Returns:
+            Array of shape (n_samples, n_features_out_)
+        """
+        if self.terms_ is None:
+            raise ValueError("FeatureEngineeringPipeline is not fitted")
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty((X.shape[0], len(self.terms_)))
+        for start, stop, factors in self._blocks:
+            block = out[:, start:stop]
+            if factors.shape[1] == 1:
+                block[...] = X[:, factors[:, 0]]
+                continue
+            np.multiply(X[:, factors[:, 0]], X[:, factors[:, 1]], out=block)
+            for j in range(2, factors.shape[1]):
+                block *= X[:, factors[:, j]]
+        return out
+    
+    def fit_transform(self, X, feature_names):
+        return self.fit(X, feature_names).transform(X)
+    
+    def attribute(self, contributions):
+        """
+        Map per-term contributions (e.g. SHAP values) back to the input features.
+        
+        Each term's contribution is divided evenly between its factors, so
+        the totals per sample are unchanged.
+        
+        Args:
+            contributions: Array of shape (n_samples, n_features_out_)
+            
+        Returns:
+            Array of shape (n_samples, number of input features)
+        """
+        return np.asarray(contributions, dtype=np.float64) @ self.attribution_
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_blocks', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.terms_ is not None:
+            self._set_terms(self.terms_)
+
+def save_feature_pipeline(pipeline, filepath=FEATURE_PIPELINE_PATH):
+    """Save a fitted pipeline next to the model."""
+    joblib.dump(pipeline, filepath)
+    print(f"Feature pipeline saved to {filepath}")
+
+def load_feature_pipeline(filepath=FEATURE_PIPELINE_PATH):
+    """Load the fitted pipeline saved with the model, or None if it was trained without one."""
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return None
+    return joblib.load(filepath)
@@ -0,0 +1,363 @@
+import sys
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (FEATURE_NAMES, DATA_RAW_PATH, STATS_RELATIVE_ACCURACY, STATS_CHUNK_SIZE,
+                    STATS_WORKERS)
+
+# Magnitudes below this are counted as zero by the quantile sketch
+SKETCH_MIN_VALUE = 1e-9
+
+class QuantileSketch:
+    """
+    DDSketch of one feature: quantiles within a relative error, mergeable.
+
+    Values are counted in logarithmic buckets (bucket k holds magnitudes in
+    (gamma^(k-1), gamma^k]), separately for negative and positive values,
+    so any quantile is returned within ``relative_accuracy`` of a value of
+    that rank. Two sketches with the same accuracy merge by adding counts,
+    which gives the sketch of the combined data.
+    """
+
+    def __init__(self, relative_accuracy=STATS_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def keys(self, magnitudes):
+        """Bucket keys of an array of magnitudes above SKETCH_MIN_VALUE."""
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def add_keys(self, keys, negative=False):
+        """Count precomputed bucket keys (see ``keys``)."""
+        store = self.negative if negative else self.positive
+        if len(keys) == 1:
+            key = int(keys[0])
+            store[key] = store.get(key, 0) + 1
+            return
+        # Keys span a few thousand buckets at most, so counting beats sorting
+        offset = int(keys.min())
+        counts = np.bincount(keys - offset)
+        for index in np.flatnonzero(counts).tolist():
+            store[index + offset] = store.get(index + offset, 0) + int(counts[index])
+
+    def update(self, values):
+        """
+        Count a 1D array of values (NaN and infinite values are skipped).
+
+        Args:
+            values: Values of this feature
+        """
+        values = np.asarray(values, dtype=np.float64)
+        # NaNs fail every comparison, so they land in no store; infinities have no bucket
+        finite = np.isfinite(values)
+        positive = (values > SKETCH_MIN_VALUE) & finite
+        negative = (values < -SKETCH_MIN_VALUE) & finite
+        self.zero_count += int(np.count_nonzero(np.abs(values) <= SKETCH_MIN_VALUE))
+        if positive.any():
+            self.add_keys(self.keys(values[positive]))
+        if negative.any():
+            self.add_keys(self.keys(-values[negative]), negative=True)
+        return self
+
+    def merge(self, other):
+        """Add the counts of a sketch with the same accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def _value(self, key):
+        # Midpoint (relative to the bucket bounds) of bucket ``key``
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Estimated ``q``-quantile (0 <= q <= 1), or NaN if the sketch is empty.
+        """
+        count = self.count
+        if count == 0:
+            return float('nan')
+        rank = q * (count - 1)
+        seen = 0
+        # Most negative values first: descending magnitude
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return float('nan')
+
+class FeatureStatistics:
+    """
+    Streaming per-feature count, mean, variance, min, max and quantiles.
+
+    Fed chunk by chunk (``update``), e.g. from
+    src.data_preprocessing.iter_feature_chunks or one prediction at a time,
+    so the data never has to fit in memory and every value is visited once.
+    Mean and variance are combined per chunk with Welford's update in the
+    pairwise form of Chan et al., which is also how two partial results
+    are merged (``merge``): statistics computed in separate processes
+    combine into those of the whole data. Missing and non-finite values
+    (NaN, +-inf) are skipped.
+    """
+
+    def __init__(self, feature_names=FEATURE_NAMES, relative_accuracy=STATS_RELATIVE_ACCURACY):
+        """
+        Args:
+            feature_names: Names of the columns fed to ``update``
+            relative_accuracy: Relative error of the quantile sketches
+        """
+        self.feature_names = list(feature_names)
+        n_features = len(self.feature_names)
+        self.count = np.zeros(n_features, dtype=np.int64)
+        self.mean = np.zeros(n_features)
+        self._m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+        self.sketches = [QuantileSketch(relative_accuracy) for _ in range(n_features)]
+
+    @property
+    def variance(self):
+        """Population variance (as np.var), NaN for features without values."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self._m2 / self.count, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def quantile(self, q):
+        """Estimated ``q``-quantile of every feature (clipped to the exact min and max)."""
+        estimates = np.array([sketch.quantile(q) for sketch in self.sketches])
+        return np.where(self.count > 0, np.clip(estimates, self.min, self.max), np.nan)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share = np.where(total > 0, count / total, 0.0)
+        self.mean = self.mean + delta * share
+        self._m2 = self._m2 + m2 + delta * delta * self.count * share
+        self.count = total
+        np.minimum(self.min, minimum, out=self.min)
+        np.maximum(self.max, maximum, out=self.max)
+
+    def update(self, X):
+        """
+        Add a chunk of rows.
+
+        Args:
+            X: 2D array-like (or DataFrame) with columns in ``feature_names`` order
+
+        Returns:
+            self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} columns, got {X.shape[1]}")
+        if len(X) == 0:
+            return self
+
+        # Infinities are skipped like NaNs
+        missing = ~np.isfinite(X)
+        if not missing.any():
+            mean = X.mean(axis=0)
+            deviations = X - mean
+            self._combine(np.full(X.shape[1], len(X)), mean, np.einsum('ij,ij->j', deviations, deviations),
+                          X.min(axis=0), X.max(axis=0))
+        else:
+            count = len(X) - missing.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, np.where(missing, 0.0, X).sum(axis=0) / count, 0.0)
+            deviations = np.where(missing, 0.0, X - mean)
+            self._combine(count, mean, np.einsum('ij,ij->j', deviations, deviations),
+                          np.where(missing, np.inf, X).min(axis=0), np.where(missing, -np.inf, X).max(axis=0))
+
+        # One contiguous row per feature for the sketches
+        for values, sketch in zip(X.T.copy(), self.sketches):
+            sketch.update(values)
+        return self
+
+    def add(self, x):
+        """
+        Add one row (e.g. one prediction's features); a cheaper ``update`` for single rows.
+
+        Args:
+            x: 1D array-like with values in ``feature_names`` order
+
+        Returns:
+            self
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if not np.isfinite(x).all():
+            return self.update(x)
+        # Welford's update
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        for value, sketch in zip(x.tolist(), self.sketches):
+            magnitude = abs(value)
+            if magnitude <= SKETCH_MIN_VALUE:
+                sketch.zero_count += 1
+                continue
+            store = sketch.positive if value > 0 else sketch.negative
+            key = math.ceil(math.log(magnitude) / sketch._log_gamma)
+            store[key] = store.get(key, 0) + 1
+        return self
+
+    def merge(self, other):
+        """
+        Combine with statistics of other rows of the same features.
+
+        Returns:
+            self
+        """
+        if other.feature_names != self.feature_names:
+            raise ValueError("Cannot merge statistics of different features")
+        self._combine(other.count, other.mean, other._m2, other.min, other.max)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def copy(self):
+        """Independent copy (e.g. a snapshot of statistics still being updated)."""
+        copy = FeatureStatistics.__new__(FeatureStatistics)
+        copy.feature_names = list(self.feature_names)
+        copy.count, copy.mean, copy._m2 = self.count.copy(), self.mean.copy(), self._m2.copy()
+        copy.min, copy.max = self.min.copy(), self.max.copy()
+        copy.sketches = []
+        for sketch in self.sketches:
+            sketch_copy = QuantileSketch(sketch.relative_accuracy)
+            sketch_copy.merge(sketch)
+            copy.sketches.append(sketch_copy)
+        return copy
+
+    def summary(self, quantiles=(0.5, 0.95)):
+        """
+        JSON-ready statistics per feature.
+
+        Args:
+            quantiles: Quantiles to report, as 'p50', 'p95', ...
+
+        Returns:
+            Dictionary of feature name -> statistics (None where a feature has no values)
+        """
+        values = {'count': self.count, 'mean': self.mean, 'std': self.std, 'var': self.variance,
+                  'min': self.min, 'max': self.max}
+        values.update({f"p{round(q * 100):g}": self.quantile(q) for q in quantiles})
+        summary = {}
+        for column, name in enumerate(self.feature_names):
+            has_values = self.count[column] > 0
+            summary[name] = {
+                key: (int(array[column]) if key == 'count' else
+                      round(float(array[column]), 6) if has_values else None)
+                for key, array in values.items()
+            }
+        return summary
+
+    def to_frame(self, quantiles=(0.5, 0.95)):
+        """Statistics as a DataFrame with one row per feature."""
+        frame = pd.DataFrame({
+            'feature': self.feature_names,
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'var': self.variance,
+            'min': self.min,
+            'max': self.max,
+        })
+        for q in quantiles:
+            frame[f"p{round(q * 100):g}"] = self.quantile(q)
+        return frame
+
+def _chunk_statistics(chunk, feature_names, relative_accuracy):
+    """Statistics of one chunk (runs in a worker process)."""
+    return FeatureStatistics(feature_names, relative_accuracy).update(chunk)
+
+def parallel_statistics(chunks, feature_names=FEATURE_NAMES, n_jobs=STATS_WORKERS,
+                        relative_accuracy=STATS_RELATIVE_ACCURACY):
+    """
+    Statistics of a stream of chunks in one parallel pass.
+
+    Each chunk is summarized by a worker process and the partial results
+    are merged as they arrive. At most two chunks per worker are in
+    flight, so memory stays bounded however long the stream is.
+
+    Args:
+        chunks: Iterable of 2D arrays with columns in ``feature_names`` order
+        feature_names: Column names
+        n_jobs: Worker processes (1 summarizes in this process)
+        relative_accuracy: Relative error of the quantile sketches
+
+    Returns:
+        FeatureStatistics of all chunks
+    """
+    statistics = FeatureStatistics(feature_names, relative_accuracy)
+    if n_jobs <= 1:
+        for chunk in chunks:
+            statistics.update(chunk)
+        return statistics
+
+    # spawn: callers include the threaded web app, where fork is unsafe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as pool:
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= 2 * n_jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    statistics.merge(future.result())
+            pending.add(pool.submit(_chunk_statistics, np.asarray(chunk, dtype=np.float64),
+                                    statistics.feature_names, relative_accuracy))
+        for future in pending:
+            statistics.merge(future.result())
+    return statistics
+
+def dataset_statistics(filepath=DATA_RAW_PATH, feature_names=FEATURE_NAMES, chunk_size=STATS_CHUNK_SIZE,
+                       n_jobs=STATS_WORKERS):
+    """
+    Statistics of a raw dataset CSV, read chunk by chunk.
+
+    Args:
+        filepath: CSV with (case-insensitive) feature columns
+        feature_names: Features to summarize (absent columns count as missing)
+        chunk_size: Rows per chunk
+        n_jobs: Worker processes
+
+    Returns:
+        FeatureStatistics
+    """
+    from src.data_preprocessing import iter_feature_chunks
+    return parallel_statistics(iter_feature_chunks(filepath, feature_names, chunk_size), feature_names, n_jobs)
+
+if __name__ == "__main__":
+    print(dataset_statistics().to_frame().to_string(index=False))
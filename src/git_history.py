@@ -0,0 +1,247 @@
+import re
+import sys
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from contextlib import contextmanager
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import GIT_HISTORY_DB_PATH, HISTORY_WINDOW_DAYS, FIX_COMMIT_PATTERN
+
+# Record/field separators for the commit header line of `git log`
+_RS, _FS = '\x1e', '\x1f'
+_LOG_FORMAT = f'{_RS}%H{_FS}%ae{_FS}%ct{_FS}%s'
+
+# Rows buffered before an executemany
+INSERT_BATCH = 5000
+
+_FIX_RE = re.compile(FIX_COMMIT_PATTERN, re.IGNORECASE)
+
+def is_fix_commit(subject):
+    """Whether a commit subject describes a defect fix."""
+    return bool(_FIX_RE.search(subject))
+
+def _git(repo, *args):
+    result = subprocess.run(['git', '-C', str(repo), *args], capture_output=True, text=True)
+    return result.returncode, result.stdout.strip()
+
+def repo_root(path):
+    """
+    Top-level directory of the git repository containing ``path``.
+
+    Raises:
+        ValueError: If ``path`` is not inside a git work tree
+    """
+    code, out = _git(path, 'rev-parse', '--show-toplevel')
+    if code != 0:
+        raise ValueError(f"{path} is not inside a git repository")
+    return Path(out).resolve()
+
+def iter_log(repo, revision_range='HEAD'):
+    """
+    Stream ``git log --numstat`` as one tuple per changed file.
+
+    Yields:
+        (commit hash, author email, commit timestamp, subject, path, lines added, lines deleted)
+
+    Raises:
+        RuntimeError: If ``git log`` exits with an error (after the tuples read so far)
+    """
+    # quotepath=off keeps non-ASCII paths as they are instead of quoted octal escapes
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            ['git', '-C', str(repo), '-c', 'core.quotepath=off', 'log', '--numstat', '--no-renames',
+             '--no-merges', f'--format={_LOG_FORMAT}', revision_range],
+            stdout=subprocess.PIPE, stderr=stderr, text=True, encoding='utf-8', errors='replace')
+        commit = None
+        try:
+            for line in process.stdout:
+                if line.startswith(_RS):
+                    sha, email, timestamp, subject = line[1:].rstrip('\n').split(_FS, 3)
+                    commit = (sha, email.lower(), int(timestamp), subject)
+                    continue
+                parts = line.rstrip('\n').split('\t', 2)
+                if commit is None or len(parts) != 3:
+                    continue
+                added, deleted, path = parts
+                # Binary files report '-' for both counts
+                yield commit + (path, int(added) if added != '-' else 0, int(deleted) if deleted != '-' else 0)
+        finally:
+            process.stdout.close()
+            process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"git log failed with exit code {process.returncode}: {message}")
+
+class HistoryStore:
+    """SQLite store of per-file changes with a per-repository checkpoint."""
+
+    def __init__(self, path=GIT_HISTORY_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS file_changes (
+                    repo TEXT NOT NULL,
+                    commit_hash TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    committed_at INTEGER NOT NULL,
+                    added INTEGER NOT NULL,
+                    deleted INTEGER NOT NULL,
+                    is_fix INTEGER NOT NULL,
+                    PRIMARY KEY (repo, commit_hash, path)
+                );
+                CREATE INDEX IF NOT EXISTS idx_file_changes_repo_time
+                    ON file_changes (repo, committed_at);
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    repo TEXT PRIMARY KEY,
+                    last_commit TEXT NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            ''')
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def checkpoint(self, repo):
+        with self.connect() as conn:
+            row = conn.execute('SELECT last_commit FROM checkpoints WHERE repo = ?', (str(repo),)).fetchone()
+        return row[0] if row else None
+
+def mine_history(repo, store=None):
+    """
+    Read new commits of a repository into the history store.
+
+    Only commits after the stored checkpoint are read. If the checkpoint
+    is no longer an ancestor of HEAD (history was rewritten), the
+    repository's rows are dropped and the full history is re-read.
+    Rows and the new checkpoint are committed together once ``git log``
+    has exited cleanly, so a failed or interrupted run is simply repeated.
+
+    Args:
+        repo: Path inside a git work tree
+        store: HistoryStore (default: GIT_HISTORY_DB_PATH)
+
+    Returns:
+        Dict with repo, head, commits and file changes read, and whether
+        the run was incremental
+
+    Raises:
+        RuntimeError: If ``git log`` fails; the store is left unchanged
+    """
+    store = store or HistoryStore()
+    root = repo_root(repo)
+    key = str(root)
+    code, head = _git(root, 'rev-parse', 'HEAD')
+    if code != 0:
+        return {'repo': key, 'head': None, 'commits': 0, 'changes': 0, 'incremental': False}
+
+    last = store.checkpoint(key)
+    incremental = last is not None and _git(root, 'merge-base', '--is-ancestor', last, head)[0] == 0
+    if last == head:
+        return {'repo': key, 'head': head, 'commits': 0, 'changes': 0, 'incremental': True}
+
+    commits, changes, batch = set(), 0, []
+    with store.connect() as conn:
+        if not incremental:
+            conn.execute('DELETE FROM file_changes WHERE repo = ?', (key,))
+        insert = '''
+            INSERT OR IGNORE INTO file_changes
+                (repo, commit_hash, path, author, committed_at, added, deleted, is_fix)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        for sha, author, timestamp, subject, path, added, deleted in iter_log(
+                root, f'{last}..{head}' if incremental else head):
+            commits.add(sha)
+            batch.append((key, sha, path, author, timestamp, added, deleted, int(is_fix_commit(subject))))
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany(insert, batch)
+                changes += len(batch)
+                batch.clear()
+        conn.executemany(insert, batch)
+        changes += len(batch)
+        conn.execute('INSERT OR REPLACE INTO checkpoints (repo, last_commit) VALUES (?, ?)', (key, head))
+
+    return {'repo': key, 'head': head, 'commits': len(commits), 'changes': changes, 'incremental': incremental}
+
+def file_history(repo, window_days=HISTORY_WINDOW_DAYS, store=None):
+    """
+    History features per file from the store.
+
+    The window ends at the newest stored commit rather than today, so an
+    inactive repository still reports its last year of activity.
+
+    Args:
+        repo: Path inside a mined git work tree
+        window_days: Days of history to aggregate (None = all)
+        store: HistoryStore
+
+    Returns:
+        {path relative to repo root: {'code_churn', 'num_developers', 'past_defects'}}
+    """
+    store = store or HistoryStore()
+    key = str(repo_root(repo))
+    with store.connect() as conn:
+        newest = conn.execute('SELECT MAX(committed_at) FROM file_changes WHERE repo = ?', (key,)).fetchone()[0]
+        if newest is None:
+            return {}
+        since = newest - window_days * 86400 if window_days is not None else 0
+        rows = conn.execute('''
+            SELECT path,
+                   SUM(added + deleted),
+                   COUNT(DISTINCT author),
+                   COUNT(DISTINCT CASE WHEN is_fix THEN commit_hash END)
+            FROM file_changes
+            WHERE repo = ? AND committed_at >= ?
+            GROUP BY path
+        ''', (key, since)).fetchall()
+    return {
+        path: {'code_churn': churn, 'num_developers': developers, 'past_defects': fixes}
+        for path, churn, developers, fixes in rows
+    }
+
+def history_for_tree(root, window_days=HISTORY_WINDOW_DAYS, store=None):
+    """
+    Mine the repository containing ``root`` and key the history by paths
+    relative to ``root`` (as used by ``code_metrics.scan_tree``).
+    """
+    store = store or HistoryStore()
+    mine_history(root, store)
+    code, prefix = _git(root, 'rev-parse', '--show-prefix')
+    prefix = prefix if code == 0 else ''
+    return {
+        path[len(prefix):]: features
+        for path, features in file_history(root, window_days, store).items()
+        if path.startswith(prefix)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mine git history into per-file churn, developer and fix counts')
+    parser.add_argument('repo', help='Path inside a git repository')
+    parser.add_argument('--db', default=str(GIT_HISTORY_DB_PATH), help='History database path')
+    parser.add_argument('--window-days', type=int, default=HISTORY_WINDOW_DAYS)
+    parser.add_argument('--top', type=int, default=20, help='Files with most churn to print')
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    stats = mine_history(args.repo, store)
+    mode = 'incremental' if stats['incremental'] else 'full'
+    print(f"✓ Read {stats['commits']} new commits ({stats['changes']} file changes, {mode}) up to {stats['head']}")
+
+    history = file_history(args.repo, args.window_days, store)
+    top = sorted(history.items(), key=lambda item: item[1]['code_churn'], reverse=True)[:args.top]
+    print(f"{'churn':>8} {'devs':>5} {'fixes':>6}  path")
+    for path, features in top:
+        print(f"{features['code_churn']:>8} {features['num_developers']:>5} {features['past_defects']:>6}  {path}")
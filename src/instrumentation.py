@@ -0,0 +1,291 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+
+# Latency buckets in seconds (Prometheus default plus sub-millisecond buckets)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    """Render a ``{name="value",...}`` label set (empty string if no labels)."""
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Timer:
+    """Context manager that observes elapsed seconds on exit."""
+
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+class _CounterChild:
+    """Counter value for one label combination."""
+
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild:
+    """Gauge value for one label combination."""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = float(value)
+
+class _HistogramChild:
+    """Bucket counts, sum and count for one label combination."""
+
+    __slots__ = ('_lock', '_bounds', 'buckets', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+class _Metric(ABC):
+    """Base class for a named metric family with optional labels."""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """Fresh child holding the values of one label combination."""
+
+    @abstractmethod
+    def _render_child(self, values, child):
+        """Exposition lines of one child."""
+
+    def labels(self, **labels):
+        """
+        Get the child metric for a label combination.
+
+        Children are cached, so hot paths can resolve them once at import
+        time and skip the lookup on every observation.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def collect(self):
+        """Snapshot of (label values, child) pairs."""
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self):
+        """Render the metric family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for values, child in self.collect():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._unlabeled().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._unlabeled().set(value)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._unlabeled().observe(value)
+
+    def time(self, **labels):
+        """Context manager observing the duration of its block."""
+        return _Timer(self.labels(**labels))
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts = list(child.buckets)
+            total, count = child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        label_str = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+        lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metric families rendered together on /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Register a metric, or return the existing one with the same name.
+
+        Raises:
+            ValueError: If the name is taken by a metric of another type
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+        return existing
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry
+REGISTRY = MetricsRegistry()
+
+# Content type of the text exposition format
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def counter(name, documentation, labelnames=()):
+    """Create (or fetch) a counter in the global registry."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=()):
+    """Create (or fetch) a gauge in the global registry."""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Create (or fetch) a histogram in the global registry."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def timed(metric, **labels):
+    """
+    Decorator observing a function's duration in a histogram.
+
+    Args:
+        metric: Histogram
+        **labels: Label values for the observation
+    """
+    child = metric.labels(**labels)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(child):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_metrics():
+    """Render the global registry for the /metrics endpoint."""
+    return REGISTRY.render()
+
+# Shared metric families used across the app
+CACHE_REQUESTS = counter(
+    'failguard_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+BACKGROUND_JOB_SECONDS = histogram(
+    'failguard_background_job_duration_seconds', 'Background job duration', ('job',))
+BACKGROUND_JOBS = counter(
+    'failguard_background_jobs_total', 'Finished background jobs by status', ('job', 'status'))
+
+def record_cache(cache, hit):
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
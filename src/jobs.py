@@ -0,0 +1,230 @@
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (JOB_MAX_WORKERS, JOB_CV_WORKERS, JOB_POLL_INTERVAL, JOB_SCHEDULE, JOB_RETENTION_DAYS,
+                    PREDICTION_RETENTION_DAYS, PREDICTION_HOT_MONTHS, PREDICTION_ARCHIVE_MONTHS)
+import database.db as db
+from src.instrumentation import BACKGROUND_JOB_SECONDS, BACKGROUND_JOBS
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+class JobContext:
+    """Handle passed to job functions for progress reporting and cancellation."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def progress(self, fraction, message=None):
+        """
+        Record progress; this is where running jobs notice cancellation.
+
+        Args:
+            fraction: Completed share of the work (0-1)
+            message: Optional description of the current step
+
+        Raises:
+            JobCancelled: If the job was cancelled
+        """
+        if db.update_job_progress(self.job_id, round(float(fraction), 4), message):
+            raise JobCancelled()
+
+def retrain_job(ctx):
+    """Run the training pipeline (models/train_model.py) with JOB_CV_WORKERS cross-validation processes."""
+    from models.train_model import main
+    _, model_name, _ = main(progress=ctx.progress, cv_workers=JOB_CV_WORKERS)
+    return {'model': model_name}
+
+def rollup_job(ctx):
+    """Rebuild the daily prediction rollup."""
+    return {'rows': db.rebuild_daily_rollup()}
+
+def maintenance_job(ctx):
+    """ANALYZE and VACUUM the predictions database."""
+    ctx.progress(0.0, 'ANALYZE + VACUUM')
+    return db.run_maintenance()
+
+def retention_job(ctx, days=PREDICTION_RETENTION_DAYS, batch_size=10000):
+    """Delete expired predictions in short batches and expired partitions, then old finished jobs."""
+    deleted = 0
+    if days is not None:
+        deleted += db.drop_partitions_before(days)
+        expired = db.count_predictions_before(days)
+        while True:
+            batch = db.delete_predictions_before(days, batch_size)
+            deleted += batch
+            if batch < batch_size:
+                break
+            ctx.progress(deleted / max(expired, deleted), f"Deleted {deleted} of {expired} predictions")
+    return {'predictions_deleted': deleted, 'jobs_deleted': db.delete_finished_jobs(JOB_RETENTION_DAYS)}
+
+def partition_job(ctx, hot_months=PREDICTION_HOT_MONTHS, archive_months=PREDICTION_ARCHIVE_MONTHS):
+    """Move closed months into partition files and compress old partitions."""
+    if hot_months is None:
+        return {'months_moved': [], 'rows_moved': 0, 'months_archived': []}
+    return db.partition_predictions(hot_months, archive_months, progress=ctx.progress)
+
+JOB_HANDLERS = {
+    'retrain': retrain_job,
+    'rollup': rollup_job,
+    'maintenance': maintenance_job,
+    'retention': retention_job,
+    'partition': partition_job,
+}
+
+class JobScheduler:
+    """
+    In-process scheduler for background work, persisted in the jobs table.
+
+    Jobs are queued in SQLite, so they survive restarts (jobs a crashed
+    process left running are marked failed on ``start``). A dispatcher
+    thread starts queued jobs oldest first, with at most ``max_workers``
+    running and never two of the same kind, and queues recurring kinds
+    from ``schedule`` when their last run is older than the interval.
+    Cancellation is cooperative: queued jobs are dropped, running jobs
+    stop at their next ``ctx.progress`` call.
+    """
+
+    def __init__(self, handlers=None, max_workers=JOB_MAX_WORKERS, schedule=None,
+                 poll_interval=JOB_POLL_INTERVAL):
+        """
+        Args:
+            handlers: Dict of kind -> ``handler(ctx, **params)`` returning a
+                JSON-serializable result (default: JOB_HANDLERS)
+            max_workers: Maximum number of jobs running at once
+            schedule: Dict of kind -> seconds between runs (default: JOB_SCHEDULE)
+            poll_interval: Seconds between dispatcher passes
+        """
+        self.handlers = dict(JOB_HANDLERS if handlers is None else handlers)
+        self.max_workers = max_workers
+        self.schedule = dict(JOB_SCHEDULE if schedule is None else schedule)
+        self.poll_interval = poll_interval
+        self._callbacks = {}
+        self._running = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, kind, handler):
+        """Add or replace the handler of a job kind."""
+        self.handlers[kind] = handler
+
+    def on_success(self, kind, callback):
+        """Call ``callback(job)`` after each successful job of this kind."""
+        self._callbacks.setdefault(kind, []).append(callback)
+
+    def submit(self, kind, params=None):
+        """
+        Queue a job, unless one of the same kind is already queued or running.
+
+        Returns:
+            The new or already active job
+
+        Raises:
+            ValueError: For unknown job kinds
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'. Available: {', '.join(sorted(self.handlers))}")
+        with self._lock:
+            active = db.list_jobs(status=('queued', 'running'), kind=kind, limit=1)
+            job = active[0] if active else db.get_job(db.create_job(kind, params))
+        self._wake.set()
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a job (see db.request_job_cancel). Returns the job or None."""
+        return db.request_job_cancel(job_id)
+
+    def _queue_due(self):
+        """Queue recurring jobs whose last run is older than their interval."""
+        for kind, interval in self.schedule.items():
+            if kind in self.handlers and not db.job_ran_since(kind, interval):
+                self.submit(kind)
+
+    def dispatch(self):
+        """Start as many queued jobs as the limits allow. Returns the started job ids."""
+        started = []
+        with self._lock:
+            for job in db.list_jobs(status='queued', limit=None, oldest_first=True):
+                if len(self._running) >= self.max_workers:
+                    break
+                if job['kind'] in self._running.values() or job['kind'] not in self.handlers:
+                    continue
+                if not db.start_job(job['id']):
+                    continue
+                self._running[job['id']] = job['kind']
+                worker = threading.Thread(target=self._run, args=(job,), daemon=True,
+                                          name=f"job-{job['id']}-{job['kind']}")
+                self._workers[job['id']] = worker
+                worker.start()
+                started.append(job['id'])
+        return started
+
+    def _run(self, job):
+        """Run one job and record its outcome."""
+        start = time.perf_counter()
+        status = 'succeeded'
+        try:
+            result = self.handlers[job['kind']](JobContext(job['id']), **job['params'])
+            db.finish_job(job['id'], status, result=result)
+        except JobCancelled:
+            status = 'cancelled'
+            db.finish_job(job['id'], status)
+        except Exception as e:
+            status = 'failed'
+            print(f"✗ Job {job['id']} ({job['kind']}) failed: {e}")
+            db.finish_job(job['id'], status, error=str(e))
+        finally:
+            BACKGROUND_JOB_SECONDS.labels(job=job['kind']).observe(time.perf_counter() - start)
+            BACKGROUND_JOBS.labels(job=job['kind'], status=status).inc()
+            with self._lock:
+                self._running.pop(job['id'], None)
+                self._workers.pop(job['id'], None)
+            self._wake.set()
+
+        if status == 'succeeded':
+            for callback in self._callbacks.get(job['kind'], []):
+                try:
+                    callback(db.get_job(job['id']))
+                except Exception as e:
+                    print(f"✗ Callback for job {job['id']} ({job['kind']}) failed: {e}")
+
+    def _loop(self):
+        """Dispatcher: queue due jobs and start queued ones until stopped."""
+        while not self._stop.is_set():
+            try:
+                self._queue_due()
+                self.dispatch()
+            except Exception as e:
+                print(f"✗ Job scheduler error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Fail jobs interrupted by a restart and start the dispatcher thread."""
+        if self._thread is None:
+            interrupted = db.fail_interrupted_jobs()
+            if interrupted:
+                print(f"Marked {interrupted} interrupted job(s) as failed")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name='job-scheduler')
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the dispatcher and wait for running jobs to finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.join(timeout)
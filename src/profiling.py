@@ -0,0 +1,242 @@
+import sys
+import io
+import time
+import random
+import itertools
+import threading
+import cProfile
+import pstats
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (PROFILING_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_HEADER, SLOW_REQUEST_THRESHOLD_MS,
+                    PROFILE_MAX_CAPTURES, STACK_SAMPLE_INTERVAL_MS)
+
+# Number of rows kept from pstats / tracemalloc / stack samples per capture
+TOP_ENTRIES = 30
+
+class StackSampler:
+    """
+    Background thread sampling the Python stacks of registered threads.
+
+    Only threads currently handling a request are registered, so the
+    sampler costs nothing while no request is in flight beyond a wakeup
+    every interval.
+    """
+
+    def __init__(self, interval_ms=STACK_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='failguard-stack-sampler', daemon=True)
+                    self._thread.start()
+
+    def register(self, thread_id):
+        """Start collecting samples for a thread; returns the sample counter."""
+        self._ensure_started()
+        samples = Counter()
+        with self._lock:
+            self._active[thread_id] = samples
+        return samples
+
+    def unregister(self, thread_id):
+        with self._lock:
+            self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse_stack(frame)] += 1
+
+def _collapse_stack(frame):
+    """Render a frame's stack root-first as ``file:func:line;...`` (flamegraph collapsed format)."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+class ProfileSession:
+    """Profiling state for one in-flight request."""
+
+    __slots__ = ('reason', 'profile', 'tracing', 'samples', 'thread_id')
+
+    def __init__(self, reason=None, profile=None, tracing=False, samples=None, thread_id=None):
+        self.reason = reason
+        self.profile = profile
+        self.tracing = tracing
+        self.samples = samples
+        self.thread_id = thread_id
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling.
+
+    A request gets a full cProfile + tracemalloc capture when it carries
+    the profile header or is picked by the sampling rate. Independently,
+    if a slow-request threshold is set, every request's stack is sampled
+    and the samples are kept only for requests slower than the threshold.
+    """
+
+    def __init__(self, enabled=PROFILING_ENABLED, sample_rate=PROFILE_SAMPLE_RATE, header=PROFILE_HEADER,
+                 slow_threshold_ms=SLOW_REQUEST_THRESHOLD_MS, max_captures=PROFILE_MAX_CAPTURES,
+                 sample_interval_ms=STACK_SAMPLE_INTERVAL_MS):
+        """
+        Args:
+            enabled: Master switch; when False every hook returns immediately
+            sample_rate: Fraction of requests to profile fully (0 disables)
+            header: Request header that forces a full profile
+            slow_threshold_ms: Keep stack samples of requests slower than
+                this (0 disables)
+            max_captures: Number of captures kept in memory
+            sample_interval_ms: Stack sampling interval
+        """
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.header = header
+        self.slow_threshold = slow_threshold_ms / 1000.0
+        self.captures = deque(maxlen=max_captures)
+        self.sampler = StackSampler(sample_interval_ms) if enabled and slow_threshold_ms > 0 else None
+        # cProfile and tracemalloc are process-wide, so one full capture at a time
+        self._full_capture = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def begin(self, headers):
+        """
+        Start profiling a request if it qualifies.
+
+        Args:
+            headers: Request headers (mapping)
+
+        Returns:
+            ProfileSession, or None when nothing is captured
+        """
+        if not self.enabled:
+            return None
+
+        reason = None
+        if headers.get(self.header):
+            reason = 'header'
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            reason = 'sampled'
+
+        session = None
+        if reason and self._full_capture.acquire(blocking=False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) is active
+                self._full_capture.release()
+            else:
+                tracing = not tracemalloc.is_tracing()
+                if tracing:
+                    tracemalloc.start()
+                session = ProfileSession(reason=reason, profile=profile, tracing=tracing)
+
+        if self.sampler is not None:
+            session = session or ProfileSession()
+            session.thread_id = threading.get_ident()
+            session.samples = self.sampler.register(session.thread_id)
+        return session
+
+    def end(self, session, method, path, status, duration):
+        """
+        Finish a request and store a capture if one was taken.
+
+        Args:
+            session: Value returned by ``begin``
+            method, path, status: Request summary
+            duration: Request duration in seconds
+        """
+        if session is None:
+            return
+        if session.samples is not None:
+            self.sampler.unregister(session.thread_id)
+
+        capture = None
+        if session.profile is not None:
+            session.profile.disable()
+            try:
+                capture = self._new_capture(session.reason, method, path, status, duration)
+                capture['profile'] = _format_profile(session.profile)
+                capture['memory'] = _format_memory()
+            finally:
+                if session.tracing:
+                    tracemalloc.stop()
+                self._full_capture.release()
+
+        if session.samples is not None and duration >= self.slow_threshold:
+            capture = capture or self._new_capture('slow', method, path, status, duration)
+            capture['stack_samples'] = [
+                {'stack': stack, 'count': count} for stack, count in session.samples.most_common(TOP_ENTRIES)
+            ]
+
+        if capture is not None:
+            self.captures.append(capture)
+
+    def _new_capture(self, reason, method, path, status, duration):
+        return {
+            'id': next(self._ids),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'reason': reason,
+            'method': method,
+            'path': path,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+        }
+
+    def list_captures(self):
+        """Summaries of stored captures, newest first."""
+        return [
+            {k: v for k, v in capture.items() if k not in ('profile', 'memory', 'stack_samples')}
+            for capture in reversed(self.captures)
+        ]
+
+    def get_capture(self, capture_id):
+        """Full capture by ID, or None."""
+        for capture in self.captures:
+            if capture['id'] == capture_id:
+                return capture
+        return None
+
+def _format_profile(profile):
+    """Top functions by cumulative time as pstats text."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats('cumulative').print_stats(TOP_ENTRIES)
+    return stream.getvalue()
+
+def _format_memory():
+    """Top allocation sites and peak traced memory of the request."""
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    top = snapshot.statistics('lineno')[:TOP_ENTRIES]
+    return {
+        'current_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'top_allocations': [
+            {'location': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in top
+        ]
+    }
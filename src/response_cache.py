@@ -0,0 +1,140 @@
+import sys
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from flask import request, current_app, Response
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_GZIP_MIN_BYTES
+from src.instrumentation import record_cache
+
+class CachedBody:
+    """Serialized response body with its gzip copy (large bodies only) and ETags."""
+
+    __slots__ = ('body', 'gzipped', 'mimetype', 'etag', 'size')
+
+    def __init__(self, body, mimetype, gzip_min_bytes):
+        self.body = body
+        self.mimetype = mimetype
+        self.gzipped = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= gzip_min_bytes else None
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.size = len(body) + len(self.gzipped or b'')
+
+class ResponseCache:
+    """
+    Conditional GET and gzip for read-heavy JSON endpoints.
+
+    Views wrapped with ``cached(*sources)`` are keyed by endpoint, URL
+    arguments, query string and the current version of every source they
+    read. While the versions are unchanged the serialized body is served
+    from memory (LRU within ``max_bytes``) without running the view, and a
+    client sending a matching ``If-None-Match`` gets a bodyless 304.
+
+    A source is either a callable returning its version (e.g.
+    database.db.data_version) or an in-process counter advanced with
+    ``bump()``. ETags hash the body itself, so they stay valid across
+    restarts and worker processes, and a version change that leaves the
+    payload unchanged (an unrelated commit) still ends in a 304.
+    """
+
+    def __init__(self, sources=None, max_bytes=RESPONSE_CACHE_MAX_BYTES, gzip_min_bytes=RESPONSE_GZIP_MIN_BYTES):
+        """
+        Args:
+            sources: Dictionary of source name -> callable returning a hashable version
+            max_bytes: Memory budget of cached bodies (gzip copies included)
+            gzip_min_bytes: Bodies at least this large are also sent gzip-compressed
+        """
+        self.sources = dict(sources or {})
+        self.max_bytes = max_bytes
+        self.gzip_min_bytes = gzip_min_bytes
+        self._counters = {}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def bump(self, source):
+        """Invalidate every cached response that depends on the counter ``source``."""
+        with self._lock:
+            self._counters[source] = self._counters.get(source, 0) + 1
+
+    def versions(self, sources):
+        """Current version of each source, in order."""
+        return tuple(self.sources[name]() if name in self.sources else self._counters.get(name, 0)
+                     for name in sources)
+
+    def clear(self):
+        """Drop all cached bodies."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache('responses', entry is not None)
+        return entry
+
+    def _put(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def _respond(self, entry):
+        """304 if the client's copy matches, else the (gzip-encoded if accepted) body."""
+        gzipped = entry.gzipped is not None and 'gzip' in request.accept_encodings
+        # Each encoding is a separate representation with its own ETag
+        etag = f'{entry.etag}-gzip' if gzipped else entry.etag
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(entry.gzipped if gzipped else entry.body, mimetype=entry.mimetype)
+            if gzipped:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag)
+        # Browsers may keep the body but must revalidate it on every use
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def cached(self, *sources):
+        """
+        Decorator caching a GET view's 200 responses until one of ``sources`` changes.
+
+        Args:
+            *sources: Names of the versions the view's output depends on
+                (none for static responses)
+
+        Returns:
+            View decorator
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Versions are read before the view runs, so a cached body is never older than its key
+                key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string,
+                       self.versions(sources))
+                entry = self._get(key)
+                if entry is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    entry = CachedBody(response.get_data(), response.mimetype, self.gzip_min_bytes)
+                    self._put(key, entry)
+                return self._respond(entry)
+            return wrapper
+        return decorator
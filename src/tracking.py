@@ -0,0 +1,104 @@
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import FEATURE_NAMES
+from src.code_metrics import scan_tree
+from database.db import get_tracked_modules, save_module_scores
+
+def features_fingerprint(module):
+    """
+    Canonical JSON and hash of a module's feature vector.
+
+    Returns:
+        (features JSON, hex digest)
+    """
+    features = json.dumps({name: float(module[name]) for name in FEATURE_NAMES}, sort_keys=True)
+    return features, hashlib.sha1(features.encode()).hexdigest()
+
+def rescore_tree(root, predictor, repo=None, workers=None, cache=None, history=None):
+    """
+    Incrementally score the modules of a source tree.
+
+    Every module is identified by (repo, path). Only modules that are new,
+    whose feature vector changed, or that were scored by another model
+    version are predicted again; those get their tracked row updated and
+    one history row describing the change. Modules that disappeared are
+    removed and recorded as 'removed'.
+
+    Args:
+        root: Directory to scan
+        predictor: FailGuardPredictor
+        repo: Repository identifier (default: resolved path of ``root``)
+        workers, cache, history: See code_metrics.scan_tree
+
+    Returns:
+        Dict with counts of scanned, unchanged, new, rescored, removed and
+        unparsable modules, plus the list of changes
+
+    Raises:
+        RuntimeError: If the scores could not be saved (nothing is saved)
+    """
+    repo = repo or str(Path(root).resolve())
+    modules, _ = scan_tree(root, workers=workers, cache=cache, history=history)
+    parsed = [module for module in modules if module['error'] is None]
+    tracked = get_tracked_modules(repo)
+    version = predictor.model_version
+
+    changed = []
+    for module in parsed:
+        features, digest = features_fingerprint(module)
+        previous = tracked.get(module['path'])
+        reasons = []
+        if previous is None:
+            reasons.append('new')
+        else:
+            if previous['features_hash'] != digest:
+                reasons.append('metrics')
+            if previous['model_version'] != version:
+                reasons.append('model')
+        if reasons:
+            changed.append((module, features, digest, ','.join(reasons), previous))
+
+    scored = []
+    if changed:
+        predictions = predictor.predict_batch([{name: m[name] for name in FEATURE_NAMES} for m, *_ in changed])
+        for (module, features, digest, change, previous), result in zip(changed, predictions):
+            scored.append({
+                'path': module['path'],
+                'change': change,
+                'features': features,
+                'features_hash': digest,
+                'model_version': version,
+                'risk_level': result['risk_level'],
+                'probability': result['probability'],
+                'confidence': result['confidence'],
+                'prediction': result['prediction'],
+                'previous_risk_level': previous['risk_level'] if previous else None,
+                'previous_probability': previous['probability'] if previous else None,
+            })
+
+    present = {module['path'] for module in parsed}
+    # Unparsable files keep their last score until they parse again
+    present.update(module['path'] for module in modules if module['error'] is not None)
+    removed = [path for path in tracked if path not in present]
+
+    if (scored or removed) and not save_module_scores(repo, scored, removed):
+        raise RuntimeError(f"Could not save module scores of {repo}")
+
+    new = sum(1 for module in scored if module['change'] == 'new')
+    return {
+        'repo': repo,
+        'model_version': version,
+        'scanned': len(modules),
+        'unchanged': len(parsed) - len(scored),
+        'new': new,
+        'rescored': len(scored) - new,
+        'removed': len(removed),
+        'errors': len(modules) - len(parsed),
+        'changes': scored,
+    }
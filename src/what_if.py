@@ -0,0 +1,186 @@
+import sys
+from pathlib import Path
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import FEATURE_NAMES, RISK_THRESHOLDS, WHAT_IF_DEFAULT_STEPS, WHAT_IF_MAX_GRID
+
+RISK_BANDS = ['LOW', 'MEDIUM', 'HIGH']
+
+def risk_band_index(probabilities):
+    """
+    Vectorized get_risk_label: 0 for LOW, 1 for MEDIUM, 2 for HIGH.
+
+    Args:
+        probabilities: Array of probabilities (0-1)
+
+    Returns:
+        Integer array of band indices
+    """
+    probabilities = np.asarray(probabilities)
+    return (probabilities >= RISK_THRESHOLDS['LOW']).astype(int) + (probabilities >= RISK_THRESHOLDS['MEDIUM'])
+
+def parse_range(spec):
+    """
+    Values to try for one feature.
+
+    Args:
+        spec: List of values, or dict with 'min', 'max' and optional 'steps'
+
+    Returns:
+        1D array of sorted unique values
+
+    Raises:
+        ValueError: If the spec is malformed or has more than WHAT_IF_MAX_GRID values
+    """
+    if isinstance(spec, dict):
+        try:
+            low, high = float(spec['min']), float(spec['max'])
+            steps = int(spec.get('steps', WHAT_IF_DEFAULT_STEPS))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Range must have numeric 'min' and 'max' (and optional integer 'steps')")
+        if steps < 2 or high < low:
+            raise ValueError("Range needs steps >= 2 and max >= min")
+        # Checked before allocating: no grid can hold more values than this
+        if steps > WHAT_IF_MAX_GRID:
+            raise ValueError(f"Range has {steps} steps; the maximum is {WHAT_IF_MAX_GRID}")
+        return np.linspace(low, high, steps)
+    if isinstance(spec, list) and spec:
+        if len(spec) > WHAT_IF_MAX_GRID:
+            raise ValueError(f"Range has {len(spec)} values; the maximum is {WHAT_IF_MAX_GRID}")
+        try:
+            return np.unique(np.array(spec, dtype=np.float64))
+        except (TypeError, ValueError):
+            raise ValueError("Range values must be numbers")
+    raise ValueError("Range must be a non-empty list of values or a {'min', 'max', 'steps'} object")
+
+def build_perturbation_matrix(base, ranges):
+    """
+    One matrix holding the base vector, per-feature curves and the full grid.
+
+    Rows are laid out as [base, curve of feature 1, ..., curve of feature k,
+    Cartesian grid of all ranged features]; curve rows vary one feature and
+    keep the others at their base value.
+
+    Args:
+        base: 1D array of base features in FEATURE_NAMES order
+        ranges: Dict of feature name -> 1D array of values
+
+    Returns:
+        (matrix, curve slices by feature, grid slice, grid values as (rows, k) array)
+
+    Raises:
+        ValueError: If the grid exceeds WHAT_IF_MAX_GRID rows
+    """
+    names = list(ranges)
+    columns = [FEATURE_NAMES.index(name) for name in names]
+    grid_size = int(np.prod([len(ranges[name]) for name in names]))
+    if grid_size > WHAT_IF_MAX_GRID:
+        raise ValueError(f"Perturbation grid has {grid_size} points; the maximum is {WHAT_IF_MAX_GRID}")
+
+    curve_rows = sum(len(ranges[name]) for name in names)
+    matrix = np.tile(base, (1 + curve_rows + grid_size, 1))
+
+    curves = {}
+    start = 1
+    for name, column in zip(names, columns):
+        values = ranges[name]
+        matrix[start:start + len(values), column] = values
+        curves[name] = slice(start, start + len(values))
+        start += len(values)
+
+    mesh = np.meshgrid(*[ranges[name] for name in names], indexing='ij')
+    grid_values = np.stack([axis.ravel() for axis in mesh], axis=1)
+    matrix[start:, columns] = grid_values
+    return matrix, curves, slice(start, None), grid_values
+
+def cheapest_change(base, base_probability, names, grid_values, grid_probabilities, scale):
+    """
+    Smallest perturbation that moves the module to a lower risk band.
+
+    The cost of a grid point is the sum of absolute feature changes in
+    training standard deviations, so changing a feature by its typical
+    spread costs 1 whatever its unit. Ties go to the lower probability.
+
+    Args:
+        base: 1D array of base features in FEATURE_NAMES order
+        base_probability: Probability of the base vector
+        names: Ranged feature names (columns of ``grid_values``)
+        grid_values: (rows, k) values of the ranged features
+        grid_probabilities: (rows,) probabilities of the grid points
+        scale: 1D array of per-feature training standard deviations
+
+    Returns:
+        Dict describing the change, or None if no grid point has a lower band
+    """
+    candidates = np.flatnonzero(risk_band_index(grid_probabilities) < risk_band_index(base_probability))
+    if candidates.size == 0:
+        return None
+
+    columns = [FEATURE_NAMES.index(name) for name in names]
+    costs = np.abs((grid_values[candidates] - base[columns]) / scale[columns]).sum(axis=1)
+    order = np.lexsort((grid_probabilities[candidates], costs))
+    best = candidates[order[0]]
+    probability = float(grid_probabilities[best])
+    return {
+        'changes': {
+            name: {'from': float(old), 'to': float(new)}
+            for name, old, new in zip(names, base[columns], grid_values[best]) if new != old
+        },
+        'cost': round(float(costs[order[0]]), 4),
+        'probability': round(probability * 100, 2),
+        'risk_level': RISK_BANDS[int(risk_band_index(probability))],
+    }
+
+def analyze_what_if(predictor, features_dict, range_specs):
+    """
+    Response curves and cheapest risk-reducing change for one module.
+
+    The base vector, every curve point and the full perturbation grid are
+    scored together with one call to ``predictor.predict_proba_matrix``.
+
+    Args:
+        predictor: Ready FailGuardPredictor
+        features_dict: Base feature values (missing features default to 0)
+        range_specs: Dict of feature name -> range spec (see parse_range)
+
+    Returns:
+        Dict with 'base', 'curves', 'grid_size' and 'cheapest_change'
+
+    Raises:
+        ValueError: For unknown features or malformed/oversized ranges
+    """
+    if not isinstance(range_specs, dict) or not range_specs:
+        raise ValueError("'ranges' must map at least one feature to a range")
+    unknown = sorted(set(range_specs) - set(FEATURE_NAMES))
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+
+    ranges = {name: parse_range(spec) for name, spec in range_specs.items()}
+    base = np.array([float(features_dict.get(name, 0)) for name in FEATURE_NAMES])
+    matrix, curves, grid, grid_values = build_perturbation_matrix(base, ranges)
+    probabilities = predictor.predict_proba_matrix(matrix)
+
+    def points(probs):
+        return {
+            'probability': [round(float(p) * 100, 2) for p in probs],
+            'risk_level': [RISK_BANDS[band] for band in risk_band_index(probs)],
+        }
+
+    base_probability = float(probabilities[0])
+    return {
+        'base': {
+            'features': {name: float(value) for name, value in zip(FEATURE_NAMES, base)},
+            'probability': round(base_probability * 100, 2),
+            'risk_level': RISK_BANDS[int(risk_band_index(base_probability))],
+        },
+        'curves': {
+            name: {'values': ranges[name].tolist(), **points(probabilities[rows])}
+            for name, rows in curves.items()
+        },
+        'grid_size': len(grid_values),
+        'cheapest_change': cheapest_change(
+            base, base_probability, list(ranges), grid_values, probabilities[grid], predictor.scaler.scale_),
+    }
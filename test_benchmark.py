@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""Test the benchmark suite runner and regression comparison"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import benchmark
+import database.db as db
+
+def test_compare_results():
+    """Regressions respect the direction of each metric"""
+    print("\n=== Testing result comparison ===")
+    baseline = {
+        'a.p50_ms': benchmark.metric(1.0, 'ms', 'lower'),
+        'b.rows_per_s': benchmark.metric(1000, 'rows/s', 'higher'),
+        'c.p50_ms': benchmark.metric(1.0, 'ms', 'lower'),
+    }
+    current = {
+        'a.p50_ms': benchmark.metric(1.5, 'ms', 'lower'),
+        'b.rows_per_s': benchmark.metric(800, 'rows/s', 'higher'),
+        'c.p50_ms': benchmark.metric(0.5, 'ms', 'lower'),
+    }
+    rows = {row[0]: row for row in benchmark.compare_results(baseline, current, threshold=0.1)}
+    assert rows['a.p50_ms'][4] and rows['b.rows_per_s'][4]
+    assert not rows['c.p50_ms'][4]
+    print("✓ Latency increases and throughput drops flagged as regressions")
+
+def test_small_run_writes_json():
+    """A small persistence + batch run writes JSON and leaves the app database alone"""
+    print("\n=== Testing small benchmark run ===")
+    original_path = db.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'results.json'
+        argv = ['--suites', 'batch', 'persistence', '--batch-sizes', '1', '10',
+                '--db-sizes', '100', '--db-writes', '5', '--rounds', '1', '--output', str(output)]
+        assert benchmark.main(argv) == 0
+
+        report = json.loads(output.read_text())
+        assert 'commit' in report['meta']
+        assert 'persistence.rows_100.save_prediction_ops_per_s' in report['results']
+        assert 'batch.sklearn.size_10.rows_per_s' in report['results']
+
+        # Comparing a run with itself reports no regressions
+        assert benchmark.main(argv[:-2] + ['--compare', str(output), '--threshold', '10']) == 0
+    assert db.DB_PATH == original_path
+    print("✓ Benchmark results written and compared")
+
+if __name__ == '__main__':
+    test_compare_results()
+    test_small_run_writes_json()
+    print("\n✓ All benchmark tests passed!\n")
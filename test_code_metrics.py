@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Test the source-tree metric extractor"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.code_metrics import analyze_source, scan_tree, score_tree, MetricsCache
+from config import FEATURE_NAMES
+
+SAMPLE = '''
+import os
+from collections import defaultdict
+
+class Account:
+    def __init__(self, owner):
+        self.owner = owner
+        self.balance = 0
+
+    def deposit(self, amount):
+        if amount <= 0 or amount > 1000:
+            raise ValueError("bad amount")
+        self.balance += amount
+
+    def describe(self):
+        return self.owner
+
+def helper(items):
+    # comment lines are not counted
+    return [os.path.basename(i) for i in items if i]
+'''
+
+def test_analyze_source():
+    """Metrics of a small module match hand-computed values"""
+    print("\n=== Testing metric extraction ===")
+    metrics = analyze_source(SAMPLE)
+    assert metrics['loc'] == 14
+    # __init__ 1, deposit 1 + if + or, describe 1, helper 1 + comprehension + if
+    assert metrics['wmc'] == 1 + 3 + 1 + 3
+    # 4 functions + calls ValueError, basename
+    assert metrics['rfc'] == 6
+    assert metrics['cbo'] == 2
+    # owner used by 2 of 3 methods, balance by 2: (2 - 3) / (1 - 3)
+    assert metrics['lcom'] == 0.5
+    print(f"✓ Metrics: { {name: value for name, value in metrics.items() if name != 'classes'} }")
+
+    # Class metrics cover the class body only; the base class and imports count as coupling
+    nested = SAMPLE + 'class Ledger(Account):\n    class Entry:\n        pass\n    def total(self):\n        return defaultdict(int)\n'
+    account, ledger, entry = analyze_source(nested)['classes']
+    assert account == {'name': 'Account', 'line': 5, 'loc': 10, 'wmc': 5, 'rfc': 4, 'cbo': 0, 'lcom': 0.5,
+                       'num_methods': 3}
+    assert (ledger['cbo'], ledger['wmc'], ledger['num_methods']) == (2, 1, 1)
+    assert entry['name'] == 'Ledger.Entry' and entry['loc'] == 2
+    print(f"✓ Class metrics: {account}")
+
+def test_scan_uses_content_hash_cache():
+    """Rescans only parse changed files"""
+    print("\n=== Testing scan cache ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / 'repo'
+        (root / 'pkg').mkdir(parents=True)
+        (root / 'pkg' / 'a.py').write_text(SAMPLE)
+        (root / 'pkg' / 'b.py').write_text('def f(x):\n    return x\n')
+        (root / 'broken.py').write_text('def (:\n')
+        (root / '__pycache__').mkdir()
+        (root / '__pycache__' / 'skip.py').write_text('x = 1\n')
+        cache = MetricsCache(Path(tmp) / 'cache.db')
+
+        modules, stats = scan_tree(root, workers=2, cache=cache)
+        assert stats == {'files': 3, 'cache_hits': 0, 'parsed': 3}
+        by_path = {m['path']: m for m in modules}
+        assert by_path['broken.py']['error'].startswith('SyntaxError')
+        assert all(name in by_path['pkg/a.py'] for name in FEATURE_NAMES)
+
+        (root / 'pkg' / 'b.py').write_text('def f(x):\n    return x if x else 0\n')
+        modules, stats = scan_tree(root, workers=1, cache=cache)
+        assert stats['cache_hits'] == 2 and stats['parsed'] == 1
+        assert {m['path']: m for m in modules}['pkg/b.py']['wmc'] == 2
+        print(f"✓ Rescan parsed {stats['parsed']} changed file")
+
+        classes, stats = scan_tree(root, workers=1, cache=cache, level='class')
+        assert stats['parsed'] == 0
+        assert [m['path'] for m in classes] == ['broken.py', 'pkg/a.py::Account']
+        assert classes[1]['lcom'] == 0.5 and all(name in classes[1] for name in FEATURE_NAMES)
+        print("✓ Class-level scan served from the cache")
+
+def test_score_tree():
+    """Scanned modules are scored with one batch prediction"""
+    print("\n=== Testing tree scoring ===")
+    from models.predict import load_model
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, 'mod.py').write_text(SAMPLE)
+        history = {'mod.py': {'code_churn': 12, 'num_developers': 4}}
+        modules, _ = score_tree(tmp, load_model(), workers=1, history=history)
+    assert modules[0]['code_churn'] == 12 and modules[0]['past_defects'] == 0
+    assert modules[0]['risk_level'] in ('LOW', 'MEDIUM', 'HIGH')
+    print(f"✓ mod.py scored {modules[0]['risk_level']} ({modules[0]['probability']}%)")
+
+if __name__ == '__main__':
+    test_analyze_source()
+    test_scan_uses_content_hash_cache()
+    test_score_tree()
+    print("\n✓ All code metrics tests passed!\n")
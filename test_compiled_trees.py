@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Test the compiled tree-ensemble scoring engine"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.tree_engine import compile_tree_ensemble, load_compiled_model
+
+def make_data(n_samples=600, seed=0):
+    """Synthetic scaled data with a non-linear decision boundary."""
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n_samples, 8)
+    y = ((X[:, 0] * X[:, 1] + X[:, 2] ** 2 + 0.5 * rng.randn(n_samples)) > 1).astype(int)
+    return X, y
+
+def test_random_forest_matches_sklearn():
+    """Compiled Random Forest gives the same probabilities as sklearn"""
+    print("\n=== Testing compiled Random Forest ===")
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=30, random_state=42, class_weight='balanced').fit(X, y)
+    compiled = compile_tree_ensemble(model)
+
+    expected = model.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)
+    assert np.allclose(actual, expected, atol=1e-12), np.abs(actual - expected).max()
+    assert np.array_equal(actual > 0.5, model.predict(X) == 1)
+    print(f"✓ {compiled.n_trees} trees, max abs diff {np.abs(actual - expected).max():.2e}")
+
+def test_xgboost_matches_booster():
+    """Compiled XGBoost gives the same probabilities as xgboost"""
+    print("\n=== Testing compiled XGBoost ===")
+    X, y = make_data()
+    model = XGBClassifier(n_estimators=50, random_state=42, verbosity=0).fit(X, y)
+    compiled = compile_tree_ensemble(model)
+
+    expected = model.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)
+    assert np.allclose(actual, expected, atol=1e-6), np.abs(actual - expected).max()
+
+    # Missing values follow the learned default direction
+    X_missing = X.copy()
+    X_missing[::3, 0] = np.nan
+    assert np.allclose(compiled.predict_proba(X_missing), model.predict_proba(X_missing)[:, 1], atol=1e-6)
+    print(f"✓ {compiled.n_trees} trees, max abs diff {np.abs(actual - expected).max():.2e}")
+
+def test_save_and_load_roundtrip():
+    """Compiled artifact loads from .npz with the embedded scaler"""
+    print("\n=== Testing compiled artifact roundtrip ===")
+    X, y = make_data()
+    X_raw = X * 10 + 50
+    scaler = StandardScaler().fit(X_raw)
+    model = RandomForestClassifier(n_estimators=10, random_state=42).fit(scaler.transform(X_raw), y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'compiled.npz'
+        compile_tree_ensemble(model, scaler).save(path)
+        loaded = load_compiled_model(path)
+
+    expected = model.predict_proba(scaler.transform(X_raw))[:, 1]
+    assert np.allclose(loaded.predict_proba(loaded.standardize(X_raw)), expected, atol=1e-12)
+    print("✓ Roundtrip predictions match")
+
+def test_float32_quantization():
+    """float32 ensembles halve memory and stay within tolerance"""
+    print("\n=== Testing float32 quantization ===")
+    from models.train_model import validate_quantized_model
+
+    X, y = make_data()
+    X_raw = X * 10 + 50
+    scaler = StandardScaler().fit(X_raw)
+    X_scaled = scaler.transform(X_raw)
+    for model in (RandomForestClassifier(n_estimators=20, random_state=42).fit(X_scaled, y),
+                  XGBClassifier(n_estimators=30, random_state=42, verbosity=0).fit(X_scaled, y)):
+        compiled = compile_tree_ensemble(model, scaler)
+        quantized = compiled.astype_float32()
+        assert quantized.precision == 'float32'
+        assert quantized.feature.dtype == np.int16
+        assert quantized.nbytes <= compiled.nbytes * 0.6
+
+        report = validate_quantized_model(compiled, quantized, X_raw)
+        assert report['passed'], report
+        print(f"✓ {type(model).__name__}: max diff {report['max_abs_diff']:.2e}, "
+              f"{compiled.nbytes} -> {quantized.nbytes} bytes")
+
+    # Thresholds are rounded down, so float32 splits are exact
+    rf = compile_tree_ensemble(RandomForestClassifier(n_estimators=5, random_state=0).fit(X_scaled, y))
+    assert np.all(rf.astype_float32().threshold <= rf.threshold)
+    X32 = X_scaled.astype(np.float32)
+    assert np.array_equal(rf.apply(X32), rf.astype_float32().apply(X32))
+
+if __name__ == '__main__':
+    test_random_forest_matches_sklearn()
+    test_xgboost_matches_booster()
+    test_save_and_load_roundtrip()
+    test_float32_quantization()
+    print("\n✓ All compiled engine tests passed!\n")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Test parallel stratified k-fold cross-validation of the candidate models"""
+
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.train_model import make_folds, cross_validate_models, select_best_model
+
+def make_data(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.8, size=n) > 1.5).astype(int)
+    return X, y
+
+def make_models(depth=3):
+    return {
+        'Logistic Regression': LogisticRegression(max_iter=1000, class_weight='balanced'),
+        'Decision Tree': DecisionTreeClassifier(max_depth=depth, random_state=0),
+    }
+
+def test_folds():
+    """Every fold keeps the class balance of the whole set"""
+    print("\n=== Testing stratified folds ===")
+    X, y = make_data()
+    fold_ids = make_folds(y, n_splits=5)
+    assert fold_ids.dtype == np.int8 and set(fold_ids) == set(range(5))
+    for fold in range(5):
+        assert abs(y[fold_ids == fold].mean() - y.mean()) < 0.02
+    assert np.array_equal(fold_ids, make_folds(y, n_splits=5))
+    print(f"✓ 5 folds, positive rate {y.mean():.3f}")
+
+def test_cross_validation():
+    """Parallel runs match inline ones; cached predictions skip refitting"""
+    print("\n=== Testing cross_validate_models ===")
+    X, y = make_data()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        inline = cross_validate_models(make_models(), X, y, n_splits=4, n_jobs=1, cache_dir=None)
+        steps = []
+        parallel = cross_validate_models(make_models(), X, y, n_splits=4, n_jobs=2, cache_dir=cache_dir,
+                                         progress=lambda fraction, message: steps.append(fraction))
+        assert len(steps) == 8 and steps[-1] == 1.0 and not parallel.cached
+        for name in inline.predictions:
+            assert np.allclose(inline.predictions[name], parallel.predictions[name]), name
+        assert inline.summary() == parallel.summary()
+        assert set(inline.summary()['Decision Tree']) == {'accuracy', 'precision', 'recall', 'f1_score', 'roc_auc'}
+        print("✓ 2 workers match the inline run")
+
+        again = cross_validate_models(make_models(), X, y, n_splits=4, n_jobs=2, cache_dir=cache_dir)
+        assert again.cached == {'Logistic Regression', 'Decision Tree'}
+        assert again.summary() == parallel.summary()
+
+        # Only the candidate whose parameters changed is refitted; its old entry is pruned
+        changed = cross_validate_models(make_models(depth=5), X, y, n_splits=4, n_jobs=1, cache_dir=cache_dir)
+        assert changed.cached == {'Logistic Regression'}
+        assert len(list(Path(cache_dir).glob('*.npy'))) == 2
+        print("✓ Cached predictions reused")
+
+    # Metrics at another threshold come from the stored probabilities
+    strict = inline.fold_metrics('Logistic Regression', threshold=0.9)
+    loose = inline.fold_metrics('Logistic Regression', threshold=0.1)
+    assert len(strict) == 4 and np.mean([f['recall'] for f in strict]) < np.mean([f['recall'] for f in loose])
+
+    trained = {name: model.fit(X, y) for name, model in make_models().items()}
+    results = {'Logistic Regression': {'f1_score': 0.0}, 'Decision Tree': {'f1_score': 1.0}}
+    _, name = select_best_model(trained, results, inline)
+    assert name == inline.best_model()
+    print(f"✓ Selected {name} by cross-validated F1")
+
+# A script that starts the app at import time, like ``python app.py`` does, then cross-validates
+# while one of its own 'retrain' jobs is running
+APP_MAIN = '''
+import sys
+sys.path.insert(0, {root!r})
+
+import app
+from database import db
+from models.train_model import cross_validate_models
+from test_cross_validation import make_data, make_models
+
+if __name__ == '__main__':
+    job_id = db.create_job('retrain')
+    db.start_job(job_id)
+    X, y = make_data()
+    result = cross_validate_models(make_models(), X, y, n_splits=4, n_jobs=2, cache_dir=None)
+    assert set(result.predictions) == {{'Logistic Regression', 'Decision Tree'}}
+    app.scheduler.stop()
+    print('JOB STATUS', db.get_job(job_id)['status'])
+'''
+
+def test_cross_validation_from_app_main():
+    """Spawned workers re-import the app script without loading models or starting its jobs"""
+    print("\n=== Testing cross-validation under the app's __main__ ===")
+    root = str(Path(__file__).parent.resolve())
+    with tempfile.TemporaryDirectory() as tmp:
+        script = Path(tmp) / 'serve.py'
+        script.write_text(textwrap.dedent(APP_MAIN.format(root=root)))
+        # The relative prediction database is created inside the temporary directory
+        (Path(tmp) / 'database').mkdir()
+        completed = subprocess.run([sys.executable, str(script)], cwd=tmp, capture_output=True,
+                                   text=True, timeout=300)
+    assert completed.returncode == 0, completed.stderr
+    assert 'JOB STATUS running' in completed.stdout, completed.stdout
+    assert completed.stdout.count('Starting background metrics computation') == 1, completed.stdout
+    print("✓ Workers left the running job and the scheduler alone")
+
+if __name__ == '__main__':
+    test_folds()
+    test_cross_validation()
+    test_cross_validation_from_app_main()
+    print("\n✓ All cross-validation tests passed!\n")
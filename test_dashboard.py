@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Test the dashboard bootstrap document and its incrementally updated snapshot"""
+
+import sys
+import json
+import html
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from src.dashboard import DashboardSnapshot
+
+FEATURES = {'loc': 300, 'wmc': 12, 'rfc': 18, 'cbo': 6, 'lcom': 0.4,
+            'code_churn': 8, 'num_developers': 2, 'past_defects': 1}
+
+def save(snapshot, probability, risk_level):
+    """Save a prediction the way /api/predict does and apply it to the snapshot."""
+    version = snapshot.version()
+    result = {'risk_level': risk_level, 'probability': probability * 100,
+              'confidence': round(abs(probability - 0.5) * 200, 2), 'prediction': 'SAFE'}
+    prediction = db.get_prediction_by_id(db.save_prediction(FEATURES, result))
+    snapshot.add_prediction(prediction, version)
+    return prediction
+
+def test_snapshot():
+    """Deltas keep the snapshot equal to the database without re-reading it"""
+    print("\n=== Testing DashboardSnapshot ===")
+    reads = []
+    get_dashboard_data = db.get_dashboard_data
+    db.get_dashboard_data = lambda limit: reads.append(limit) or get_dashboard_data(limit)
+    try:
+        with temporary_database():
+            snapshot = DashboardSnapshot(limit=3)
+            for i in range(4):
+                save(snapshot, 0.1 + i / 10, 'LOW')
+            assert snapshot.read() == (db.get_prediction_stats(), db.get_all_predictions(limit=3))
+            assert len(reads) == 1
+
+            added = [save(snapshot, 0.9, 'HIGH') for _ in range(2)]
+            version = snapshot.version()
+            db.delete_prediction(added[0]['id'])
+            snapshot.remove_prediction(added[0], version)
+            stats, recent = snapshot.read()
+            assert stats == db.get_prediction_stats() and stats['risk_distribution'] == {'LOW': 4, 'HIGH': 1}
+            assert recent == db.get_all_predictions(limit=3)
+            assert len(reads) == 1
+
+            # A write the snapshot did not see is picked up by a rebuild
+            with db.get_db() as conn:
+                conn.execute('DELETE FROM predictions WHERE risk_level = ?', ('LOW',))
+                conn.commit()
+            assert snapshot.read()[0]['total'] == 1 and len(reads) == 2
+
+            # Deltas of concurrent requests arriving out of order fall back to a rebuild
+            version = snapshot.version()
+            save(snapshot, 0.9, 'HIGH')
+            result = {'risk_level': 'MEDIUM', 'probability': 50.0, 'confidence': 0.0, 'prediction': 'SAFE'}
+            snapshot.add_prediction(db.get_prediction_by_id(db.save_prediction(FEATURES, result)), version)
+            assert snapshot.read()[0] == db.get_prediction_stats() and len(reads) == 3
+
+            snapshot.max_age = 0
+            snapshot.read()
+            assert len(reads) == 4
+    finally:
+        db.get_dashboard_data = get_dashboard_data
+    print(f"✓ {len(reads)} database reads for 10 writes")
+
+def test_bootstrap():
+    """/dashboard embeds the bootstrap document; /api/dashboard serves it"""
+    print("\n=== Testing dashboard bootstrap ===")
+    import app as app_module
+    client = app_module.app.test_client()
+    with temporary_database():
+        page = client.get('/dashboard').data.decode()
+        start = page.index('id="dashboardBootstrap" type="application/json">') + 48
+        embedded = json.loads(html.unescape(page[start:page.index('</script>', start)]))
+        assert embedded['predictions'] == [] and embedded['stats']['total'] == 0
+        assert set(embedded) == {'metrics', 'metrics_computed', 'stats', 'predictions', 'chart_data',
+                                 'model_version', 'event_id'}
+
+        result = json.loads(client.post('/api/predict', json=dict(FEATURES)).data)
+        document = json.loads(client.get('/api/dashboard').data)
+        assert document['predictions'][0]['id'] == result['prediction_id']
+        assert document['stats'] == db.get_prediction_stats() == json.loads(client.get('/api/predictions/stats').data)
+        assert document['metrics'] == json.loads(client.get('/api/metrics').data)['metrics']
+    print("✓ Bootstrap document OK")
+
+if __name__ == '__main__':
+    test_snapshot()
+    test_bootstrap()
+    print("\n✓ All dashboard tests passed!\n")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Test the feature drift monitor"""
+
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from config import FEATURE_NAMES
+from src.drift import DriftMonitor, build_reference, psi, ks_distance, save_reference, load_reference
+
+def make_features(n_samples, seed=0, shift=0.0):
+    """Synthetic raw feature matrix; ``shift`` moves the first feature."""
+    rng = np.random.RandomState(seed)
+    X = rng.lognormal(mean=3, sigma=0.8, size=(n_samples, len(FEATURE_NAMES)))
+    X[:, 0] += shift
+    return X
+
+def test_scores():
+    """PSI and KS are 0 for identical histograms and grow with the shift"""
+    print("\n=== Testing drift scores ===")
+    assert psi([10, 20, 30], [1, 2, 3]) == 0 and ks_distance([10, 20, 30], [1, 2, 3]) == 0
+    assert psi([10, 20, 30], [30, 20, 10]) > psi([10, 20, 30], [15, 20, 25]) > 0
+    assert abs(ks_distance([1, 1], [1, 0]) - 0.5) < 1e-12
+    # Empty bins do not give infinite scores
+    assert np.isfinite(psi([0, 5, 5], [5, 5, 0]))
+    print("✓ Scores OK")
+
+def test_monitor_detects_shift():
+    """Matching traffic is stable; shifted traffic is flagged on that feature only"""
+    print("\n=== Testing drift monitor ===")
+    reference = build_reference(make_features(4000))
+    with tempfile.TemporaryDirectory() as tmp:
+        save_reference(reference, Path(tmp) / 'reference.json')
+        assert load_reference(Path(tmp) / 'reference.json') == reference
+        assert load_reference(Path(tmp) / 'missing.json') is None
+
+    monitor = DriftMonitor(reference)
+    report = monitor.check()
+    assert report['total']['samples'] == 0
+    assert report['total']['features']['loc']['status'] == 'insufficient_data'
+    assert report['total']['features']['loc']['statistics']['mean'] is None
+
+    for row in make_features(1000, seed=1):
+        monitor.observe(dict(zip(FEATURE_NAMES, row)))
+    report = monitor.check()
+    assert report['window']['samples'] == 1000 and not report['total']['drifted']
+    assert max(f['psi'] for f in report['total']['features'].values()) < 0.1
+
+    for row in make_features(1000, seed=2, shift=40):
+        monitor.observe(dict(zip(FEATURE_NAMES, row)))
+    report = monitor.check()
+    assert report['total']['samples'] == 2000
+    assert report['window']['drifted'] == ['loc']
+    assert report['window']['features']['loc']['status'] == 'significant'
+    assert report['window']['features']['loc']['ks'] > 0.3
+    # Streaming statistics of the window and of all predictions so far
+    shifted, unshifted = make_features(1000, seed=2, shift=40), make_features(1000, seed=1)
+    window_stats = report['window']['features']['loc']['statistics']
+    total_stats = report['total']['features']['loc']['statistics']
+    assert window_stats['count'] == 1000 and abs(window_stats['mean'] - shifted[:, 0].mean()) < 1e-6
+    assert total_stats['count'] == 2000
+    assert abs(total_stats['std'] - np.concatenate([unshifted[:, 0], shifted[:, 0]]).std()) < 1e-6
+    # Observation memory does not grow with traffic
+    assert monitor._total.shape == (len(FEATURE_NAMES), monitor._edges.shape[1] + 1)
+    print(f"✓ Shifted loc: PSI {report['window']['features']['loc']['psi']}, "
+          f"KS {report['window']['features']['loc']['ks']}")
+
+def test_schedule_and_api():
+    """The scheduler refreshes the report; /api/drift serves it"""
+    print("\n=== Testing drift schedule and API ===")
+    monitor = DriftMonitor(build_reference(make_features(1000)))
+    monitor.start(interval=0.05)
+    try:
+        deadline = time.time() + 5
+        while monitor.last_report is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert monitor.last_report is not None
+    finally:
+        monitor.stop()
+
+    import app as app_module
+    client = app_module.app.test_client()
+    if app_module.drift_monitor is None:
+        assert client.get('/api/drift').status_code == 503
+        print("✓ No reference: 503")
+        return
+    data = json.loads(client.get('/api/drift?refresh=1').data)
+    assert data['success'] and set(data['total']['features']) == set(FEATURE_NAMES)
+    print(f"✓ /api/drift over {data['total']['samples']} predictions")
+
+class FailingMonitor:
+    """Drift monitor whose observe always raises."""
+
+    def observe(self, features_dict):
+        raise ValueError('monitor failure')
+
+def test_predict_with_monitor_errors():
+    """/api/predict rejects non-finite features and survives a failing monitor"""
+    print("\n=== Testing /api/predict with the drift monitor ===")
+    import app as app_module
+    client = app_module.app.test_client()
+    features = {'loc': 300, 'wmc': 12, 'rfc': 18, 'cbo': 6, 'lcom': 0.4,
+                'code_churn': 8, 'num_developers': 2, 'past_defects': 1}
+    original = app_module.drift_monitor
+    with temporary_database():
+        for body in ('{"wmc": 1e999}', '{"lcom": NaN}', '{"loc": -Infinity}'):
+            response = client.post('/api/predict', data=body, content_type='application/json')
+            assert response.status_code == 400, body
+            assert 'finite' in json.loads(response.data)['error']
+        assert db.get_prediction_stats()['total'] == 0
+        print("✓ Non-finite features rejected before anything is saved")
+
+        app_module.drift_monitor = FailingMonitor()
+        try:
+            response = client.post('/api/predict', json=features)
+        finally:
+            app_module.drift_monitor = original
+        assert response.status_code == 200 and json.loads(response.data)['success']
+        assert db.get_prediction_stats()['total'] == 1
+    print("✓ A monitor error does not fail the prediction")
+
+if __name__ == '__main__':
+    test_scores()
+    test_monitor_detects_shift()
+    test_schedule_and_api()
+    test_predict_with_monitor_errors()
+    print("\n✓ All drift tests passed!\n")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Test the live dashboard feed (event bus and /api/stream)"""
+
+import re
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from src.events import EventBus, RESET_EVENT
+
+FEATURES = {'loc': 300, 'wmc': 12, 'rfc': 18, 'cbo': 6, 'lcom': 0.4,
+            'code_churn': 8, 'num_developers': 2, 'past_defects': 1}
+
+def drain(subscription):
+    """Events queued so far as (event, data) pairs."""
+    events = []
+    while (item := subscription.get(timeout=0)) is not None:
+        events.append(item[1:])
+    return events
+
+def test_event_bus():
+    """Subscribers get events in order; reconnects replay what they missed"""
+    print("\n=== Testing EventBus ===")
+    bus = EventBus(queue_size=3, replay_size=4, max_subscribers=2)
+    assert not bus.has_subscribers
+    bus.publish('ignored')
+    with bus.subscribe() as subscription:
+        first = bus.publish('prediction', {'id': 1})
+        bus.publish('stats', {'total': 1})
+        assert drain(subscription) == [('prediction', {'id': 1}), ('stats', {'total': 1})]
+
+        # A slow subscriber gets one reset instead of its backlog
+        for i in range(5):
+            bus.publish('prediction', {'id': i})
+        assert drain(subscription) == [(RESET_EVENT, None)]
+
+        with bus.subscribe() as second:
+            assert bus.subscribe() is None
+        assert bus.subscribe(last_event_id=first + 6) is not None
+    print("✓ Delivery, overflow and subscriber limit OK")
+
+    bus = EventBus(replay_size=4)
+    ids = [bus.publish('prediction', {'id': i}) for i in range(6)]
+    with bus.subscribe(last_event_id=ids[3]) as resumed:
+        assert drain(resumed) == [('prediction', {'id': 4}), ('prediction', {'id': 5})]
+    # Too far behind, or an id from before a restart
+    for stale in (ids[0], 12):
+        with bus.subscribe(last_event_id=stale) as resumed:
+            assert drain(resumed) == [(RESET_EVENT, None)]
+    with bus.subscribe(last_event_id=ids[-1]) as current:
+        assert drain(current) == []
+    print("✓ Last-Event-ID replay OK")
+
+def test_stream_api():
+    """/api/stream pushes predictions, stats deltas and deletions"""
+    print("\n=== Testing /api/stream ===")
+    import app as app_module
+    client = app_module.app.test_client()
+    with temporary_database():
+        stream = client.get('/api/stream')
+        assert stream.status_code == 200 and stream.mimetype == 'text/event-stream'
+        chunks = iter(stream.response)
+        assert next(chunks).startswith(b'retry:')
+
+        result = json.loads(client.post('/api/predict', json=dict(FEATURES)).data)
+        assert result['success'], result
+        client.delete(f"/api/predictions/{result['prediction_id']}")
+
+        events = []
+        for _ in range(4):
+            lines = next(chunks).decode().strip().split('\n')
+            events.append((lines[1][len('event: '):], json.loads(lines[2][len('data: '):])))
+        assert [name for name, _ in events] == ['prediction', 'stats', 'prediction_deleted', 'stats']
+        assert events[0][1]['id'] == result['prediction_id']
+        assert events[0][1]['risk_level'] == result['risk_level']
+        assert events[1][1]['total'] == 1 and events[1][1]['risk_distribution'] == {result['risk_level']: 1}
+        assert events[3][1]['total'] == -1
+        stream.close()
+        assert not app_module.event_bus.has_subscribers
+
+        # The dashboard script listens for every event the app publishes
+        page = client.get('/dashboard').data.decode()
+        published = set(re.findall(r"event_bus\.publish\('(\w+)'", Path(app_module.__file__).read_text()))
+        assert published == {'prediction', 'stats', 'prediction_deleted', 'model'}
+        for name in published | {RESET_EVENT}:
+            assert f"source.addEventListener('{name}'" in page, name
+    print("✓ Live feed OK")
+
+if __name__ == '__main__':
+    test_event_bus()
+    test_stream_api()
+    print("\n✓ All live feed tests passed!\n")
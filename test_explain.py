@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Test per-prediction explanations"""
+
+import sys
+import json
+import itertools
+from math import factorial
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.explain import TreeExplainer, build_explainer
+from models.tree_engine import _sklearn_trees, _xgboost_trees
+
+def make_data(n_samples=400, seed=0):
+    """Synthetic scaled data with feature interactions."""
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n_samples, 8)
+    y = ((X[:, 0] + X[:, 1] * X[:, 2] + 0.3 * rng.randn(n_samples)) > 0).astype(int)
+    return X, y
+
+def conditional_expectation(tree, x, subset, strict):
+    """Path-dependent E[f(x) | x_S]: features outside S follow both branches by cover."""
+    def visit(node):
+        if tree['left'][node] == -1:
+            return tree['value'][node]
+        left, right = tree['left'][node], tree['right'][node]
+        feature, threshold = tree['feature'][node], tree['threshold'][node]
+        if feature in subset:
+            value = np.float32(x[feature])
+            go_left = value < threshold if strict else value <= threshold
+            return visit(left if go_left else right)
+        cover = tree['cover']
+        return (visit(left) * cover[left] + visit(right) * cover[right]) / cover[node]
+    return visit(0)
+
+def brute_force_shap(trees, x, strict, scale):
+    """Shapley values by enumerating all feature subsets."""
+    n_features = len(x)
+    value = lambda subset: scale * sum(conditional_expectation(t, x, subset, strict) for t in trees)
+    phi = np.zeros(n_features)
+    for i in range(n_features):
+        others = [k for k in range(n_features) if k != i]
+        for size in range(n_features):
+            weight = factorial(size) * factorial(n_features - size - 1) / factorial(n_features)
+            for subset in itertools.combinations(others, size):
+                phi[i] += weight * (value(set(subset) | {i}) - value(set(subset)))
+    return phi
+
+def test_random_forest_exact():
+    """Random Forest contributions match brute-force Shapley values"""
+    print("\n=== Testing Random Forest explanations ===")
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=3, max_depth=5, random_state=0).fit(X, y)
+    explainer = TreeExplainer.from_model(model)
+    phi = explainer.shap_values(X[:3])
+
+    for row, x in zip(phi, X[:3]):
+        expected = brute_force_shap(_sklearn_trees(model), x, strict=False, scale=1 / 3)
+        assert np.allclose(row, expected, atol=1e-10), np.abs(row - expected).max()
+
+    # Local accuracy over a larger batch
+    phi = explainer.shap_values(X)
+    assert np.allclose(phi.sum(axis=1) + explainer.expected_value, model.predict_proba(X)[:, 1], atol=1e-10)
+    # Row blocks of any size (one row, seven rows) give the same contributions
+    row_bytes = 2 * explainer._factor_hot.nbytes
+    for max_bytes in (1, 7 * row_bytes):
+        assert np.allclose(explainer.shap_values(X, max_bytes=max_bytes), phi, atol=1e-12)
+    print(f"✓ Exact for {len(phi)} samples, base value {explainer.expected_value:.4f}")
+
+def test_xgboost_exact():
+    """XGBoost contributions match brute-force Shapley values in log-odds"""
+    print("\n=== Testing XGBoost explanations ===")
+    X, y = make_data()
+    model = XGBClassifier(n_estimators=4, max_depth=3, verbosity=0).fit(X, y)
+    explainer = TreeExplainer.from_model(model)
+    trees, _ = _xgboost_trees(model)
+    phi = explainer.shap_values(X[:3])
+
+    for row, x in zip(phi, X[:3]):
+        expected = brute_force_shap(trees, x, strict=True, scale=1.0)
+        assert np.allclose(row, expected, atol=1e-6), np.abs(row - expected).max()
+
+    phi = explainer.shap_values(X)
+    margin = model.predict(X, output_margin=True)
+    assert explainer.output == 'log_odds'
+    assert np.allclose(phi.sum(axis=1) + explainer.expected_value, margin, atol=1e-5)
+    print(f"✓ Exact for {len(phi)} samples")
+
+def test_linear_contributions():
+    """Linear contributions sum to the logit"""
+    print("\n=== Testing linear explanations ===")
+    X, y = make_data()
+    model = LogisticRegression().fit(X, y)
+    explainer = build_explainer(model)
+    phi = explainer.shap_values(X)
+    probability = model.predict_proba(X)[:, 1]
+    assert np.allclose(phi.sum(axis=1) + explainer.expected_value, np.log(probability / (1 - probability)))
+    print("✓ Contributions sum to log-odds")
+
+def test_predictor_cache_and_api():
+    """/api/predict returns explanations on request; repeats hit the cache"""
+    print("\n=== Testing explanation API ===")
+    from database.testing import temporary_database
+    from app import app, predictor
+
+    with temporary_database():
+        client = app.test_client()
+        features = {'loc': 500, 'wmc': 15, 'rfc': 20, 'cbo': 8, 'lcom': 0.5,
+                    'code_churn': 10, 'num_developers': 3, 'past_defects': 2}
+
+        data = json.loads(client.post('/api/predict', json=features).data)
+        assert data['success'] and 'explanation' not in data
+
+        data = json.loads(client.post('/api/predict', json={**features, 'explain': True}).data)
+        explanation = data['explanation']
+        assert 'explain' not in data['input_features']
+        assert set(explanation['contributions']) == set(features)
+        top = explanation['top_features']
+        assert abs(top[0]['contribution']) >= abs(top[-1]['contribution'])
+
+        predictor._explanations.clear()
+        data = json.loads(client.post('/api/predict?explain=1', json=features).data)
+        assert data['explanation'] == explanation
+        key = tuple(predictor._extract_features(features))
+        assert predictor._explanations[key] is predictor.explain(features)
+        print(f"✓ Top feature: {top[0]['feature']} ({top[0]['contribution']:+.4f})")
+
+if __name__ == '__main__':
+    test_random_forest_exact()
+    test_xgboost_exact()
+    test_linear_contributions()
+    test_predictor_cache_and_api()
+    print("\n✓ All explanation tests passed!\n")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Test streaming export of prediction history"""
+
+import sys
+import io
+import csv
+import json
+import gzip
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from src.export import csv_chunks
+
+def fill(n_rows):
+    """Insert ``n_rows`` predictions, a third of them on an older day."""
+    rows = [(100 + i, 5.0, 10.0, 3.0, 0.5, i % 7, 2, i % 3, ('LOW', 'MEDIUM', 'HIGH')[i % 3],
+             (i % 100) / 100, 50.0, 'SAFE') for i in range(n_rows)]
+    with db.get_db() as conn:
+        conn.executemany('''
+            INSERT INTO predictions (loc, wmc, rfc, cbo, lcom, code_churn, num_developers,
+                                     past_defects, risk_level, probability, confidence, prediction)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.execute("UPDATE predictions SET timestamp = '2026-01-01 12:00:00' WHERE id % 3 = 0")
+        conn.commit()
+
+def test_iterators():
+    """iter_predictions yields every row as a dict, oldest first"""
+    print("\n=== Testing prediction iterators ===")
+    with temporary_database():
+        fill(2500)
+        rows = list(db.iter_predictions(batch_size=1000))
+        assert len(rows) == 2500 and rows[0]['timestamp'] == '2026-01-01 12:00:00'
+        assert rows == sorted(rows, key=lambda row: (row['timestamp'], row['id']))
+
+        batches = db.iter_prediction_batches(batch_size=1000)
+        assert next(batches)[:2] == ['id', 'timestamp']
+        assert [len(batch) for batch in batches] == [1000, 1000, 500]
+        assert sum(1 for _ in db.iter_predictions(until='2026-01-02')) == 833
+        assert sum(1 for _ in db.iter_predictions(risk_level='HIGH')) == 833
+        print("✓ Batched iteration OK")
+
+        # Peak memory of a full CSV export does not grow with the table
+        peaks = []
+        for _ in range(2):
+            tracemalloc.start()
+            size = sum(len(chunk) for chunk in csv_chunks(db.iter_prediction_batches()))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            fill(10000)
+        assert peaks[1] < peaks[0] * 1.5, peaks
+        print(f"✓ Export of {size / 1e6:.1f} MB CSV peaked at {peaks[1] / 1e6:.2f} MB")
+
+def test_export_endpoint():
+    """CSV, NDJSON and gzip exports stream every row"""
+    print("\n=== Testing /api/predictions/export ===")
+    from app import app
+    with temporary_database():
+        n_rows = 30000
+        fill(n_rows)
+        client = app.test_client()
+
+        response = client.get('/api/predictions/export?format=csv', buffered=False)
+        assert response.headers['Content-Type'].startswith('text/csv')
+        assert 'Content-Length' not in response.headers
+        body = b''.join(response.response).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert len(rows) == n_rows and rows[-1]['risk_level'] in ('LOW', 'MEDIUM', 'HIGH')
+
+        lines = client.get('/api/predictions/export?format=ndjson&risk_level=LOW').data.decode().splitlines()
+        assert len(lines) == n_rows // 3 and json.loads(lines[0])['risk_level'] == 'LOW'
+
+        response = client.get('/api/predictions/export?format=ndjson&gzip=1&since=2026-01-02')
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert len(gzip.decompress(response.data).decode().splitlines()) == n_rows - n_rows // 3
+
+        assert client.get('/api/predictions/export?format=xml').status_code == 400
+        empty = client.get('/api/predictions/export?until=2000-01-01').data.decode()
+        assert empty.splitlines() == [','.join(rows[0].keys())]
+        print("✓ CSV, NDJSON, gzip and filters OK")
+
+if __name__ == '__main__':
+    test_iterators()
+    test_export_endpoint()
+    print("\n✓ All export tests passed!\n")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Test the fitted feature engineering pipeline and its use in FailGuardPredictor"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import FEATURE_NAMES
+from src.feature_engineering import FeatureEngineeringPipeline, save_feature_pipeline, load_feature_pipeline
+from models.predict import FailGuardPredictor
+
+def make_data(n_samples=300, seed=0):
+    """Raw features with an interaction driving the label."""
+    rng = np.random.RandomState(seed)
+    X = np.abs(rng.randn(n_samples, len(FEATURE_NAMES))) * [300, 10, 20, 5, 0.5, 10, 3, 2]
+    y = (X[:, 0] * X[:, 3] > np.median(X[:, 0] * X[:, 3])).astype(int)
+    return X, y
+
+def test_pipeline():
+    """Outputs match PolynomialFeatures; low-variance terms are dropped at fit time"""
+    print("\n=== Testing FeatureEngineeringPipeline ===")
+    X = np.random.RandomState(1).randn(50, len(FEATURE_NAMES))
+    pipeline = FeatureEngineeringPipeline(degree=2, variance_threshold=0.0).fit(X, FEATURE_NAMES)
+    expected = PolynomialFeatures(degree=2, include_bias=False).fit_transform(X)
+    assert np.allclose(pipeline.transform(X), expected)
+    assert pipeline.n_features_out_ == 44
+    assert pipeline.feature_names_out_[:9] == FEATURE_NAMES + ['loc^2']
+    assert 'loc*cbo' in pipeline.feature_names_out_
+
+    cubic = FeatureEngineeringPipeline(degree=3, variance_threshold=0.0).fit(X[:, :3], ['a', 'b', 'c'])
+    assert np.allclose(cubic.transform(X[:, :3]), PolynomialFeatures(degree=3, include_bias=False).fit_transform(X[:, :3]))
+
+    # Degree 1 keeps the inputs plus the configured interactions
+    linear = FeatureEngineeringPipeline(degree=1).fit(X, FEATURE_NAMES)
+    assert linear.feature_names_out_ == FEATURE_NAMES + ['loc*cbo']
+    assert np.allclose(linear.transform(X)[:, -1], X[:, 0] * X[:, 3])
+
+    X_constant = X.copy()
+    X_constant[:, 4] = 0.0
+    filtered = FeatureEngineeringPipeline().fit(X_constant, FEATURE_NAMES)
+    assert not any('lcom' in name for name in filtered.feature_names_out_)
+    assert filtered.n_features_out_ == 44 - 9
+    assert filtered.transform(X_constant).shape == (50, 35)
+
+    # Contributions credited back to the inputs keep their total
+    contributions = np.random.RandomState(2).randn(5, filtered.n_features_out_)
+    attributed = filtered.attribute(contributions)
+    assert attributed.shape == (5, 8) and np.allclose(attributed.sum(axis=1), contributions.sum(axis=1))
+    assert np.allclose(attributed[:, 4], 0.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'pipeline.joblib'
+        assert load_feature_pipeline(path) is None
+        save_feature_pipeline(filtered, path)
+        assert np.array_equal(load_feature_pipeline(path).transform(X), filtered.transform(X))
+    print(f"✓ {pipeline.n_features_out_} degree-2 terms, {filtered.n_features_out_} after variance selection")
+
+def test_predictor():
+    """FailGuardPredictor applies the saved pipeline between scaler and model"""
+    print("\n=== Testing predictor with feature pipeline ===")
+    X, y = make_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURE_NAMES))
+        X_scaled = scaler.transform(pd.DataFrame(X, columns=FEATURE_NAMES))
+        pipeline = FeatureEngineeringPipeline().fit(X_scaled, FEATURE_NAMES)
+        model = RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0)
+        model.fit(pipeline.transform(X_scaled), y)
+        joblib.dump(scaler, tmp / 'scaler.joblib')
+        joblib.dump(model, tmp / 'model.joblib')
+        save_feature_pipeline(pipeline, tmp / 'pipeline.joblib')
+
+        predictor = FailGuardPredictor(model_path=tmp / 'model.joblib', scaler_path=tmp / 'scaler.joblib',
+                                       backend='compiled', pipeline_path=tmp / 'pipeline.joblib')
+        assert predictor.backend == 'sklearn' and predictor.pipeline is not None
+        assert Path(tmp / 'pipeline.joblib') in predictor.artifact_paths
+        expected = model.predict_proba(pipeline.transform(X_scaled[:20]))[:, 1]
+        assert np.allclose(predictor.predict_proba_matrix(X[:20]), expected)
+        features = [dict(zip(FEATURE_NAMES, row)) for row in X[:3]]
+        results = predictor.predict_batch(features)
+        assert [r['success'] for r in results] == [True] * 3
+
+        explanation = predictor.explain(features[0])
+        assert set(explanation['contributions']) == set(FEATURE_NAMES)
+        total = explanation['base_value'] + sum(explanation['contributions'].values())
+        assert abs(total - expected[0]) < 1e-4
+
+        # A pipeline saved by an earlier run does not fit a model trained on the plain features
+        plain = RandomForestClassifier(n_estimators=5, random_state=0).fit(X_scaled, y)
+        joblib.dump(plain, tmp / 'model.joblib')
+        stale = FailGuardPredictor(model_path=tmp / 'model.joblib', scaler_path=tmp / 'scaler.joblib',
+                                   pipeline_path=tmp / 'pipeline.joblib')
+        assert stale.pipeline is None
+        assert np.allclose(stale.predict_proba_matrix(X[:5]), plain.predict_proba(X_scaled[:5])[:, 1])
+    print("✓ Predictions and explanations use the pipeline")
+
+if __name__ == '__main__':
+    test_pipeline()
+    test_predictor()
+    print("\n✓ All feature engineering tests passed!\n")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""Test streaming, mergeable feature statistics"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import FEATURE_NAMES
+from src.feature_statistics import FeatureStatistics, QuantileSketch, parallel_statistics, dataset_statistics
+from src.feature_engineering import calculate_feature_statistics, select_features_by_variance
+
+def make_data(n_samples=3000, seed=0):
+    """Skewed, signed and partly missing columns."""
+    rng = np.random.RandomState(seed)
+    X = np.column_stack([
+        rng.lognormal(5, 1, n_samples),
+        rng.randn(n_samples) * 10 + 3,
+        rng.poisson(2, n_samples).astype(float),
+        np.full(n_samples, 7.0),
+    ])
+    X[rng.rand(n_samples) < 0.05, 1] = np.nan
+    return X
+
+def chunks_of(X, sizes):
+    start = 0
+    for size in sizes:
+        yield X[start:start + size]
+        start += size
+    yield X[start:]
+
+def test_moments():
+    """Chunked updates, single rows and merged partials give the exact moments"""
+    print("\n=== Testing streaming moments ===")
+    X = make_data()
+    names = ['a', 'b', 'c', 'd']
+    streamed = FeatureStatistics(names)
+    for chunk in chunks_of(X, [1, 10, 500, 999]):
+        streamed.update(chunk)
+    assert list(streamed.count) == [3000, int((~np.isnan(X[:, 1])).sum()), 3000, 3000]
+    assert np.allclose(streamed.mean, np.nanmean(X, axis=0))
+    assert np.allclose(streamed.variance, np.nanvar(X, axis=0))
+    assert np.array_equal(streamed.min, np.nanmin(X, axis=0)) and np.array_equal(streamed.max, np.nanmax(X, axis=0))
+
+    rows = FeatureStatistics(names)
+    for row in X[:200]:
+        rows.add(row)
+    assert np.allclose(rows.variance, np.nanvar(X[:200], axis=0))
+
+    # Partials merge into the statistics of the whole data, in any order
+    parts = [FeatureStatistics(names).update(chunk) for chunk in np.array_split(X, 7)]
+    merged = FeatureStatistics(names)
+    for part in reversed(parts):
+        merged.merge(part)
+    assert np.array_equal(merged.count, streamed.count)
+    assert np.allclose(merged.mean, streamed.mean) and np.allclose(merged.variance, streamed.variance)
+    assert np.array_equal(merged.quantile(0.5), streamed.quantile(0.5))
+    assert merged.variance[3] == 0.0
+    print("✓ Mean, variance, min and max match numpy")
+
+def test_non_finite_values():
+    """Infinities are skipped like NaNs by update, add and the sketches"""
+    print("\n=== Testing non-finite values ===")
+    X = make_data(200)
+    dirty = X.copy()
+    dirty[::7, 0] = np.inf
+    dirty[3::11, 2] = -np.inf
+    clean = np.where(np.isfinite(dirty), dirty, np.nan)
+    chunked = FeatureStatistics(['a', 'b', 'c', 'd']).update(dirty)
+    rows = FeatureStatistics(['a', 'b', 'c', 'd'])
+    for row in dirty:
+        rows.add(row)
+    expected = FeatureStatistics(['a', 'b', 'c', 'd']).update(clean)
+    for statistics in (chunked, rows):
+        assert np.array_equal(statistics.count, expected.count)
+        assert np.allclose(statistics.mean, np.nanmean(clean, axis=0))
+        assert np.allclose(statistics.variance, np.nanvar(clean, axis=0))
+        assert np.isfinite(statistics.max).all() and np.isfinite(statistics.min).all()
+        assert np.array_equal(statistics.quantile(0.5), expected.quantile(0.5))
+    assert QuantileSketch().update([np.inf, -np.inf, 1.0]).count == 1
+    print("✓ Infinite values skipped")
+
+def test_quantiles():
+    """Sketch quantiles are within the relative accuracy"""
+    print("\n=== Testing quantile sketch ===")
+    rng = np.random.RandomState(1)
+    values = np.concatenate([rng.lognormal(0, 2, 5000), -rng.lognormal(1, 1, 2000), np.zeros(500)])
+    sketch = QuantileSketch(relative_accuracy=0.01).update(values)
+    assert sketch.count == len(values)
+    for q in (0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0):
+        estimate = sketch.quantile(q)
+        low, high = np.quantile(values, q, method='lower'), np.quantile(values, q, method='higher')
+        assert min(low, high) - 0.01 * abs(low) <= estimate <= max(low, high) + 0.01 * abs(high), (q, estimate)
+    assert np.isnan(QuantileSketch().quantile(0.5))
+    assert len(sketch.positive) + len(sketch.negative) < 2000
+    print(f"✓ {len(sketch.positive) + len(sketch.negative)} buckets for {len(values)} values")
+
+def test_parallel_pass():
+    """Worker processes and the CSV reader give the same statistics as one in-memory pass"""
+    print("\n=== Testing parallel statistics ===")
+    X = make_data(5000, seed=2)
+    X = np.column_stack([X, X[:, :2] * 2, X[:, 2:] + 1])
+    inline = parallel_statistics(np.array_split(X, 5), FEATURE_NAMES, n_jobs=1)
+    parallel = parallel_statistics(np.array_split(X, 5), FEATURE_NAMES, n_jobs=2)
+    assert np.array_equal(parallel.count, inline.count)
+    assert np.allclose(parallel.mean, inline.mean) and np.allclose(parallel.variance, inline.variance)
+    assert parallel.summary() == inline.summary()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'data.csv'
+        frame = pd.DataFrame(X, columns=[name.upper() for name in FEATURE_NAMES])
+        frame['defects'] = 0
+        frame.to_csv(path, index=False)
+        from_csv = dataset_statistics(path, chunk_size=700, n_jobs=1)
+    assert np.allclose(from_csv.mean, inline.mean) and np.allclose(from_csv.variance, inline.variance)
+
+    frame = calculate_feature_statistics(X, FEATURE_NAMES)
+    assert list(frame.columns) == ['feature', 'count', 'mean', 'std', 'var', 'min', 'max', 'p50', 'p95']
+    assert np.allclose(frame['std'], np.nanstd(X, axis=0))
+    chunked = calculate_feature_statistics(np.array_split(X, 3), FEATURE_NAMES)
+    pd.testing.assert_frame_equal(chunked, frame)
+
+    _, mask = select_features_by_variance(np.nan_to_num(X), statistics=inline)
+    assert list(mask) == [True, True, True, False, True, True, True, False]
+    print("✓ Parallel and chunked passes agree")
+
+if __name__ == '__main__':
+    test_moments()
+    test_non_finite_values()
+    test_quantiles()
+    test_parallel_pass()
+    print("\n✓ All feature statistics tests passed!\n")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Test the git-history miner"""
+
+import sys
+import subprocess
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.git_history import HistoryStore, mine_history, file_history, history_for_tree, is_fix_commit
+
+def commit(repo, author, message, files, timestamp):
+    """Write files and commit them as ``author`` at a fixed time."""
+    for name, content in files.items():
+        path = repo / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    env = {'GIT_AUTHOR_DATE': f'{timestamp} +0000', 'GIT_COMMITTER_DATE': f'{timestamp} +0000',
+           'PATH': '/usr/bin:/bin:/usr/local/bin', 'HOME': str(repo)}
+    identity = ['-c', f'user.name={author}', '-c', f'user.email={author}@example.com']
+    subprocess.run(['git', '-C', str(repo), 'add', '-A'], check=True, env=env)
+    subprocess.run(['git', '-C', str(repo), *identity, 'commit', '-q', '-m', message], check=True, env=env)
+
+def test_fix_commit_detection():
+    """Fix commits are recognized from their subject"""
+    print("\n=== Testing fix commit detection ===")
+    assert is_fix_commit('Fix crash on empty input')
+    assert is_fix_commit('bugfix: off-by-one in pager')
+    assert not is_fix_commit('Add prefix option')
+    print("✓ Fix subjects detected")
+
+def test_incremental_mining():
+    """Churn, authors and fixes are aggregated; reruns read only new commits"""
+    print("\n=== Testing incremental history mining ===")
+    day = 86400
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp) / 'repo'
+        repo.mkdir()
+        subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+        commit(repo, 'alice', 'Add core', {'src/core.py': 'a\nb\nc\n', 'README': 'x\n'}, 1_000_000_000)
+        commit(repo, 'bob', 'Fix core bug', {'src/core.py': 'a\nB\nc\n'}, 1_000_000_000 + 400 * day)
+        store = HistoryStore(Path(tmp) / 'history.db')
+
+        stats = mine_history(repo, store)
+        assert stats['commits'] == 2 and not stats['incremental']
+        everything = file_history(repo, window_days=None, store=store)
+        assert everything['src/core.py'] == {'code_churn': 5, 'num_developers': 2, 'past_defects': 1}
+
+        # The first commit is outside a 365-day window ending at the newest commit
+        recent = file_history(repo, window_days=365, store=store)
+        assert recent['src/core.py'] == {'code_churn': 2, 'num_developers': 1, 'past_defects': 1}
+        assert 'README' not in recent
+
+        commit(repo, 'carol', 'Refactor', {'src/core.py': 'a\nB\nc\nd\n'}, 1_000_000_000 + 401 * day)
+        stats = mine_history(repo, store)
+        assert stats['commits'] == 1 and stats['incremental']
+        assert mine_history(repo, store)['commits'] == 0
+
+        # Paths are relative to the scanned directory
+        history = history_for_tree(repo / 'src', window_days=None, store=store)
+        assert history['core.py']['num_developers'] == 3
+        print(f"✓ core.py history: {history['core.py']}")
+
+        # Non-ASCII paths are stored as they are, not as quoted escapes
+        commit(repo, 'dave', 'Add docs', {'docs/résumé.md': 'x\ny\n'}, 1_000_000_000 + 402 * day)
+        assert mine_history(repo, store)['commits'] == 1
+        assert file_history(repo, window_days=None, store=store)['docs/résumé.md']['code_churn'] == 2
+        print("✓ Non-ASCII paths kept")
+
+def test_failed_log():
+    """A failing git log raises with its message and keeps the checkpoint"""
+    print("\n=== Testing git log failures ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp) / 'repo'
+        repo.mkdir()
+        subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+        commit(repo, 'alice', 'Add core', {'core.py': 'a\n'}, 1_000_000_000)
+        store = HistoryStore(Path(tmp) / 'history.db')
+        mine_history(repo, store)
+        checkpoint = store.checkpoint(repo.resolve())
+
+        # Lose the blob of a new commit, so diffing it fails half-way through the log
+        commit(repo, 'bob', 'Add util', {'util.py': 'lost\n'}, 1_000_000_100)
+        commit(repo, 'bob', 'Add more', {'more.py': 'b\n'}, 1_000_000_200)
+        blob = subprocess.run(['git', '-C', str(repo), 'rev-parse', 'HEAD~1:util.py'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+        (repo / '.git' / 'objects' / blob[:2] / blob[2:]).unlink()
+        try:
+            mine_history(repo, store)
+            assert False, 'expected RuntimeError'
+        except RuntimeError as e:
+            assert 'git log failed' in str(e) and blob in str(e), e
+        assert store.checkpoint(repo.resolve()) == checkpoint
+        assert set(file_history(repo, window_days=None, store=store)) == {'core.py'}
+        print("✓ Checkpoint kept after a failed git log")
+
+if __name__ == '__main__':
+    test_fix_commit_detection()
+    test_incremental_mining()
+    test_failed_log()
+    print("\n✓ All git history tests passed!\n")
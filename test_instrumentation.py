@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Test the metrics registry and the /metrics endpoint"""
+
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.testing import temporary_database
+from src.instrumentation import MetricsRegistry, Counter, Histogram, timed
+
+def test_histogram_rendering():
+    """Histograms render cumulative buckets, sum and count"""
+    print("\n=== Testing histogram rendering ===")
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram('test_latency_seconds', 'Test latency', ('route',), buckets=(0.1, 1.0)))
+    latency.labels(route='/a').observe(0.05)
+    latency.labels(route='/a').observe(0.5)
+    latency.labels(route='/a').observe(5)
+
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    print("✓ Histogram rendered in Prometheus text format")
+
+def test_counter_and_timed():
+    """Counters increment and the timed decorator observes durations"""
+    print("\n=== Testing counters and timed decorator ===")
+    registry = MetricsRegistry()
+    hits = registry.register(Counter('test_hits_total', 'Hits', ('cache',)))
+    hits.labels(cache='x').inc()
+    hits.labels(cache='x').inc(2)
+    assert 'test_hits_total{cache="x"} 3' in registry.render()
+
+    duration = registry.register(Histogram('test_op_seconds', 'Op duration', ('op',)))
+
+    @timed(duration, op='work')
+    def work():
+        return 42
+
+    assert work() == 42
+    assert duration.labels(op='work').count == 1
+
+    # Re-registering the same metric returns the existing family
+    assert registry.register(Counter('test_hits_total', 'Hits', ('cache',))) is hits
+    print("✓ Counter and timed decorator work")
+
+def test_metrics_endpoint():
+    """/metrics exposes request, predictor and database metrics"""
+    print("\n=== Testing /metrics endpoint ===")
+    from app import app
+
+    client = app.test_client()
+    sample = {'loc': 500, 'wmc': 15, 'rfc': 20, 'cbo': 8, 'lcom': 0.5,
+              'code_churn': 10, 'num_developers': 3, 'past_defects': 2}
+    with temporary_database():
+        client.post('/api/predict', data=json.dumps(sample), content_type='application/json')
+        response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.data.decode()
+    assert 'failguard_http_request_duration_seconds_count{route="/api/predict",method="POST"}' in text
+    assert 'failguard_predictor_stage_seconds_count{stage="model"}' in text
+    assert 'failguard_db_operation_seconds_count{operation="save_prediction"}' in text
+    print("✓ /metrics endpoint exposes app metrics")
+
+if __name__ == '__main__':
+    test_histogram_rendering()
+    test_counter_and_timed()
+    test_metrics_endpoint()
+    print("\n✓ All instrumentation tests passed!\n")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""Test the background job scheduler"""
+
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from src.jobs import JobScheduler, JobContext, JOB_HANDLERS
+
+def wait_for(predicate, timeout=10):
+    """Poll until ``predicate()`` is true."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def finished(job_id):
+    return db.get_job(job_id)['status'] in ('succeeded', 'failed', 'cancelled')
+
+def test_limits_cancellation_and_failures():
+    """One job at a time, one per kind; cancellation and failures are recorded"""
+    print("\n=== Testing job scheduler ===")
+    release = threading.Event()
+
+    def slow(ctx, steps=50):
+        for step in range(steps):
+            ctx.progress(step / steps, f"step {step}")
+            release.wait(0.05)
+        return {'steps': steps}
+
+    def broken(ctx):
+        raise RuntimeError('boom')
+
+    with temporary_database():
+        done = []
+        scheduler = JobScheduler(handlers={'slow': slow, 'broken': broken, 'quick': lambda ctx: {'ok': True}},
+                                 max_workers=1, schedule={}, poll_interval=0.02)
+        scheduler.on_success('quick', done.append)
+        scheduler.start()
+        try:
+            first = scheduler.submit('slow')
+            # Same kind while active: the existing job is returned
+            assert scheduler.submit('slow')['id'] == first['id']
+            quick = scheduler.submit('quick')
+            assert wait_for(lambda: db.get_job(first['id'])['status'] == 'running')
+            # max_workers=1: the quick job waits for the slow one
+            assert db.get_job(quick['id'])['status'] == 'queued'
+
+            assert scheduler.cancel(first['id'])['cancel_requested']
+            assert wait_for(lambda: finished(first['id']))
+            assert db.get_job(first['id'])['status'] == 'cancelled'
+            assert wait_for(lambda: finished(quick['id']))
+            assert db.get_job(quick['id'])['result'] == {'ok': True} and done[0]['id'] == quick['id']
+
+            failing = scheduler.submit('broken')
+            assert wait_for(lambda: finished(failing['id']))
+            assert db.get_job(failing['id'])['error'] == 'boom'
+
+            # Queued jobs are cancelled without running
+            scheduler.stop()
+            queued = scheduler.submit('slow', {'steps': 2})
+            assert scheduler.cancel(queued['id'])['status'] == 'cancelled'
+
+            try:
+                scheduler.submit('nope')
+                assert False
+            except ValueError:
+                pass
+        finally:
+            release.set()
+            scheduler.stop()
+    print("✓ Limits, cancellation and failures OK")
+
+def test_persistence_and_schedule():
+    """Interrupted jobs fail on restart; queued jobs and recurring kinds run"""
+    print("\n=== Testing persistence and recurring jobs ===")
+    with temporary_database():
+        orphan = db.create_job('quick')
+        db.start_job(orphan)
+        pending = db.create_job('quick')
+
+        scheduler = JobScheduler(handlers={'quick': lambda ctx: {'ok': True}}, schedule={'quick': 3600},
+                                 poll_interval=0.02)
+        scheduler.start()
+        try:
+            assert wait_for(lambda: finished(pending))
+            assert db.get_job(orphan)['error'] == 'Interrupted by restart'
+            assert db.get_job(pending)['status'] == 'succeeded'
+            # The pending job counts as this hour's run, so nothing else is queued
+            time.sleep(0.1)
+            assert len(db.list_jobs(kind='quick')) == 2
+        finally:
+            scheduler.stop()
+    print("✓ Restart handling OK")
+
+def test_maintenance_jobs():
+    """Rollup, retention and maintenance operate on the predictions database"""
+    print("\n=== Testing maintenance jobs ===")
+    result = {'risk_level': 'HIGH', 'probability': 80.0, 'confidence': 60.0, 'prediction': 'DEFECTIVE'}
+    features = {'loc': 100, 'wmc': 5, 'rfc': 10, 'cbo': 3, 'lcom': 0.5,
+                'code_churn': 2, 'num_developers': 1, 'past_defects': 0}
+    with temporary_database():
+        for _ in range(5):
+            db.save_prediction(features, result)
+        with db.get_db() as conn:
+            conn.execute("UPDATE predictions SET timestamp = datetime('now', '-40 days') WHERE id <= 3")
+            conn.commit()
+
+        scheduler = JobScheduler(schedule={}, poll_interval=0.02)
+        scheduler.start()
+        try:
+            rollup = scheduler.submit('rollup')
+            assert wait_for(lambda: finished(rollup['id']))
+            assert sorted(row['count'] for row in db.get_daily_rollup()) == [2, 3]
+
+            retention = scheduler.submit('retention', {'days': 30, 'batch_size': 2})
+            assert wait_for(lambda: finished(retention['id']))
+            assert db.get_job(retention['id'])['result']['predictions_deleted'] == 3
+            assert len(db.get_all_predictions()) == 2
+
+            maintenance = scheduler.submit('maintenance')
+            assert wait_for(lambda: finished(maintenance['id']))
+            job = db.get_job(maintenance['id'])
+            assert job['status'] == 'succeeded' and job['result']['size_after'] > 0
+        finally:
+            scheduler.stop()
+    assert set(JOB_HANDLERS) == {'retrain', 'rollup', 'maintenance', 'retention', 'partition'}
+    print("✓ Rollup, retention and VACUUM OK")
+
+def test_job_api():
+    """Jobs can be submitted, inspected and cancelled over HTTP"""
+    print("\n=== Testing job API ===")
+    from app import app, scheduler
+
+    with temporary_database():
+        client = app.test_client()
+        response = client.post('/api/jobs', json={'kind': 'rollup'})
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job']['id']
+        scheduler.dispatch()
+        assert wait_for(lambda: finished(job_id))
+
+        data = json.loads(client.get(f'/api/jobs/{job_id}').data)
+        assert data['job']['status'] == 'succeeded'
+        assert 'retrain' in json.loads(client.get('/api/jobs').data)['kinds']
+        assert client.post('/api/jobs', json={'kind': 'nope'}).status_code == 400
+        assert client.get('/api/jobs/999999').status_code == 404
+        assert client.post('/api/jobs/999999/cancel').status_code == 404
+        assert client.post('/api/jobs', json={'kind': 'rollup'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 403
+        assert json.loads(client.get('/api/predictions/daily').data)['days'] == []
+    print("✓ Job API OK")
+
+def test_retrain_cv_workers():
+    """The in-app retrain cross-validates with JOB_CV_WORKERS processes, not CV_WORKERS"""
+    print("\n=== Testing retrain job workers ===")
+    import models.train_model as train_model
+    from config import JOB_CV_WORKERS
+    calls = []
+    original = train_model.main
+    train_model.main = lambda **kwargs: calls.append(kwargs) or (None, 'Stub', None)
+    try:
+        assert JOB_HANDLERS['retrain'](JobContext(None)) == {'model': 'Stub'}
+    finally:
+        train_model.main = original
+    assert calls[0]['cv_workers'] == JOB_CV_WORKERS
+    print(f"✓ Retrain job uses {JOB_CV_WORKERS} CV worker(s)")
+
+if __name__ == '__main__':
+    test_limits_cancellation_and_failures()
+    test_persistence_and_schedule()
+    test_maintenance_jobs()
+    test_job_api()
+    test_retrain_cv_workers()
+    print("\n✓ All job tests passed!\n")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Test the scaler-fused linear scoring backend"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import MODEL_PATH, SCALER_PATH
+from models.train_model import fuse_linear_model, export_linear_model
+from models.predict import FailGuardPredictor
+
+def test_fused_matches_scaler_and_model():
+    """Folding the scaler into the weights keeps probabilities unchanged"""
+    print("\n=== Testing scaler fusion ===")
+    rng = np.random.RandomState(0)
+    X_raw = rng.lognormal(mean=2, sigma=1, size=(500, 8))
+    y = (X_raw[:, 0] + rng.randn(500) > 8).astype(int)
+    scaler = StandardScaler().fit(X_raw)
+    model = LogisticRegression(max_iter=1000).fit(scaler.transform(X_raw), y)
+
+    fused = fuse_linear_model(model, scaler)
+    expected = model.predict_proba(scaler.transform(X_raw))[:, 1]
+    assert np.allclose(fused.predict_proba(X_raw), expected, atol=1e-12)
+    print(f"✓ Fused model matches ({fused.weights.shape[0]} weights)")
+
+    quantized = fused.astype_float32()
+    assert quantized.weights.dtype == np.float32
+    assert np.allclose(quantized.predict_proba(X_raw), expected, atol=1e-4)
+    print("✓ float32 fused model within tolerance")
+
+def test_linear_backend_predictor():
+    """Predictor with the 'linear' backend agrees with the sklearn backend"""
+    print("\n=== Testing linear predictor backend ===")
+    model = joblib.load(MODEL_PATH)
+    if not isinstance(model, LogisticRegression):
+        print("  Saved model is not a Logistic Regression, skipping")
+        return
+
+    samples = [
+        {'loc': 100, 'wmc': 5, 'rfc': 10, 'cbo': 3, 'lcom': 0.3, 'code_churn': 2, 'num_developers': 2, 'past_defects': 0},
+        {'loc': 5000, 'wmc': 50, 'rfc': 100, 'cbo': 30, 'lcom': 0.9, 'code_churn': 100, 'num_developers': 10, 'past_defects': 15},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'linear.npz'
+        assert export_linear_model(model, SCALER_PATH, path)
+        linear = FailGuardPredictor(backend='linear', engine_path=path)
+        reference = FailGuardPredictor(backend='sklearn')
+
+    assert linear.engine is not None
+    for expected, actual in zip(reference.predict_batch(samples), linear.predict_batch(samples)):
+        assert expected['risk_level'] == actual['risk_level']
+        assert abs(expected['probability'] - actual['probability']) < 0.01
+    print("✓ Linear backend matches sklearn backend")
+
+if __name__ == '__main__':
+    test_fused_matches_scaler_and_model()
+    test_linear_backend_predictor()
+    print("\n✓ All linear backend tests passed!\n")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Test the load-test harness and the shared dataset sampler"""
+
+import sys
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import loadtest
+from database.testing import temporary_database
+from create_dataset import sample_module_metrics
+from config import FEATURE_NAMES
+
+def test_sampler_matches_dataset_schema():
+    """Sampled modules are reproducible and respect the feature bounds"""
+    print("\n=== Testing module metric sampler ===")
+    a = sample_module_metrics(500, np.random.default_rng(1))
+    b = sample_module_metrics(500, np.random.default_rng(1))
+    assert list(a.columns) == FEATURE_NAMES
+    assert a.equals(b)
+    assert a['loc'].between(10, 15000).all() and a['num_developers'].between(1, 20).all()
+    print("✓ Sampler is deterministic and bounded")
+
+def test_mix_and_saturation():
+    """Route mixes are normalized and saturation is where scaling stops"""
+    print("\n=== Testing mix parsing and saturation ===")
+    mix = loadtest.parse_mix('predict=3,dashboard=1')
+    assert mix == {'predict': 0.75, 'dashboard': 0.25}
+    try:
+        loadtest.parse_mix('nope=1')
+        assert False, "unknown route accepted"
+    except ValueError:
+        pass
+
+    assert loadtest.find_saturation([1, 2, 4, 8], [100, 190, 200, 195]) == 2
+    assert loadtest.find_saturation([1, 2, 4], [100, 200, 400]) is None
+    print("✓ Mix parsing and saturation detection work")
+
+def test_run_level_against_app():
+    """A short load level against the app reports every route without errors"""
+    print("\n=== Testing load level against app ===")
+    from werkzeug.serving import make_server
+    from app import app
+
+    # The predictions made under load go to a throwaway database
+    with temporary_database():
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            mix = loadtest.parse_mix('predict=1,predictions=1,dashboard=1')
+            summary = loadtest.run_level(base_url, mix, loadtest.sample_payloads(20), concurrency=2, duration=1.0)
+        finally:
+            server.shutdown()
+
+    assert summary['all']['requests'] > 0 and summary['all']['error_rate'] == 0
+    assert set(summary) <= {'predict', 'predictions', 'dashboard', 'all'}
+    json.dumps(summary)
+    print(f"✓ {summary['all']['requests']} requests at {summary['all']['rps']} rps")
+
+if __name__ == '__main__':
+    test_sampler_matches_dataset_schema()
+    test_mix_and_saturation()
+    test_run_level_against_app()
+    print("\n✓ All load test tests passed!\n")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Test monthly partitioning and archiving of prediction history"""
+
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+
+def insert(rows):
+    """Insert (months ago, day, second, risk level) predictions through plain SQL."""
+    values = []
+    for months_ago, day, second, risk_level in rows:
+        probability = {'LOW': 0.1, 'MEDIUM': 0.5, 'HIGH': 0.9}[risk_level]
+        values.append((f'{db._month_before(months_ago)}-{day:02d} 10:00:{second:02d}', 100 + second, 5.0, 10.0,
+                       3.0, 0.5, 1, 2, 0, risk_level, probability, round(abs(probability - 0.5) * 200, 2),
+                       'DEFECTIVE' if probability > 0.5 else 'SAFE'))
+    with db.get_db() as conn:
+        conn.executemany('''
+            INSERT INTO predictions (timestamp, loc, wmc, rfc, cbo, lcom, code_churn, num_developers,
+                                     past_defects, risk_level, probability, confidence, prediction)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', values)
+        conn.commit()
+
+def snapshot():
+    """Everything the app reads from the predictions."""
+    db.rebuild_daily_rollup()
+    since = f'{db._month_before(9)}-10'
+    return {
+        'rows': list(db.iter_predictions(batch_size=7)),
+        'latest': db.get_all_predictions(limit=5),
+        'deep': db.get_all_predictions(limit=40),
+        'all': db.get_all_predictions(),
+        'by_id': [db.get_prediction_by_id(pred_id) for pred_id in (1, 20, 59, 999)],
+        'stats': db.get_prediction_stats(),
+        'rollup': db.get_daily_rollup(),
+        'filtered': list(db.iter_predictions(since=since, until=f'{db._month_before(1)}-20', risk_level='HIGH')),
+    }
+
+def test_partitioning():
+    """Reads span partitions and archives and return what the table returned"""
+    print("\n=== Testing prediction partitions ===")
+    for layout in db.STORAGE_LAYOUTS:
+        with temporary_database(layout):
+            # Two predictions a day on days 5 and 25 of the last 15 months
+            insert([(months_ago, day, months_ago, ('LOW', 'MEDIUM', 'HIGH')[(months_ago + day) % 3])
+                    for months_ago in range(15) for day in (5, 25)])
+            before = snapshot()
+
+            summary = db.partition_predictions(hot_months=2, archive_months=6)
+            assert summary['months_moved'] == [db._month_before(k) for k in range(14, 1, -1)]
+            assert summary['rows_moved'] == 26
+            assert summary['months_archived'] == [db._month_before(k) for k in range(14, 5, -1)]
+            with db.get_db() as conn:
+                assert conn.execute(f'SELECT COUNT(*) FROM {db.prediction_table(conn)}').fetchone()[0] == 4
+            files = sorted(path.name for path in db.partition_dir().iterdir())
+            assert f'{db._month_before(14)}.db.gz' in files and f'{db._month_before(2)}.db' in files
+            assert len(files) == 13
+            assert snapshot() == before
+
+            # A late import into an archived month merges in order, then moves on the next run
+            insert([(10, 15, 59, 'HIGH')])
+            late = snapshot()
+            assert len(late['rows']) == 31 and late['rows'] == sorted(late['rows'], key=lambda r: r['timestamp'])
+            assert late['stats']['total'] == 31
+            summary = db.partition_predictions(hot_months=2, archive_months=6)
+            assert summary['months_moved'] == [db._month_before(10)] and summary['rows_moved'] == 1
+            assert summary['months_archived'] == [db._month_before(10)]
+            assert snapshot() == late
+            assert db.partition_predictions(hot_months=2)['rows_moved'] == 0
+
+            partitions = db.list_partitions()
+            assert partitions[0]['rows'] == 2 and partitions[0]['archived'] and partitions[0]['size_bytes'] > 0
+            assert db.drop_partitions_before(200) > 0
+            assert db.get_prediction_stats()['total'] < 31
+            assert db.clear_all_predictions() and db.list_partitions() == []
+            assert list(db.partition_dir().iterdir()) == []
+    print("✓ Reads identical before and after partitioning on both layouts")
+
+def test_delete_partitioned():
+    """Deleting a partitioned prediction removes it from its file, the catalog and the stats"""
+    print("\n=== Testing delete_prediction on partitions ===")
+    for layout in db.STORAGE_LAYOUTS:
+        with temporary_database(layout):
+            # ids 1-2 end up archived, 3-4 in a plain partition file, 5 in the table
+            insert([(8, 5, 1, 'HIGH'), (8, 6, 2, 'LOW'), (3, 5, 3, 'HIGH'), (3, 5, 4, 'HIGH'), (0, 1, 5, 'LOW')])
+            db.partition_predictions(hot_months=1, archive_months=6)
+            archived, plain = db.list_partitions()
+            assert archived['archived'] and not plain['archived']
+
+            assert db.delete_prediction(3)
+            assert db.get_prediction_by_id(3) is None and db.get_prediction_by_id(4) is not None
+            stats = db.get_prediction_stats()
+            assert stats['total'] == 4 and stats['high_risk_count'] == 2
+            db.rebuild_daily_rollup()
+            assert sum(row['count'] for row in db.get_daily_rollup() if row['risk_level'] == 'HIGH') == 2
+            assert [p['rows'] for p in db.list_partitions()] == [2, 1] and db.list_partitions()[1]['min_id'] == 4
+
+            assert db.delete_prediction(1)
+            archived = db.list_partitions()[0]
+            assert archived['archived'] and archived['rows'] == 1 and archived['min_id'] == 2
+            assert sorted(path.name for path in db.partition_dir().iterdir()) == [archived['file'], plain['file']]
+            assert db.get_prediction_by_id(1) is None and db.get_prediction_by_id(2)['risk_level'] == 'LOW'
+            assert db.get_prediction_stats()['total'] == 3
+            assert [row['id'] for row in db.iter_predictions()] == [2, 4, 5]
+
+            # Ids that are gone, or in a partition's id range without a row, are reported missing
+            assert not db.delete_prediction(1) and not db.delete_prediction(3) and not db.delete_prediction(99)
+            assert db.list_partitions()[0]['archived'] and db.get_prediction_stats()['total'] == 3
+            assert db.delete_prediction(5) and db.get_prediction_stats()['total'] == 2
+    print("✓ Partitioned and archived predictions deleted on both layouts")
+
+def test_partition_api():
+    """/api/predictions/partitions lists the catalog"""
+    print("\n=== Testing /api/predictions/partitions ===")
+    from app import app
+    with temporary_database():
+        insert([(3, 5, 1, 'LOW'), (0, 5, 2, 'HIGH')])
+        db.partition_predictions(hot_months=1)
+        data = json.loads(app.test_client().get('/api/predictions/partitions').data)
+        assert [partition['month'] for partition in data['partitions']] == [db._month_before(3)]
+        client = app.test_client()
+        assert client.delete('/api/predictions/1').status_code == 200
+        assert client.delete('/api/predictions/1').status_code == 404
+        try:
+            db.partition_predictions(hot_months=0)
+            assert False
+        except ValueError:
+            pass
+    print("✓ Partition API OK")
+
+if __name__ == '__main__':
+    test_partitioning()
+    test_delete_partitioned()
+    test_partition_api()
+    print("\n✓ All partition tests passed!\n")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Test opt-in request profiling and slow-request capture"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.profiling import RequestProfiler
+
+def busy_work(seconds):
+    """Spin so the stack sampler sees this frame."""
+    end = time.perf_counter() + seconds
+    data = []
+    while time.perf_counter() < end:
+        data.append(list(range(100)))
+    return len(data)
+
+def test_disabled_profiler_is_noop():
+    """Disabled profiler captures nothing"""
+    print("\n=== Testing disabled profiler ===")
+    profiler = RequestProfiler(enabled=False, sample_rate=1.0, slow_threshold_ms=1)
+    session = profiler.begin({'X-FailGuard-Profile': '1'})
+    assert session is None
+    profiler.end(session, 'GET', '/api/chart-data', 200, 5.0)
+    assert profiler.list_captures() == []
+    print("✓ No captures when disabled")
+
+def test_header_triggered_capture():
+    """Profile header captures cProfile stats and a memory snapshot"""
+    print("\n=== Testing header-triggered capture ===")
+    profiler = RequestProfiler(enabled=True, sample_rate=0.0, slow_threshold_ms=0)
+    assert profiler.begin({}) is None
+
+    session = profiler.begin({'X-FailGuard-Profile': '1'})
+    start = time.perf_counter()
+    busy_work(0.01)
+    profiler.end(session, 'POST', '/api/predict', 200, time.perf_counter() - start)
+
+    captures = profiler.list_captures()
+    assert len(captures) == 1 and captures[0]['reason'] == 'header'
+    capture = profiler.get_capture(captures[0]['id'])
+    assert 'busy_work' in capture['profile']
+    assert capture['memory']['peak_kb'] > 0
+    print(f"✓ Captured profile {capture['id']} ({capture['duration_ms']} ms)")
+
+def test_slow_request_capture():
+    """Only requests above the latency threshold keep stack samples"""
+    print("\n=== Testing slow-request capture ===")
+    profiler = RequestProfiler(enabled=True, sample_rate=0.0, slow_threshold_ms=50, sample_interval_ms=1)
+
+    fast = profiler.begin({})
+    profiler.end(fast, 'GET', '/api/predictions', 200, 0.001)
+    assert profiler.list_captures() == []
+
+    slow = profiler.begin({})
+    start = time.perf_counter()
+    busy_work(0.1)
+    profiler.end(slow, 'GET', '/api/chart-data', 200, time.perf_counter() - start)
+
+    captures = profiler.list_captures()
+    assert len(captures) == 1 and captures[0]['reason'] == 'slow'
+    samples = profiler.get_capture(captures[0]['id'])['stack_samples']
+    assert any('busy_work' in sample['stack'] for sample in samples)
+    print(f"✓ Slow request captured with {sum(s['count'] for s in samples)} stack samples")
+
+def test_raising_view_releases_profiler():
+    """A view that raises still ends its session, so later requests can be profiled"""
+    print("\n=== Testing profiling of a raising view ===")
+    import app as app_module
+
+    def broken():
+        raise RuntimeError('boom')
+
+    original = app_module.profiler, app_module.list_partitions
+    profiler = RequestProfiler(enabled=True, sample_rate=0.0, slow_threshold_ms=0)
+    app_module.profiler, app_module.list_partitions = profiler, broken
+    # Unhandled errors reach the client, skipping the after_request handlers
+    app_module.app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = app_module.app.test_client()
+    try:
+        try:
+            client.get('/api/predictions/partitions', headers={'X-FailGuard-Profile': '1'})
+            assert False, 'expected RuntimeError'
+        except RuntimeError:
+            pass
+        captures = profiler.list_captures()
+        assert len(captures) == 1 and captures[0]['status'] == 500
+
+        app_module.list_partitions = original[1]
+        assert client.get('/api/predictions/partitions', headers={'X-FailGuard-Profile': '1'}).status_code == 200
+        assert [capture['status'] for capture in profiler.list_captures()] == [200, 500]
+    finally:
+        app_module.profiler, app_module.list_partitions = original
+        app_module.app.config['PROPAGATE_EXCEPTIONS'] = None
+    print("✓ Profile lock released after an exception")
+
+if __name__ == '__main__':
+    test_disabled_profiler_is_noop()
+    test_header_triggered_capture()
+    test_slow_request_capture()
+    test_raising_view_releases_profiler()
+    print("\n✓ All profiling tests passed!\n")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Test conditional GET and gzip for the dashboard's JSON endpoints"""
+
+import sys
+import gzip
+import json
+from pathlib import Path
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from src.response_cache import ResponseCache
+
+FEATURES = {'loc': 100, 'wmc': 5, 'rfc': 10, 'cbo': 3, 'lcom': 0.5,
+            'code_churn': 2, 'num_developers': 1, 'past_defects': 0}
+RESULT = {'risk_level': 'HIGH', 'probability': 80.0, 'confidence': 60.0, 'prediction': 'DEFECTIVE'}
+
+def test_response_cache():
+    """Views run once per version; bodies are evicted within the memory budget"""
+    print("\n=== Testing ResponseCache ===")
+    app = Flask(__name__)
+    cache = ResponseCache(max_bytes=3000, gzip_min_bytes=100)
+    calls = []
+
+    @app.route('/items/<int:size>')
+    @cache.cached('items')
+    def items(size):
+        calls.append(size)
+        return jsonify({'items': ['x' * 10] * size}), 200
+
+    @app.route('/missing')
+    @cache.cached()
+    def missing():
+        calls.append('missing')
+        return jsonify({'error': 'not found'}), 404
+
+    client = app.test_client()
+    first = client.get('/items/1')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in first.headers
+    assert client.get('/items/1', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/items/1').data == first.data and calls == [1]
+
+    # Large bodies are gzipped for clients accepting it, under their own ETag
+    large = client.get('/items/50', headers={'Accept-Encoding': 'gzip'})
+    assert large.headers['Content-Encoding'] == 'gzip' and large.headers['ETag'].endswith('-gzip"')
+    assert json.loads(gzip.decompress(large.data)) == json.loads(client.get('/items/50').data)
+    assert 'Accept-Encoding' in large.headers['Vary']
+    assert client.get('/items/50', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+    # Same body after a version bump: the view runs again but the ETag still matches
+    cache.bump('items')
+    assert client.get('/items/1', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert calls == [1, 50, 1]
+
+    # Errors are never cached; bodies over the budget are served but not kept
+    client.get('/missing')
+    client.get('/missing')
+    client.get('/items/400')
+    client.get('/items/400')
+    assert calls == [1, 50, 1, 'missing', 'missing', 400, 400]
+    assert cache._bytes <= 3000
+    print("✓ 304s, gzip and invalidation OK")
+
+def test_dashboard_endpoints():
+    """Writes and model updates change the ETags of the dashboard endpoints"""
+    print("\n=== Testing cached dashboard endpoints ===")
+    import app as app_module
+    client = app_module.app.test_client()
+    with temporary_database():
+        db.save_prediction(FEATURES, RESULT)
+        etags = {}
+        for url in ('/api/predictions?limit=10', '/api/predictions/stats', '/api/metrics', '/api/features'):
+            response = client.get(url)
+            assert response.status_code == 200 and response.headers.get('ETag'), url
+            etags[url] = response.headers['ETag']
+            assert client.get(url, headers={'If-None-Match': etags[url]}).status_code == 304, url
+
+        def revalidate(url):
+            return client.get(url, headers={'If-None-Match': etags[url]})
+
+        # A commit elsewhere (a job row) bumps the data version, but the payload is unchanged
+        db.create_job('rollup')
+        assert revalidate('/api/predictions/stats').status_code == 304
+
+        pred_id = db.save_prediction(FEATURES, RESULT)
+        response = revalidate('/api/predictions/stats')
+        assert response.status_code == 200 and json.loads(response.data)['total'] == 2
+        assert revalidate('/api/predictions?limit=10').status_code == 200
+        etags['/api/predictions/stats'] = response.headers['ETag']
+        db.delete_prediction(pred_id)
+        assert json.loads(revalidate('/api/predictions/stats').data)['total'] == 1
+
+        # Model metrics are served from the cache until the metrics job bumps the model version
+        original = app_module._metrics_cache
+        try:
+            app_module._metrics_cache = dict(original, accuracy=0.5)
+            assert revalidate('/api/metrics').status_code == 304
+            app_module.response_cache.bump('model')
+            response = revalidate('/api/metrics')
+            assert response.status_code == 200 and json.loads(response.data)['metrics']['accuracy'] == 0.5
+        finally:
+            app_module._metrics_cache = original
+            app_module.response_cache.bump('model')
+        assert revalidate('/api/features').status_code == 304
+    print("✓ Dashboard endpoints revalidate with 304s")
+
+if __name__ == '__main__':
+    test_response_cache()
+    test_dashboard_endpoints()
+    print("\n✓ All response cache tests passed!\n")
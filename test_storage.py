@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Test the compact storage layout of the predictions table"""
+
+import sys
+import sqlite3
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+
+FEATURES = {'loc': 100, 'wmc': 5, 'rfc': 10, 'cbo': 3, 'lcom': 0.5,
+            'code_churn': 2, 'num_developers': 1, 'past_defects': 0}
+
+def fill(n_rows):
+    """Insert ``n_rows`` predictions through plain SQL on the predictions table."""
+    rows = []
+    for i in range(n_rows):
+        probability = (i * 37 % 10000) / 10000
+        rows.append((f'2026-0{1 + i % 3}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00', 100 + i, 5.0, 10.0, 3.0,
+                     (i % 1000) / 1000, i % 7, 2, i % 3, ('LOW', 'MEDIUM', 'HIGH')[i % 3], probability,
+                     round(abs(probability - 0.5) * 200, 2), 'DEFECTIVE' if probability > 0.5 else 'SAFE',
+                     (0, 1, None)[i % 3]))
+    with db.get_db() as conn:
+        conn.executemany('''
+            INSERT INTO predictions (timestamp, loc, wmc, rfc, cbo, lcom, code_churn, num_developers,
+                                     past_defects, risk_level, probability, confidence, prediction, outcome)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+
+def snapshot():
+    """Everything the app reads from the predictions, for comparing layouts."""
+    with db.get_db() as conn:
+        conn.execute("UPDATE predictions SET outcome = 1, timestamp = '2025-12-31 23:59:59' WHERE id % 5 = 0")
+        conn.commit()
+    db.delete_prediction(7)
+    db.rebuild_daily_rollup()
+    return {
+        'rows': list(db.iter_predictions()),
+        'latest': db.get_all_predictions(limit=20),
+        'by_id': db.get_prediction_by_id(3),
+        'stats': db.get_prediction_stats(),
+        'filtered': list(db.iter_predictions(since='2026-03-05', until='2026-03-20', risk_level='HIGH')),
+        'rollup': db.get_daily_rollup(),
+        'old': db.count_predictions_before(0),
+    }
+
+def test_layouts_agree():
+    """The compact layout reads back exactly what the standard one stores"""
+    print("\n=== Testing compact layout ===")
+    snapshots = {}
+    for layout in db.STORAGE_LAYOUTS:
+        with temporary_database(layout):
+            fill(500)
+            result = {'risk_level': 'HIGH', 'probability': 80.0, 'confidence': 60.0, 'prediction': 'DEFECTIVE'}
+            assert db.save_prediction(FEATURES, result) == 501
+            # Same CURRENT_TIMESTAMP on both runs
+            with db.get_db() as conn:
+                conn.execute("UPDATE predictions SET timestamp = '2026-02-14 12:00:00' WHERE id = 501")
+                conn.commit()
+            snapshots[layout] = snapshot()
+            with db.get_db() as conn:
+                assert db.storage_layout(conn) == layout
+                if layout == 'compact':
+                    try:
+                        conn.execute(db.prediction_insert_sql(conn, list(FEATURES) + ['risk_level', 'probability']),
+                                     list(FEATURES.values()) + ['EXTREME', 0.5])
+                        assert False
+                    except sqlite3.IntegrityError:
+                        pass
+            assert db.delete_predictions_before(0, batch_size=100) == 100
+            assert db.clear_all_predictions() and db.get_prediction_stats()['total'] == 0
+
+    standard, compact = snapshots['standard'], snapshots['compact']
+    assert len(compact['rows']) == 500 and compact['filtered']
+    for key in standard:
+        assert compact[key] == standard[key], key
+    print(f"✓ {len(compact['rows'])} rows identical on both layouts")
+
+def test_confidence():
+    """Confidence reads back as saved, not recomputed from the rounded probability"""
+    print("\n=== Testing stored confidence ===")
+    from src.utils import format_prediction_result
+    result = format_prediction_result(0.723456, 1)
+    assert result['probability'] == 72.35 and result['confidence'] == 44.69
+    for layout in db.STORAGE_LAYOUTS:
+        with temporary_database(layout):
+            pred_id = db.save_prediction(FEATURES, result)
+            assert db.get_prediction_by_id(pred_id)['confidence'] == 44.69, layout
+
+    # Compact databases from before the column are upgraded; their rows keep the derived value
+    with temporary_database('compact'):
+        pred_id = db.save_prediction(FEATURES, result)
+        with db.get_db() as conn:
+            conn.execute('DROP VIEW predictions')
+            conn.execute('ALTER TABLE prediction_rows DROP COLUMN confidence_cp')
+            conn.commit()
+        db.init_database()
+        assert db.get_prediction_by_id(pred_id)['confidence'] == 44.7
+        assert db.get_prediction_by_id(db.save_prediction(FEATURES, result))['confidence'] == 44.69
+    print("✓ Confidence stored on both layouts")
+
+def test_migration():
+    """Migrating rewrites the rows, keeps ids and shrinks the file"""
+    print("\n=== Testing storage migration ===")
+    with temporary_database('standard'):
+        fill(20000)
+        db.delete_prediction(20000)
+        before = list(db.iter_predictions())
+
+        summary = db.migrate_storage('compact')
+        assert summary['rows'] == 19999
+        assert summary['size_after'] < summary['size_before'] / 1.6, summary
+        assert list(db.iter_predictions()) == before
+        with db.get_db() as conn:
+            assert conn.execute('PRAGMA page_size').fetchone()[0] == db.DB_PAGE_SIZE
+            indexes = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_prediction_rows_ts' in indexes and 'idx_predictions_timestamp' not in indexes
+        # The AUTOINCREMENT counter carries over
+        result = {'risk_level': 'LOW', 'probability': 10.0, 'confidence': 80.0, 'prediction': 'SAFE'}
+        assert db.save_prediction(FEATURES, result) == 20001
+        assert db.migrate_storage('compact')['rows'] == 0
+
+        back = db.migrate_storage('standard')
+        assert back['rows'] == 20000
+        assert list(db.iter_predictions())[:-1] == before
+        try:
+            db.migrate_storage('columnar')
+            assert False
+        except ValueError:
+            pass
+    print(f"✓ {summary['size_before'] / 1e6:.1f} MB -> {summary['size_after'] / 1e6:.1f} MB")
+
+if __name__ == '__main__':
+    test_layouts_agree()
+    test_confidence()
+    test_migration()
+    print("\n✓ All storage tests passed!\n")
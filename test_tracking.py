@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Test incremental re-scoring of tracked modules"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database.testing import temporary_database
+from models.predict import FailGuardPredictor
+from src.tracking import rescore_tree
+
+MODULE = '''
+class Parser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def next(self):
+        if self.pos < len(self.text):
+            self.pos += 1
+        return self.text[self.pos - 1]
+'''
+
+def test_incremental_rescore():
+    """Only new, changed or re-modelled modules are scored; history holds deltas"""
+    print("\n=== Testing incremental re-scoring ===")
+    with temporary_database() as tmp:
+        root = tmp / 'repo'
+        root.mkdir()
+        (root / 'parser.py').write_text(MODULE)
+        (root / 'util.py').write_text('def f(x):\n    return x\n')
+        sklearn_predictor = FailGuardPredictor(backend='sklearn')
+
+        summary = rescore_tree(root, sklearn_predictor, repo='demo', workers=1)
+        assert summary['new'] == 2 and summary['unchanged'] == 0
+
+        summary = rescore_tree(root, sklearn_predictor, repo='demo', workers=1)
+        assert summary['unchanged'] == 2 and not summary['changes']
+
+        (root / 'util.py').write_text('def f(x):\n    return x if x else -x\n')
+        summary = rescore_tree(root, sklearn_predictor, repo='demo', workers=1)
+        assert [c['change'] for c in summary['changes']] == ['metrics']
+
+        linear_predictor = FailGuardPredictor(backend='linear')
+        assert linear_predictor.model_version != sklearn_predictor.model_version
+        summary = rescore_tree(root, linear_predictor, repo='demo', workers=1)
+        assert summary['rescored'] == 2 and {c['change'] for c in summary['changes']} == {'model'}
+
+        (root / 'parser.py').unlink()
+        summary = rescore_tree(root, linear_predictor, repo='demo', workers=1)
+        assert summary['removed'] == 1
+        assert set(db.get_tracked_modules('demo')) == {'util.py'}
+
+        changes = [row['change'] for row in db.get_module_history('demo', 'util.py')]
+        assert changes == ['model', 'metrics', 'new']
+        assert db.get_module_history('demo', 'parser.py')[0]['change'] == 'removed'
+        # Scans go to the module tables, not the predictions table
+        assert db.get_all_predictions() == []
+        print(f"✓ 5 scans recorded {len(db.get_module_history('demo'))} history rows")
+
+def test_failed_save():
+    """A failed save is an error, not a scan that reports changes it did not store"""
+    print("\n=== Testing failed score save ===")
+    with temporary_database() as tmp:
+        root = tmp / 'repo'
+        root.mkdir()
+        (root / 'parser.py').write_text(MODULE)
+        with db.get_db() as conn:
+            conn.execute('DROP TABLE module_score_history')
+        try:
+            rescore_tree(root, FailGuardPredictor(backend='sklearn'), repo='demo', workers=1)
+            assert False, 'expected RuntimeError'
+        except RuntimeError as e:
+            assert 'demo' in str(e)
+        # The upsert of the same transaction was rolled back
+        assert db.get_tracked_modules('demo') == {}
+    print("✓ Failed save raised")
+
+if __name__ == '__main__':
+    test_incremental_rescore()
+    test_failed_save()
+    print("\n✓ All tracking tests passed!\n")
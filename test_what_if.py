@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Test the what-if sensitivity analysis"""
+
+import sys
+import json
+import itertools
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import app, predictor
+from config import FEATURE_NAMES, WHAT_IF_MAX_GRID
+from src.what_if import analyze_what_if, parse_range, risk_band_index
+from src.utils import get_risk_label
+
+BASE = {'loc': 800, 'wmc': 25, 'rfc': 30, 'cbo': 12, 'lcom': 0.8,
+        'code_churn': 20, 'num_developers': 5, 'past_defects': 5}
+RANGES = {'wmc': {'min': 5, 'max': 25, 'steps': 21}, 'past_defects': [5, 0, 2, 4], 'lcom': [0.2, 0.5, 0.8]}
+
+def test_ranges_and_bands():
+    """Range specs expand to value arrays; bands match get_risk_label"""
+    print("\n=== Testing range parsing ===")
+    assert parse_range({'min': 0, 'max': 1, 'steps': 5}).tolist() == [0, 0.25, 0.5, 0.75, 1]
+    assert parse_range([3, 1, 3]).tolist() == [1, 3]
+    # Oversized ranges are rejected before any array is allocated
+    huge = {'min': 0, 'max': 1, 'steps': 10**12}
+    for bad in ({'min': 1}, {'min': 2, 'max': 1}, [], 'x', ['a'], huge, [0] * (WHAT_IF_MAX_GRID + 1)):
+        try:
+            parse_range(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    probabilities = np.linspace(0, 1, 101)
+    labels = ['LOW', 'MEDIUM', 'HIGH']
+    assert [labels[i] for i in risk_band_index(probabilities)] == [get_risk_label(p) for p in probabilities]
+    print("✓ Ranges and bands OK")
+
+def test_single_pass_matches_predict():
+    """One scoring call; curves and cheapest change agree with per-point predictions"""
+    print("\n=== Testing what-if analysis ===")
+    calls = []
+    original = predictor.predict_proba_matrix
+    predictor.predict_proba_matrix = lambda X: calls.append(len(X)) or original(X)
+    try:
+        analysis = analyze_what_if(predictor, BASE, RANGES)
+    finally:
+        predictor.predict_proba_matrix = original
+    assert len(calls) == 1 and analysis['grid_size'] == 21 * 4 * 3
+    assert analysis['base']['probability'] == predictor.predict(BASE)['probability']
+
+    curve = analysis['curves']['past_defects']
+    assert curve['values'] == [0, 2, 4, 5]
+    assert curve['probability'][1] == predictor.predict({**BASE, 'past_defects': 2})['probability']
+
+    # Brute force over the grid with the single-module API
+    scale = dict(zip(FEATURE_NAMES, predictor.scaler.scale_))
+    base_band = analysis['base']['risk_level']
+    best = None
+    names = list(RANGES)
+    for values in itertools.product(*[parse_range(RANGES[name]) for name in names]):
+        features = {**BASE, **dict(zip(names, values))}
+        result = predictor.predict(features)
+        if ['LOW', 'MEDIUM', 'HIGH'].index(result['risk_level']) < ['LOW', 'MEDIUM', 'HIGH'].index(base_band):
+            cost = sum(abs(features[name] - BASE[name]) / scale[name] for name in names)
+            if best is None or (cost, result['probability']) < best[:2]:
+                best = (cost, result['probability'], features)
+
+    change = analysis['cheapest_change']
+    assert change is not None and abs(change['cost'] - best[0]) < 1e-3
+    assert {name: c['to'] for name, c in change['changes'].items()} == \
+        {name: best[2][name] for name in names if best[2][name] != BASE[name]}
+    print(f"✓ {analysis['grid_size']} points, cheapest change {change['changes']} -> {change['risk_level']}")
+
+def test_api():
+    """/api/what-if validates input and returns the analysis"""
+    print("\n=== Testing /api/what-if ===")
+    client = app.test_client()
+    response = client.post('/api/what-if', json={'features': BASE, 'ranges': RANGES})
+    data = json.loads(response.data)
+    assert response.status_code == 200 and data['success']
+    assert set(data['curves']) == set(RANGES)
+
+    assert client.post('/api/what-if', json={'features': BASE}).status_code == 400
+    assert client.post('/api/what-if', json={'features': BASE, 'ranges': {'size': [1, 2]}}).status_code == 400
+    huge = {name: {'min': 0, 'max': 10, 'steps': 100} for name in FEATURE_NAMES[:3]}
+    response = client.post('/api/what-if', json={'features': BASE, 'ranges': huge})
+    assert response.status_code == 400 and 'maximum' in json.loads(response.data)['error']
+    print("✓ API responses OK")
+
+if __name__ == '__main__':
+    test_ranges_and_bands()
+    test_single_pass_matches_predict()
+    test_api()
+    print("\n✓ All what-if tests passed!\n")